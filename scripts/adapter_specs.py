@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Declarative Card Adapters
+Loads card export formats described in data/config/card_formats.json and
+compiles each one into transformers for the row-wise and columnar loaders,
+so new cards can be supported without writing a loader.
+
+A spec looks like:
+
+    {
+      "name": "citi",
+      "signature": ["Status", "Date", "Description", "Debit", "Credit"],
+      "name_hints": [],
+      "date_format": "%m/%d/%Y",
+      "columns": {"Transaction Date": "Date", "Post Date": "Date",
+                  "Description": "Description"},
+      "amount": {"debit": "Debit", "credit": "Credit"},
+      "type": {"positive": "Sale"}
+    }
+
+"columns" maps standard columns to export columns (missing ones are left
+empty; an empty Merchant falls back to the Description). "amount" is either
+{"column": ..., "sign": 1 or -1} or a {"debit": ..., "credit": ...} pair,
+where credits reduce the amount whichever sign the export writes them with.
+"type" gives the Type of rows without one: {"column": ..., "values": {...}}
+maps values of an export column (e.g. a "Payment/Credit" category) to a
+Type, and "positive"/"negative" give it by amount sign otherwise. Rows cut
+off before the Transaction Date or amount columns are rejected.
+"""
+
+import json
+from operator import itemgetter
+from pathlib import Path
+
+from amount_parsing import format_amount, normalize_amount, parse_amount
+from card_formats import CardFormat, register_format
+
+# Get the project root directory (parent of scripts/)
+PROJECT_ROOT = Path(__file__).parent.parent
+SPEC_FILE = PROJECT_ROOT / 'data' / 'config' / 'card_formats.json'
+
+# Standard columns a spec may map (Amount is built from the "amount" entry)
+MAPPED_COLUMNS = ['Transaction Date', 'Post Date', 'Description', 'Merchant', 'Category', 'Type', 'Memo']
+
+
+def clean_header(header):
+    """Header names without a UTF-8 byte order mark or surrounding spaces."""
+    return [str(name).lstrip('\ufeff').strip() for name in header]
+
+
+class AdapterSpec:
+    """
+    A validated card adapter spec.
+
+    bind(header) compiles it against a file's actual header into a function
+    turning one csv.reader row (a list) into a standard row dict, using
+    precomputed column positions; transform_frame() applies the same
+    mapping to a whole DataFrame of string columns.
+    """
+
+    def __init__(self, spec):
+        if not isinstance(spec, dict):
+            raise ValueError(f"Card format spec must be an object, got {spec!r}")
+        try:
+            self.name = spec['name']
+            self.signature = list(spec['signature'])
+            columns = dict(spec['columns'])
+            amount = dict(spec['amount'])
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Card format spec {spec.get('name', '?')!r} is missing {e}") from None
+
+        unknown = sorted(set(columns) - set(MAPPED_COLUMNS))
+        if unknown:
+            raise ValueError(f"Card format {self.name!r} maps unknown columns: {', '.join(unknown)}")
+        if 'Transaction Date' not in columns:
+            raise ValueError(f"Card format {self.name!r} must map 'Transaction Date'")
+        self.columns = {column: columns.get(column) for column in MAPPED_COLUMNS}
+
+        if 'column' in amount:
+            self.amount_column = amount['column']
+            self.amount_sign = int(amount.get('sign', 1))
+            self.debit_column = self.credit_column = None
+            if self.amount_sign not in (1, -1):
+                raise ValueError(f"Card format {self.name!r}: amount sign must be 1 or -1")
+        elif 'debit' in amount and 'credit' in amount:
+            self.amount_column = None
+            self.amount_sign = 1
+            self.debit_column = amount['debit']
+            self.credit_column = amount['credit']
+        else:
+            raise ValueError(f"Card format {self.name!r}: amount needs 'column' or 'debit' and 'credit'")
+
+        type_defaults = spec.get('type', {})
+        self.positive_type = type_defaults.get('positive', '')
+        self.negative_type = type_defaults.get('negative', '')
+        self.type_column = type_defaults.get('column')
+        self.type_values = dict(type_defaults.get('values', {}))
+        if self.type_values and not self.type_column:
+            raise ValueError(f"Card format {self.name!r}: type values need a 'column'")
+        self.name_hints = list(spec.get('name_hints', []))
+        self.date_format = spec.get('date_format')
+        self.source = spec
+
+    def card_format(self):
+        """The registry entry for this spec."""
+        return CardFormat(self.name, self.signature, 'spec', amount_sign=self.amount_sign,
+                          name_hints=self.name_hints, date_format=self.date_format, spec=self)
+
+    def describe(self):
+        """Stable text form of the spec, used for fingerprinting."""
+        return json.dumps(self.source, sort_keys=True)
+
+    def bind(self, header):
+        """
+        Compile the spec against a header into a row transformer (list -> dict),
+        which raises ValueError for a row whose amount cannot be parsed.
+        """
+        positions = {name: index for index, name in enumerate(clean_header(header))}
+        width = len(positions)
+
+        mapped = [(column, positions.get(source)) for column, source in self.columns.items()]
+        present = [(column, index) for column, index in mapped if index is not None]
+        absent = [column for column, index in mapped if index is None]
+        names = [column for column, _ in present]
+        fetch = itemgetter(*[index for _, index in present]) if present else (lambda values: ())
+        if len(present) == 1:
+            single = fetch
+            fetch = lambda values: (single(values),)
+
+        amount_index = positions.get(self.amount_column) if self.amount_column else None
+        debit_index = positions.get(self.debit_column) if self.debit_column else None
+        credit_index = positions.get(self.credit_column) if self.credit_column else None
+        amount_sign = self.amount_sign
+        positive_type, negative_type = self.positive_type, self.negative_type
+        fill_type = bool(positive_type or negative_type)
+        type_index = positions.get(self.type_column) if self.type_column else None
+        type_values = self.type_values
+        empty = dict.fromkeys(absent, '')
+
+        # Exports drop trailing empty fields, so short rows are padded, but a
+        # row must reach its date and (either) amount column
+        amount_indexes = [index for index in (amount_index, debit_index, credit_index) if index is not None]
+        required = [positions.get(self.columns['Transaction Date'])] + [min(amount_indexes, default=None)]
+        required_width = max((index + 1 for index in required if index is not None), default=0)
+
+        def transform(values):
+            if len(values) < required_width:
+                raise ValueError(f"truncated row ({len(values)} of {width} fields)")
+            if len(values) < width:
+                values = values + [''] * (width - len(values))
+            row = dict(zip(names, fetch(values)))
+            row.update(empty)
+            if not row['Merchant']:
+                row['Merchant'] = row['Description']
+
+            if amount_index is not None:
+                value = normalize_amount(values[amount_index])[0]
+                if value is not None:
+                    value = amount_sign * value
+                row['Amount'] = format_amount(value)
+            else:
+                debit = parse_amount(values[debit_index]) if debit_index is not None else None
+                credit = parse_amount(values[credit_index]) if credit_index is not None else None
+                if debit is None and credit is None:
+                    value = None
+                else:
+                    value = (debit or 0.0) - abs(credit or 0.0)
+                row['Amount'] = format_amount(value)
+
+            if type_index is not None and not row['Type']:
+                row['Type'] = type_values.get(values[type_index].strip(), '')
+            if fill_type and not row['Type'] and value is not None:
+                row['Type'] = positive_type if value >= 0 else negative_type
+            row['Normalized Merchant'] = ''
+            return row
+
+        return transform
+
+    @property
+    def amount_columns(self):
+        """Export columns the Amount is built from."""
+        if self.amount_column:
+            return [self.amount_column]
+        return [self.debit_column, self.credit_column]
+
+    @property
+    def required_columns(self):
+        """
+        Groups of export columns a row must reach: it is truncated when every
+        column of a group is missing (the date, then the amount columns).
+        """
+        return [[self.columns['Transaction Date']], self.amount_columns]
+
+    def transform_frame(self, raw, source_name, amounts=None):
+        """
+        Map a DataFrame of string columns (as read from the export) to the
+        standard columns. amounts optionally gives amount columns already
+        parsed to floats (see columnar_loaders.drop_unparseable_amounts).
+        """
+        import columnar_loaders
+        from columnar_loaders import np, pd
+
+        def parsed(column):
+            if amounts is not None:
+                return amounts[column]
+            return columnar_loaders.parse_amount_column(columnar_loaders._text(raw, column))
+
+        raw.columns = clean_header(raw.columns)
+        frame = pd.DataFrame(index=raw.index)
+        for column, source in self.columns.items():
+            frame[column] = columnar_loaders._text(raw, source) if source else ''
+        frame['Merchant'] = frame['Merchant'].where(frame['Merchant'] != '', frame['Description'])
+
+        if self.amount_column:
+            amount = parsed(self.amount_column)
+            if self.amount_sign != 1:
+                amount = amount * self.amount_sign
+        else:
+            debit = parsed(self.debit_column)
+            credit = parsed(self.credit_column)
+            amount = debit.fillna(0.0) - credit.abs().fillna(0.0)
+            amount = amount.where(debit.notna() | credit.notna())
+        frame['Amount'] = amount
+
+        if self.type_column:
+            mapped = columnar_loaders._text(raw, self.type_column).str.strip().map(self.type_values).fillna('')
+            frame['Type'] = frame['Type'].where(frame['Type'] != '', mapped)
+        if self.positive_type or self.negative_type:
+            defaults = np.where(amount >= 0, self.positive_type, self.negative_type)
+            fill = (frame['Type'] == '') & amount.notna()
+            frame['Type'] = frame['Type'].where(~fill, pd.Series(defaults, index=frame.index))
+        frame['Source'] = source_name
+        return frame
+
+
+def load_specs(spec_file=SPEC_FILE):
+    """Read and validate the adapter specs in spec_file (none if it does not exist)."""
+    spec_file = Path(spec_file)
+    if not spec_file.exists():
+        return []
+    try:
+        with open(spec_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Could not read card formats from {spec_file}: {e}") from None
+    return [AdapterSpec(spec) for spec in data.get('formats', [])]
+
+
+def register_spec_formats(spec_file=SPEC_FILE):
+    """Compile the specs in spec_file and add them to the card format registry."""
+    specs = load_specs(spec_file)
+    for spec in specs:
+        register_format(spec.card_format())
+    return specs
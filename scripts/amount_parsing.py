@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Amount Parsing
+Parses the amount cells of card exports. Plain numbers take the float()
+fast path; amounts formatted for display (thousands separators, currency
+symbols, parenthesized or trailing-minus negatives) are cleaned up first.
+Anything else raises ValueError, so the row can be rejected instead of
+aborting the whole run.
+"""
+
+import re
+
+# Currency symbols and codes, and spaces, dropped from formatted amounts
+CURRENCY_RE = re.compile(r'[\s$€£¥]|(?<![A-Z])(?:USD|EUR|GBP|CAD)(?![A-Z])')
+
+# Commas are only accepted as thousands separators (1,234.56), never as a
+# decimal comma (1.234,56), which would silently change the value
+THOUSANDS_RE = re.compile(r'[+-]?\d{1,3}(?:,\d{3})+(?:\.\d*)?')
+
+# Amounts are written to the consolidated file with two decimals by every
+# engine (also the float_format of DataFrame output)
+AMOUNT_FORMAT = '%.2f'
+
+
+def _clean_amount(text):
+    """Value of a formatted amount such as '$1,234.56', '(12.00)' or '12.00-', or None."""
+    cleaned = CURRENCY_RE.sub('', text)
+    negative = False
+    if cleaned.startswith('(') and cleaned.endswith(')'):
+        negative, cleaned = True, cleaned[1:-1]
+    elif cleaned.endswith('-'):
+        negative, cleaned = True, cleaned[:-1]
+    if ',' in cleaned:
+        if not THOUSANDS_RE.fullmatch(cleaned):
+            return None
+        cleaned = cleaned.replace(',', '')
+    try:
+        value = float(cleaned)
+    except ValueError:
+        return None
+    if value - value != 0:  # inf or nan
+        return None
+    return -value if negative else value
+
+
+def normalize_amount(text):
+    """
+    (value, text) of an amount cell: value is a float (None for an empty
+    cell) and text is the cell as written when it is a plain number, or
+    str(value) when it had to be cleaned. Raises ValueError when the cell is
+    not an amount.
+    """
+    try:
+        value = float(text)
+        if value - value == 0:  # Finite
+            return value, text
+    except ValueError:
+        if not text.strip():
+            return None, ''
+    value = _clean_amount(text)
+    if value is None:
+        raise ValueError(f"unparseable amount {text.strip()!r}")
+    return value, str(value)
+
+
+def format_amount(value):
+    """Amount text as written to the consolidated file ('' for a missing amount, 0.00 for -0.0)."""
+    if value is None or value != value:
+        return ''
+    return AMOUNT_FORMAT % (value + 0.0)
+
+
+def parse_amount(text):
+    """Float value of an amount cell (None for an empty cell); raises ValueError if it is not an amount."""
+    return normalize_amount(text)[0]
+
+
+def parse_amount_or_nan(text):
+    """parse_amount for column fallbacks: NaN for empty or unparseable cells."""
+    value = _clean_amount(text)
+    return value if value is not None else float('nan')
@@ -10,25 +10,49 @@ import json
 from pathlib import Path
 from datetime import datetime
 
+from amount_parsing import AMOUNT_FORMAT
+from category_rules import DEFAULT_CATEGORY_RULES
+from concatenate_transactions import rewrite_outputs
+from derived_columns import ABSOLUTE_AMOUNT_COLUMN, TRANSACTION_TYPE_COLUMN, transaction_type
+from transaction_store import STORE_NAME, TransactionStore
+
 # Get the project root directory (parent of scripts/)
 PROJECT_ROOT = Path(__file__).parent.parent
 DEFAULT_CSV = PROJECT_ROOT / 'data' / 'processed' / 'all_transactions.csv'
+DEFAULT_STORE = PROJECT_ROOT / 'data' / 'processed' / STORE_NAME
 
 class CategoryAssigner:
-    def __init__(self, csv_file=None):
-        if csv_file is None:
-            csv_file = DEFAULT_CSV
-        else:
-            csv_file = Path(csv_file)
-        
-        if not csv_file.exists():
-            raise FileNotFoundError(
-                f"Transaction file not found: {csv_file}\n\n"
-                f"Please run 'uv run python scripts/concatenate_transactions.py' first to generate the file."
-            )
+    def __init__(self, csv_file=None, store_file=None):
+        # The SQLite store, when present, is edited in place row by row; the
+        # edits are then written through to the consolidated CSV next to it
+        if store_file is None and csv_file is None and DEFAULT_STORE.exists():
+            store_file = DEFAULT_STORE
         
-        self.csv_file = csv_file
-        self.df = pd.read_csv(csv_file)
+        self.store = None
+        if store_file is not None:
+            store_file = Path(store_file)
+            if not store_file.exists():
+                raise FileNotFoundError(
+                    f"Transaction store not found: {store_file}\n\n"
+                    f"Please run 'uv run python scripts/concatenate_transactions.py --sqlite' first to create it."
+                )
+            self.csv_file = None
+            self.store = TransactionStore(store_file)
+            self.df = self.store.read_frame(parse_dates=False)
+        else:
+            if csv_file is None:
+                csv_file = DEFAULT_CSV
+            else:
+                csv_file = Path(csv_file)
+            
+            if not csv_file.exists():
+                raise FileNotFoundError(
+                    f"Transaction file not found: {csv_file}\n\n"
+                    f"Please run 'uv run python scripts/concatenate_transactions.py' first to generate the file."
+                )
+            
+            self.csv_file = csv_file
+            self.df = pd.read_csv(csv_file)
         self.changes_made = False
         
         # Available categories (from existing data)
@@ -38,10 +62,18 @@ class CategoryAssigner:
         ])
         self.available_categories.append('Other')
         
+    @staticmethod
+    def _add_absolute_amount(transactions):
+        """Absolute Amount column, unless ingestion already wrote it."""
+        if ABSOLUTE_AMOUNT_COLUMN not in transactions:
+            transactions[ABSOLUTE_AMOUNT_COLUMN] = transactions['Amount'].abs()
+    
     def get_missing_category_transactions(self):
         """Get transactions with missing categories, sorted by absolute amount."""
         missing = self.df[self.df['Category'].isna() | (self.df['Category'] == '')].copy()
-        missing['Absolute Amount'] = missing['Amount'].abs()
+        self._add_absolute_amount(missing)
+        # Suggestions for the 'auto' command, matched for all rows at once
+        missing['Suggested Category'] = DEFAULT_CATEGORY_RULES.suggest_column(missing)
         missing = missing.sort_values('Absolute Amount', ascending=False)
         return missing
     
@@ -52,7 +84,7 @@ class CategoryAssigner:
             (self.df['Normalized Merchant'] == '') |
             (self.df['Normalized Merchant'] == 'Unknown')
         ].copy()
-        missing['Absolute Amount'] = missing['Amount'].abs()
+        self._add_absolute_amount(missing)
         missing = missing.sort_values('Absolute Amount', ascending=False)
         return missing
     
@@ -197,26 +229,10 @@ class CategoryAssigner:
         self._save_changes()
     
     def _suggest_category(self, row):
-        """Suggest a category based on merchant and description."""
-        merchant = str(row.get('Normalized Merchant', '')).lower()
-        desc = str(row.get('Description', '')).lower()
-        
-        # Category keywords
-        category_keywords = {
-            'Rent': ['rent', 'bilt rent', 'biltprotect'],
-            'Groceries': ['trader joe', 'safeway', 'whole foods', 'h mart', 'walmart', 'target', 'grocery', 'market'],
-            'Food & Drink': ['restaurant', 'cafe', 'coffee', 'sushi', 'pizza', 'burger', 'bar', 'starbucks', 'mcdonald'],
-            'Travel': ['airline', 'southwest', 'delta', 'alaska', 'uber', 'lyft', 'hotel', 'airbnb'],
-            'Shopping': ['amazon', 'uniqlo', 'mall', 'store'],
-            'Bills & Utilities': ['insurance', 'wifi', 'internet', 'utility', 'lemonade'],
-        }
-        
-        text = f"{merchant} {desc}"
-        for category, keywords in category_keywords.items():
-            if any(keyword in text for keyword in keywords):
-                return category
-        
-        return None
+        """Suggest a category based on merchant and description (see category_rules.py)."""
+        if 'Suggested Category' in row:
+            return row['Suggested Category'] or None
+        return DEFAULT_CATEGORY_RULES.suggest(row)
     
     def _extract_merchant_from_description(self, description):
         """Extract a clean merchant name from description."""
@@ -233,19 +249,41 @@ class CategoryAssigner:
     def _update_category(self, index, category):
         """Update category for a transaction."""
         self.df.at[index, 'Category'] = category
+        if TRANSACTION_TYPE_COLUMN in self.df:
+            # A Payment category makes the transaction a payment
+            row = self.df.loc[index]
+            self.df.at[index, TRANSACTION_TYPE_COLUMN] = transaction_type(row['Type'], category, row['Amount'])
+        if self.store is not None:
+            # Single-row UPDATE instead of rewriting the whole file
+            self.store.update_category(index, category)
         self.changes_made = True
     
     def _update_merchant(self, index, merchant):
         """Update normalized merchant for a transaction."""
         self.df.at[index, 'Normalized Merchant'] = merchant
+        if self.store is not None:
+            self.store.update_merchant(index, merchant)
         self.changes_made = True
     
     def _save_changes(self):
-        """Save changes to CSV file."""
-        if self.changes_made:
+        """Save changes to CSV file (or commit them to the transaction store)."""
+        if self.changes_made and self.store is not None:
+            self.store.commit()
+            print(f"\n✓ Changes saved to: {self.store.db_file}")
+            # Write the edits through to the CSV, its Parquet copy and the
+            # partitions, which ingestion also keeps them in from now on
+            output_file = self.store.db_file.with_name(DEFAULT_CSV.name)
+            if output_file.exists():
+                for path in rewrite_outputs(output_file, self.store.edits()):
+                    print(f"✓ Changes written to: {path}")
+            else:
+                print(f"ℹ️  {output_file} not found - changes are only in the store")
+        elif self.changes_made:
             # Save updated file directly (no backup needed since file is generated on-the-fly)
-            self.df.to_csv(self.csv_file, index=False)
+            self.df.to_csv(self.csv_file, index=False, float_format=AMOUNT_FORMAT)
             print(f"\n✓ Changes saved to: {self.csv_file}")
+            for path in rewrite_outputs(self.csv_file)[1:]:
+                print(f"✓ Refreshed: {path}")
         else:
             print("\nℹ️  No changes made")
     
@@ -281,11 +319,13 @@ def main():
     parser.add_argument('--merchants', action='store_true', help='Assign missing merchants')
     parser.add_argument('--stats', action='store_true', help='Show statistics only')
     parser.add_argument('--file', default=None, help='CSV file to process (default: data/processed/all_transactions.csv)')
+    parser.add_argument('--db', default=None, help=f'SQLite transaction store to edit (default: data/processed/{STORE_NAME} when it exists); '
+                                                       f'edits are also written to the {DEFAULT_CSV.name} next to it')
     
     args = parser.parse_args()
     
     try:
-        assigner = CategoryAssigner(args.file)
+        assigner = CategoryAssigner(args.file, args.db)
     except FileNotFoundError as e:
         print(f"\n❌ {e}")
         return 1
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Ingestion Benchmark
+Times the ingestion pipeline stage by stage (parse, normalize, sort/merge,
+write) and end to end for each engine, on synthetic exports from
+generate_transactions.py or on a directory of real ones. Rows/sec and peak
+RSS are written to a JSON results file and compared with a stored baseline.
+Each engine runs in a fresh process so its peak RSS is its own.
+"""
+
+import contextlib
+import csv
+import io
+import json
+import multiprocessing
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Not available on Windows: peak RSS is not reported
+    resource = None
+
+import adapter_specs
+import card_formats
+import columnar_loaders
+from concatenate_transactions import (concatenate_transactions, extract_card_name, get_column_order,
+                                      iter_input_rows, load_input_frame, transaction_sort_key)
+from date_parsing import canonicalize_dates
+from dedup import Deduplicator, card_key
+from generate_transactions import generate_dataset
+from input_files import list_input_files
+from merchant_normalizer import MerchantNormalizer
+
+# Get the project root directory (parent of scripts/)
+PROJECT_ROOT = Path(__file__).parent.parent
+BENCHMARK_DIR = PROJECT_ROOT / 'data' / 'processed' / 'benchmarks'
+RESULTS_FILE = BENCHMARK_DIR / 'results.json'
+BASELINE_FILE = BENCHMARK_DIR / 'baseline.json'
+
+# Timed pipeline stages, in order; 'total' is a full concatenate_transactions
+# run and 'rebuild' an incremental rerun with no input changes
+STAGES = ['parse', 'normalize', 'sort', 'write', 'total', 'rebuild']
+
+# Relative slowdown (or RSS growth) against the baseline reported as a regression
+DEFAULT_TOLERANCE = 0.10
+
+
+class _SkipNormalization:
+    """Stand-in normalizer for the parse stage, so merchants are timed in the normalize stage."""
+    cache = None
+
+    def normalize_many(self, merchants):
+        return ['' for _ in merchants]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(peak / scale, 1)
+
+
+def _timed(timings, stage, func, *args, **kwargs):
+    """Run func, recording its wall-clock time under stage."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    timings[stage] = time.perf_counter() - start
+    return result
+
+
+def _write_csv(path, rows, columns):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def run_engine(engine, data_dir, work_dir):
+    """
+    Benchmark one engine on the input files in data_dir, writing its outputs
+    under work_dir. Returns the input row count, per-stage seconds and the
+    process's peak RSS.
+    """
+    adapter_specs.register_spec_formats()
+    inputs = []
+    for csv_file in list_input_files(data_dir):
+        card_format = card_formats.sniff_format(csv_file)
+        if card_format is not None:
+            inputs.append((csv_file, extract_card_name(csv_file.name), card_format))
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    skip = _SkipNormalization()
+    normalizer = MerchantNormalizer()  # No cache: every distinct merchant runs the rules
+    deduplicator = Deduplicator(card_key(source_name) for _, source_name, _ in inputs)
+    timings = {}
+
+    if engine == 'columnar':
+        frames = _timed(timings, 'parse', lambda: [
+            load_input_frame(csv_file, source_name, skip, card_format=card_format)
+            for csv_file, source_name, card_format in inputs
+        ])
+        input_rows = sum(len(frame) for frame in frames)
+
+        def normalize():
+            for frame in frames:
+                frame['Normalized Merchant'] = columnar_loaders.normalize_merchant_column(frame['Merchant'], normalizer)
+
+        def sort():
+            return columnar_loaders.dedupe_frames([
+                columnar_loaders.sort_frame(columnar_loaders.canonicalize_date_columns(frame, {}, card_format.date_format))
+                for frame, (_, _, card_format) in zip(frames, inputs)
+            ], deduplicator)
+
+        _timed(timings, 'normalize', normalize)
+        merged = _timed(timings, 'sort', sort)
+        columns = get_column_order(set(merged.columns))
+        _timed(timings, 'write', lambda: merged.to_csv(work_dir / 'stages.csv', index=False, columns=columns,
+                                                       encoding='utf-8', lineterminator='\r\n'))
+    else:
+        files = _timed(timings, 'parse', lambda: [
+            list(iter_input_rows(csv_file, source_name, skip, card_format=card_format))
+            for csv_file, source_name, card_format in inputs
+        ])
+        input_rows = sum(len(rows) for rows in files)
+
+        def normalize():
+            for rows in files:
+                for row, merchant in zip(rows, normalizer.normalize_many(row.get('Merchant', '') for row in rows)):
+                    row['Normalized Merchant'] = merchant
+
+        def sort():
+            sorted_files = []
+            for rows, (_, _, card_format) in zip(files, inputs):
+                rows = list(canonicalize_dates(rows, {}, card_format.date_format))
+                rows.sort(key=transaction_sort_key, reverse=True)
+                sorted_files.append(rows)
+            return list(deduplicator.iter_unique(sorted_files, transaction_sort_key))
+
+        _timed(timings, 'normalize', normalize)
+        merged = _timed(timings, 'sort', sort)
+        columns = get_column_order(set().union(*(rows[0] for rows in files if rows)))
+        _timed(timings, 'write', _write_csv, work_dir / 'stages.csv', merged, columns)
+
+    # End to end, as finance-concat runs it (cold merchant cache), then an unchanged rerun
+    output_file = work_dir / 'pipeline' / 'all_transactions.csv'
+    with contextlib.redirect_stdout(io.StringIO()):
+        _timed(timings, 'total', concatenate_transactions, data_dir, output_file, incremental=False,
+               engine=engine, store=False)
+        _timed(timings, 'rebuild', concatenate_transactions, data_dir, output_file, incremental=True,
+               engine=engine, store=False)
+
+    return {
+        'input_files': len(inputs),
+        'input_rows': input_rows,
+        'output_rows': len(merged),
+        'stages': {
+            stage: {
+                'seconds': round(seconds, 4),
+                'rows_per_sec': round(input_rows / seconds) if seconds > 0 else None,
+            }
+            for stage, seconds in timings.items()
+        },
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def run_benchmark(data_dir, engines, work_dir):
+    """Benchmark each engine in its own process; returns the results document."""
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'data_dir': str(data_dir),
+        'engines': {},
+    }
+    context = multiprocessing.get_context('spawn')
+    for engine in engines:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results['engines'][engine] = pool.submit(run_engine, engine, str(data_dir),
+                                                     str(Path(work_dir) / engine)).result()
+    return results
+
+
+def compare_results(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare rows/sec and peak RSS with a baseline results document.
+    Returns a list of (engine, metric, baseline value, value, relative change, regressed).
+    """
+    comparisons = []
+    for engine, current in results['engines'].items():
+        base = baseline.get('engines', {}).get(engine)
+        if base is None:
+            continue
+        for stage in STAGES:
+            rate = current['stages'].get(stage, {}).get('rows_per_sec')
+            base_rate = base.get('stages', {}).get(stage, {}).get('rows_per_sec')
+            if rate and base_rate:
+                change = rate / base_rate - 1
+                comparisons.append((engine, f'{stage} rows/s', base_rate, rate, change, change < -tolerance))
+        rss, base_rss = current.get('peak_rss_mb'), base.get('peak_rss_mb')
+        if rss and base_rss:
+            change = rss / base_rss - 1
+            comparisons.append((engine, 'peak RSS MB', base_rss, rss, change, change > tolerance))
+    return comparisons
+
+
+def print_results(results):
+    for engine, result in results['engines'].items():
+        rss = f", peak RSS {result['peak_rss_mb']} MB" if result['peak_rss_mb'] is not None else ''
+        print(f"\n{engine} engine: {result['input_rows']} rows in {result['input_files']} file(s) "
+              f"-> {result['output_rows']} rows{rss}")
+        for stage in STAGES:
+            timing = result['stages'].get(stage)
+            if timing:
+                print(f"  {stage:<10} {timing['seconds']:>9.3f}s  {timing['rows_per_sec'] or 0:>12,} rows/s")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark transaction ingestion stage by stage')
+    parser.add_argument('--rows', type=int, default=100000, help='Synthetic transactions to generate (default: 100000)')
+    parser.add_argument('--data-dir', default=None, help='Benchmark these CSV files instead of generating synthetic ones')
+    parser.add_argument('--engines', default='rows,columnar', help='Comma-separated engines to run (default: rows,columnar)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the synthetic data (default: 0)')
+    parser.add_argument('--results', default=str(RESULTS_FILE), help='JSON file to write the results to')
+    parser.add_argument('--baseline', default=str(BASELINE_FILE), help='JSON baseline to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Relative slowdown reported as a regression (default: 0.10)')
+
+    args = parser.parse_args()
+
+    engines = [engine.strip() for engine in args.engines.split(',') if engine.strip()]
+    if 'columnar' in engines and not columnar_loaders.HAS_PANDAS:
+        print("⚠ pandas is not installed - skipping the columnar engine")
+        engines.remove('columnar')
+
+    with tempfile.TemporaryDirectory(prefix='finance_bench_') as tmp:
+        if args.data_dir:
+            data_dir = Path(args.data_dir)
+        else:
+            data_dir = Path(tmp) / 'input'
+            print(f"Generating {args.rows} synthetic transactions...")
+            generate_dataset(data_dir, args.rows, seed=args.seed)
+        results = run_benchmark(data_dir, engines, Path(tmp) / 'work')
+
+    print_results(results)
+
+    results_path = Path(args.results)
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(results_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✓ Saved results to {results_path}")
+
+    baseline_path = Path(args.baseline)
+    regressions = 0
+    if baseline_path.exists():
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\nCompared with baseline from {baseline.get('created', '?')}:")
+        for engine, metric, base_value, value, change, regressed in compare_results(results, baseline, args.tolerance):
+            print(f"  {'⚠' if regressed else '✓'} {engine} {metric}: {base_value:,} -> {value:,} ({change:+.1%})")
+            regressions += regressed
+    if args.save_baseline:
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Saved baseline to {baseline_path}")
+
+    if regressions:
+        print(f"\n⚠ {regressions} metric(s) regressed by more than {args.tolerance:.0%}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Card Export Formats
+Registry of the card issuers' CSV layouts. Each format declares the header
+columns that identify it and its amount sign convention, so an input file is
+classified from its first line rather than from its file name.
+"""
+
+import hashlib
+
+from input_files import read_header
+
+
+class CardFormat:
+    """
+    One card issuer's export layout.
+
+    signature: columns that must all appear in the header
+    layout: loader that reads the rows ('chase' for the Transaction Date /
+        Post Date / Description / Type / Amount / Memo layout, 'apple' for
+        Apple Card exports, 'spec' for formats declared in
+        data/config/card_formats.json, see adapter_specs.py)
+    amount_sign: multiplier bringing amounts to the standard convention
+        (positive = expenses, negative = refunds/payments)
+    name_hints: file name substrings selecting this format when several
+        formats share the same header
+    date_format: strptime format of the dates, or None to detect it per file
+    spec: the compiled adapter of a 'spec' format
+    """
+
+    def __init__(self, name, signature, layout, amount_sign=1, name_hints=(), date_format=None, spec=None):
+        self.name = name
+        self.signature = frozenset(signature)
+        self.layout = layout
+        self.amount_sign = amount_sign
+        self.name_hints = tuple(hint.lower() for hint in name_hints)
+        self.date_format = date_format
+        self.spec = spec
+
+    def __repr__(self):
+        return f"CardFormat({self.name!r})"
+
+    def matches(self, columns):
+        """True if every signature column is present in columns."""
+        return self.signature.issubset(columns)
+
+    def hinted_by(self, filename):
+        """True if filename contains one of this format's name hints."""
+        filename = filename.lower()
+        return any(hint in filename for hint in self.name_hints)
+
+    def describe(self):
+        """Stable text form of the definition, used for fingerprinting."""
+        text = (f"{self.name}|{','.join(sorted(self.signature))}|{self.layout}|"
+                f"{self.amount_sign}|{','.join(self.name_hints)}")
+        if self.spec is not None:
+            text += f"|{self.spec.describe()}"
+        return text
+
+
+CHASE_LAYOUT_COLUMNS = ['Transaction Date', 'Post Date', 'Description', 'Type', 'Amount']
+
+# Registered formats, in priority order
+FORMATS = [
+    CardFormat('apple', ['Transaction Date', 'Clearing Date', 'Description', 'Amount (USD)'], 'apple'),
+    # Chase and Bilt exports share a header and both record expenses as
+    # negative amounts, so they are told apart (and from files already in the
+    # standard convention, which may keep the same columns) by file name only
+    CardFormat('chase', CHASE_LAYOUT_COLUMNS, 'chase', amount_sign=-1, name_hints=('chase', 'sapphire', 'freedom')),
+    CardFormat('bilt', CHASE_LAYOUT_COLUMNS, 'chase', amount_sign=-1, name_hints=('bilt',)),
+    # Files converted to the standard layout and sign convention (see AGENTS.md)
+    CardFormat('standard', ['Transaction Date', 'Description', 'Amount'], 'chase'),
+]
+
+
+def register_format(card_format):
+    """Add a format to the registry, replacing any format with the same name."""
+    for index, existing in enumerate(FORMATS):
+        if existing.name == card_format.name:
+            FORMATS[index] = card_format
+            return
+    FORMATS.append(card_format)
+
+
+def get_format(name):
+    """Return the registered format called name."""
+    for card_format in FORMATS:
+        if card_format.name == name:
+            return card_format
+    raise KeyError(f"Unknown card format: {name}")
+
+
+def detect_format(columns, filename=''):
+    """
+    Pick the format of a file from its header columns.
+
+    Among the formats whose signature matches, one whose name hint appears
+    in filename wins; otherwise the most specific format without name hints
+    is used, since a file in the standard convention can have exactly an
+    issuer's header (conflicting_formats reports that guess). Returns None
+    if no format matches.
+    """
+    candidates = [card_format for card_format in FORMATS if card_format.matches(columns)]
+    if not candidates:
+        return None
+    for card_format in candidates:
+        if card_format.hinted_by(filename):
+            return card_format
+    unhinted = [card_format for card_format in candidates if not card_format.name_hints]
+    return max(unhinted or candidates, key=lambda card_format: len(card_format.signature))
+
+
+def conflicting_formats(card_format, columns, filename=''):
+    """
+    Formats that the header columns also match but that detect_format only
+    picks on a name hint, and that read amounts with another sign than
+    card_format, the format it picked. If there are any, the sign
+    convention of the file was a guess.
+    """
+    if card_format.hinted_by(filename):
+        return []
+    return [other for other in FORMATS
+            if other is not card_format and other.name_hints and other.matches(columns)
+            and other.amount_sign != card_format.amount_sign]
+
+
+def sniff_format(filepath):
+    """Detect the format of an input file by reading only its header line."""
+    return detect_format(read_header(filepath), filepath.name)
+
+
+def sniff_conflicts(filepath, card_format):
+    """conflicting_formats of an input file detected as card_format."""
+    return conflicting_formats(card_format, read_header(filepath), filepath.name)
+
+
+def registry_fingerprint():
+    """Hash of the registered formats, used to invalidate rows parsed with other definitions."""
+    text = '\n'.join(card_format.describe() for card_format in FORMATS)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
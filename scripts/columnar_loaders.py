@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+Columnar Loaders
+Reads Chase, Bilt, Apple and spec-defined CSV exports into typed DataFrame columns and applies
+the sign flip, column remapping and category auto-fill as whole-column operations.
+The dict-based loaders in concatenate_transactions.py remain the fallback when
+pandas is not installed. Also writes the typed Parquet copy of the consolidated
+file that the dashboard loads instead of re-parsing the CSV.
+"""
+
+import csv
+import io
+import os
+import time
+from pathlib import Path
+
+from amount_parsing import parse_amount_or_nan
+from category_rules import DEFAULT_CATEGORY_RULES
+from date_parsing import BAD_DATE_LINES, CANONICAL_DATE_FORMAT, DATE_COLUMNS, DETECTION_SAMPLE_SIZE, detect_date_format
+from input_files import open_input_binary
+from merchant_normalizer import DEFAULT_NORMALIZER
+from lineage import LINE_COLUMN, LINEAGE_COLUMNS, record_lines
+from row_rejects import RowRejects
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:  # Columnar ingestion is optional
+    np = None
+    pd = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pa_parquet
+except ImportError:  # Falls back to the pandas C parser; no typed output
+    pa = None
+    pa_csv = None
+    pa_parquet = None
+
+HAS_PANDAS = pd is not None
+HAS_TYPED_OUTPUT = HAS_PANDAS and pa_parquet is not None
+
+# Typed copy of the consolidated CSV, written next to it
+TYPED_OUTPUT_SUFFIX = '.parquet'
+
+# Low-cardinality text columns stored as dictionary-encoded categoricals
+CATEGORICAL_COLUMNS = ('Source', 'Category', 'Type', 'Normalized Merchant', 'Transaction Type', 'Month')
+
+# Columns stored as floats
+FLOAT_COLUMNS = ('Amount', 'Absolute Amount')
+
+
+def _read_header(data):
+    """Column names from the first line of a CSV byte string."""
+    first_line = data.split(b'\n', 1)[0].decode('utf-8')
+    return next(csv.reader([first_line]), [])
+
+
+def _read_ragged_frame(data, rejects=None):
+    """
+    Read CSV bytes whose rows do not all have the header's number of fields
+    with the csv module: short rows are padded with missing values (None),
+    rows with extra fields are rejected. The index holds line numbers.
+    """
+    reader = csv.reader(io.StringIO(data.decode('utf-8-sig'), newline=''))
+    header = next(reader, [])
+    width = len(header)
+    records, lines = [], []
+    for values in reader:
+        if not values:
+            continue
+        if len(values) > width:
+            if rejects is not None:
+                rejects.add(reader.line_num, f"too many fields ({len(values)}, expected {width})", values)
+        else:
+            records.append(values + [None] * (width - len(values)))
+            lines.append(reader.line_num)
+    return pd.DataFrame(records, columns=header, index=lines, dtype=object)
+
+
+def read_csv_frame(filepath, byte_range=None, rejects=None, stats=None):
+    """
+    Read a CSV file (or a byte range of it) into a DataFrame of string columns,
+    indexed by line number (the header is line 1). Cell text is kept exactly
+    as written; fields missing from a short (truncated) row are NaN (the
+    pandas parser used without pyarrow pads them with '' instead), and rows
+    with extra fields are added to rejects (a row_rejects.RowRejects) and
+    dropped. The number of lines read after the header is stored in
+    stats['lines'].
+    """
+    with open_input_binary(filepath, byte_range) as f:
+        data = f.read()
+    if stats is not None:
+        stats['lines'] = stats.get('lines', 0) + max(data.count(b'\n') + (not data.endswith(b'\n')) - 1, 0)
+
+    if pa_csv is not None:
+        # pyarrow's multithreaded reader, with every column kept as text
+        header = _read_header(data)
+        try:
+            table = pa_csv.read_csv(
+                io.BytesIO(data),
+                convert_options=pa_csv.ConvertOptions(
+                    column_types={name: pa.string() for name in header},
+                    strings_can_be_null=False,
+                ),
+            )
+        except (pa.ArrowInvalid, ValueError):
+            # Ragged rows and other irregular files are read row by row
+            return _read_ragged_frame(data, rejects)
+        frame = table.to_pandas()
+    else:
+        try:
+            frame = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False, encoding='utf-8')
+        except pd.errors.ParserError:
+            return _read_ragged_frame(data, rejects)
+    frame.index = record_lines(data, len(frame))
+    return frame
+
+
+def _text(frame, column):
+    """A column as strings, '' where missing (or a column of '' if absent)."""
+    if column not in frame.columns:
+        return pd.Series('', index=frame.index, dtype=object)
+    return frame[column].fillna('').astype(str)
+
+
+def normalize_merchant_column(merchants, normalizer=None, stats=None):
+    """
+    Normalize a merchant column, running the rules once per distinct value
+    (the time taken is added to stats['normalize_seconds']).
+    """
+    if normalizer is None:
+        normalizer = DEFAULT_NORMALIZER
+    start = time.perf_counter()
+    codes, uniques = pd.factorize(merchants, use_na_sentinel=False)
+    normalized = np.array(normalizer.normalize_many(list(uniques)), dtype=object)
+    result = pd.Series(normalized[codes], index=merchants.index, dtype=object)
+    if stats is not None:
+        stats['normalize_seconds'] = stats.get('normalize_seconds', 0.0) + time.perf_counter() - start
+    return result
+
+
+def auto_assign_category_column(frame):
+    """
+    Vectorized auto_assign_category: fills empty categories from the auto
+    rules of category_rules.py, evaluated over whole columns.
+    """
+    return DEFAULT_CATEGORY_RULES.assign_column(frame)
+
+
+def assign_categories(frame, stats=None):
+    """Auto-assign empty categories, adding the number filled to stats['auto_categories']."""
+    category = auto_assign_category_column(frame)
+    if stats is not None:
+        filled = int(((category != '') & (category != _text(frame, 'Category'))).sum())
+        stats['auto_categories'] = stats.get('auto_categories', 0) + filled
+    frame['Category'] = category
+    return frame
+
+
+def parse_amount_column(amounts):
+    """
+    Parse an amount column of strings into floats. Plain numbers are
+    converted in one vectorized pass; only the cells it cannot read are
+    cleaned up one by one (see amount_parsing.py). Empty and unparseable
+    cells become NaN.
+    """
+    values = pd.to_numeric(amounts.replace('', np.nan), errors='coerce').astype(float)
+    failed = values.isna() | np.isinf(values)
+    if failed.any():
+        failed &= amounts != ''
+        values[failed] = amounts[failed].map(parse_amount_or_nan).astype(float)
+    return values
+
+
+def unparseable_amounts(amounts, values):
+    """Mask of the cells of an amount column that are not blank but parsed to NaN."""
+    invalid = values.isna()
+    if invalid.any():
+        invalid[invalid] = amounts[invalid].str.strip() != ''
+    return invalid
+
+
+def drop_unparseable_amounts(raw, columns, rejects=None, required=True):
+    """
+    Parse the amount columns of a frame read by read_csv_frame and drop the
+    rows whose amount cannot be parsed or, when required, is missing
+    because the line was truncated before it; they are added to rejects
+    (a row_rejects.RowRejects), as the row-wise loaders do.
+    Returns (raw, {column: float amounts}) for the rows kept (absent columns
+    parse as NaN).
+    """
+    reasons = pd.Series(None, index=raw.index, dtype=object)
+    amounts = {}
+    for column in columns:
+        text = _text(raw, column)
+        amounts[column] = values = parse_amount_column(text)
+        invalid = unparseable_amounts(text, values) & reasons.isna()
+        if invalid.any():
+            reasons[invalid] = 'unparseable amount ' + text[invalid].str.strip().map(repr)
+        if required and column in raw.columns:
+            truncated = raw[column].isna() & reasons.isna()
+            if truncated.any():
+                fields = raw[truncated].notna().sum(axis=1)
+                reasons[truncated] = fields.map(lambda n: f"truncated row ({n} of {len(raw.columns)} fields)")
+
+    rejected = reasons.notna()
+    if not rejected.any():
+        return raw, amounts
+    if rejects is not None:
+        rows = raw[rejected]
+        for line, reason, values in zip(rows.index, reasons[rejected], rows.itertuples(index=False, name=None)):
+            rejects.add(line, reason, [value for value in values if isinstance(value, str)])
+    kept = ~rejected
+    return raw[kept].copy(), {column: values[kept] for column, values in amounts.items()}
+
+
+def drop_truncated_rows(raw, required, rejects=None):
+    """
+    Drop the rows of a frame read by read_csv_frame that were cut off before
+    a required field: required lists groups of columns, and a row is
+    truncated when every column of a group that the header has is missing.
+    They are added to rejects, as the row-wise loaders do.
+    """
+    truncated = pd.Series(False, index=raw.index)
+    for group in required:
+        columns = [column for column in group if column in raw.columns]
+        if columns:
+            truncated |= raw[columns].isna().all(axis=1)
+    if not truncated.any():
+        return raw
+    if rejects is not None:
+        rows = raw[truncated]
+        fields = rows.notna().sum(axis=1)
+        for line, count, values in zip(rows.index, fields, rows.itertuples(index=False, name=None)):
+            rejects.add(line, f"truncated row ({count} of {len(raw.columns)} fields)",
+                        [value for value in values if isinstance(value, str)])
+    return raw[~truncated].copy()
+
+
+def canonicalize_date_columns(frame, stats, fmt=None):
+    """
+    Detect the frame's date format once (unless the format declares it as
+    fmt), then rewrite its date columns to CANONICAL_DATE_FORMAT. Rows whose
+    Transaction Date cannot be parsed keep their original text and are
+    counted in stats['bad_dates'] (with their first lines in
+    stats['bad_date_lines']).
+    """
+    if fmt is None:
+        # The same leading rows canonicalize_dates samples in the rows engine
+        fmt = detect_date_format(_text(frame, 'Transaction Date').head(DETECTION_SAMPLE_SIZE))
+    stats['date_format'] = fmt
+
+    for column in DATE_COLUMNS:
+        if column not in frame.columns:
+            continue
+        values = _text(frame, column)
+        # Each distinct string is parsed and formatted once; canonical input is
+        # rewritten too, since the format also accepts unpadded dates ('2/5/2026')
+        codes, uniques = pd.factorize(values)
+        unique_values = pd.Series(uniques, dtype=object)
+        parsed = pd.to_datetime(unique_values.str.strip(), format=fmt, errors='coerce')
+        canonical = parsed.dt.strftime(CANONICAL_DATE_FORMAT).where(parsed.notna(), unique_values)
+        if column == 'Transaction Date':
+            bad = parsed.isna().to_numpy()[codes]
+            stats['bad_dates'] = int(bad.sum())
+            if stats['bad_dates'] and LINE_COLUMN in frame.columns:
+                stats['bad_date_lines'] = [int(line) for line in frame.loc[bad, LINE_COLUMN].head(BAD_DATE_LINES)]
+        frame[column] = canonical.to_numpy(dtype=object)[codes]
+    return frame
+
+
+def sort_frame(frame):
+    """Stable sort by Transaction Date, most recent first (unparseable dates last)."""
+    dates = pd.to_datetime(_text(frame, 'Transaction Date'), format=CANONICAL_DATE_FORMAT, errors='coerce', cache=True)
+    order = dates.sort_values(ascending=False, kind='stable', na_position='last').index
+    return frame.loc[order].reset_index(drop=True)
+
+
+def dedupe_frames(frames, deduplicator):
+    """
+    Vectorized Deduplicator.iter_unique: concatenate per-file frames in file
+    order, drop rows whose (card, date, amount, description, occurrence) key
+    an earlier file already contributed, and sort the result. Per-file counts
+    are stored on deduplicator.
+    """
+    key_frames = []
+    for index, (frame, card) in enumerate(zip(frames, deduplicator.card_keys)):
+        keys = pd.DataFrame({
+            'card': card,
+            'date': _text(frame, 'Transaction Date'),
+            'amount': pd.to_numeric(frame['Amount'], errors='coerce').round(2),
+            'description': _text(frame, 'Description'),
+            'file': index,
+        })
+        keys['occurrence'] = keys.groupby(['date', 'amount', 'description'], dropna=False, sort=False).cumcount()
+        key_frames.append(keys)
+
+    combined = pd.concat(frames, ignore_index=True)
+    keys = pd.concat(key_frames, ignore_index=True)
+    # Keys include the date, so the first row in file order is also the first
+    # in the merged (date-sorted, ties in file order) output
+    duplicated = keys.duplicated(subset=['card', 'date', 'amount', 'description', 'occurrence'])
+
+    counts = keys.groupby('file')['file'].count().reindex(range(len(frames)), fill_value=0)
+    dropped = keys[duplicated].groupby('file')['file'].count().reindex(range(len(frames)), fill_value=0)
+    deduplicator.duplicates = [int(n) for n in dropped]
+    deduplicator.contributed = [int(total - n) for total, n in zip(counts, dropped)]
+    return sort_frame(combined[~duplicated.to_numpy()])
+
+
+def load_chase_frame(filepath, source_name, normalizer=None, byte_range=None, amount_sign=1, stats=None):
+    """
+    Load a Chase-layout CSV file (chase_sapphire_preferred, chase_freedom_unlimited, bilt)
+    as a DataFrame, multiplying amounts by amount_sign (-1 for Chase and Bilt exports).
+    """
+    rejects = RowRejects(stats)
+    frame = read_csv_frame(filepath, byte_range, rejects, stats)
+    frame, amounts = drop_unparseable_amounts(frame, ['Amount'], rejects)
+
+    frame['Source'] = source_name
+    # Add/normalize merchant from description
+    merchant = _text(frame, 'Merchant')
+    frame['Merchant'] = merchant.where(merchant != '', _text(frame, 'Description'))
+    frame['Normalized Merchant'] = normalize_merchant_column(frame['Merchant'], normalizer, stats)
+
+    # Auto-assign category if possible
+    assign_categories(frame, stats)
+
+    # Normalize amount signs to standard convention (positive = expenses):
+    # Chase and Bilt exports use the opposite convention and are flipped
+    amount = amounts['Amount']
+    frame['Amount'] = amount * amount_sign if amount_sign != 1 else amount
+    return frame
+
+
+def load_apple_frame(filepath, source_name, normalizer=None, byte_range=None, stats=None):
+    """Load an Apple CSV file as a DataFrame, remapping its columns to the standard format."""
+    rejects = RowRejects(stats)
+    raw = read_csv_frame(filepath, byte_range, rejects, stats)
+    raw, amounts = drop_unparseable_amounts(raw, ['Amount (USD)'], rejects)
+
+    merchant = raw['Merchant'] if 'Merchant' in raw.columns else _text(raw, 'Description')
+    frame = pd.DataFrame({
+        'Transaction Date': _text(raw, 'Transaction Date'),
+        'Post Date': _text(raw, 'Clearing Date'),
+        'Description': _text(raw, 'Description'),
+        'Merchant': merchant.fillna('').astype(str),
+        'Category': _text(raw, 'Category'),
+        'Type': _text(raw, 'Type'),
+        # Apple already uses the standard convention (positive = expenses)
+        'Amount': amounts['Amount (USD)'],
+        'Memo': '',
+        'Source': source_name,
+    })
+    frame['Normalized Merchant'] = normalize_merchant_column(frame['Merchant'], normalizer, stats)
+
+    # Auto-assign category if missing
+    assign_categories(frame, stats)
+    return frame
+
+
+def load_spec_frame(filepath, source_name, card_format, normalizer=None, byte_range=None, stats=None):
+    """Load a CSV file in a declaratively specified format (see adapter_specs.py) as a DataFrame."""
+    from adapter_specs import clean_header
+
+    spec = card_format.spec
+    rejects = RowRejects(stats)
+    raw = read_csv_frame(filepath, byte_range, rejects, stats)
+    raw.columns = clean_header(raw.columns)
+    # Short rows are padded (exports drop trailing empty fields) unless they
+    # end before the date or amount columns
+    raw = drop_truncated_rows(raw, spec.required_columns, rejects)
+    raw, amounts = drop_unparseable_amounts(raw, spec.amount_columns, rejects, required=False)
+    frame = spec.transform_frame(raw, source_name, amounts)
+    frame['Normalized Merchant'] = normalize_merchant_column(frame['Merchant'], normalizer, stats)
+    return assign_categories(frame, stats)
+
+
+def typed_output_path(output_path):
+    """Path of the typed Parquet copy of a consolidated CSV file."""
+    return Path(output_path).with_suffix(TYPED_OUTPUT_SUFFIX)
+
+
+def typed_output_is_current(typed_path, output_path):
+    """True if typed_path exists and is at least as new as the CSV it mirrors."""
+    typed_path, output_path = Path(typed_path), Path(output_path)
+    if not typed_path.exists():
+        return False
+    if not output_path.exists():
+        return True
+    return typed_path.stat().st_mtime_ns >= output_path.stat().st_mtime_ns
+
+
+def typed_schema(columns):
+    """Arrow schema of the typed output: dates, float amounts, integer lineage, categoricals, text."""
+    fields = []
+    for column in columns:
+        if column in DATE_COLUMNS:
+            fields.append(pa.field(column, pa.timestamp('ns')))
+        elif column in FLOAT_COLUMNS:
+            fields.append(pa.field(column, pa.float64()))
+        elif column in LINEAGE_COLUMNS:
+            fields.append(pa.field(column, pa.int32()))
+        elif column in CATEGORICAL_COLUMNS:
+            fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+
+def to_typed_frame(frame, columns):
+    """
+    Convert consolidated rows (as written to the CSV) into typed columns:
+    datetime dates, float amounts, integer lineage columns (0 where
+    missing), categorical low-cardinality text and plain strings ('' where
+    missing) for everything else.
+    """
+    # Columns are built first and assembled once (inserting them one by one copies the frame)
+    typed = {}
+    for column in columns:
+        if column in DATE_COLUMNS:
+            typed[column] = pd.to_datetime(_text(frame, column), format=CANONICAL_DATE_FORMAT,
+                                           errors='coerce', cache=True)
+        elif column in FLOAT_COLUMNS:
+            typed[column] = pd.to_numeric(frame[column], errors='coerce').astype(float)
+        elif column in LINEAGE_COLUMNS:
+            values = frame[column] if column in frame.columns else pd.Series(0, index=frame.index)
+            typed[column] = pd.to_numeric(values, errors='coerce').fillna(0).astype('int32')
+        elif column in CATEGORICAL_COLUMNS:
+            typed[column] = _text(frame, column).astype('category')
+        else:
+            typed[column] = _text(frame, column)
+    return pd.DataFrame(typed, index=frame.index, columns=list(columns))
+
+
+class TypedOutputWriter:
+    """
+    Writes the typed Parquet copy of the consolidated file, either in one go
+    (write_frame) or in batches of row dicts (write_rows) so streaming runs
+    keep memory bounded. The file is written under a temporary name and only
+    replaces typed_path on close(), so readers never see a partial file.
+    """
+
+    def __init__(self, typed_path, columns):
+        self.typed_path = Path(typed_path)
+        self.tmp_path = self.typed_path.with_name(self.typed_path.name + '.tmp')
+        self.columns = list(columns)
+        self.schema = typed_schema(self.columns)
+        self.row_count = 0
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write_frame(self, frame):
+        """Append a DataFrame of consolidated rows."""
+        table = pa.Table.from_pandas(to_typed_frame(frame, self.columns), schema=self.schema, preserve_index=False)
+        if self._writer is None:
+            self._writer = pa_parquet.ParquetWriter(self.tmp_path, table.schema)
+        self._writer.write_table(table)
+        self.row_count += len(frame)
+
+    def write_rows(self, rows):
+        """Append a batch of row dicts."""
+        if rows:
+            self.write_frame(pd.DataFrame.from_records(rows, columns=self.columns))
+
+    def close(self):
+        """Finish the file and move it into place."""
+        if self._writer is None:
+            # No rows: still publish an empty file with the right schema
+            self.write_frame(pd.DataFrame(columns=self.columns))
+        self._writer.close()
+        os.replace(self.tmp_path, self.typed_path)
+
+    def abort(self):
+        """Discard a partially written file."""
+        if self._writer is not None:
+            self._writer.close()
+        try:
+            self.tmp_path.unlink()
+        except OSError:
+            pass
+
+
+def write_typed_output(typed_path, columns, rows, batch_rows=100000):
+    """
+    Write the typed Parquet copy of the consolidated file from a DataFrame or
+    an iterable of row dicts (converted batch_rows at a time). Returns the
+    number of rows written.
+    """
+    with TypedOutputWriter(typed_path, columns) as writer:
+        if isinstance(rows, pd.DataFrame):
+            writer.write_frame(rows)
+        else:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_rows:
+                    writer.write_rows(batch)
+                    batch = []
+            writer.write_rows(batch)
+    return writer.row_count
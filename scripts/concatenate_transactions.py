@@ -5,11 +5,33 @@ and add a Source column identifying which card each transaction came from.
 """
 
 import csv
+import heapq
 import os
-import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+import adapter_specs
+import card_formats
+import columnar_loaders
+from amount_parsing import AMOUNT_FORMAT, format_amount, normalize_amount
+from category_rules import DEFAULT_CATEGORY_RULES
+from date_parsing import BAD_DATE_KEY, BAD_DATE_LINES, CANONICAL_DATE_FORMAT, canonicalize_dates, date_key
+from dedup import DEDUP_KEY_VERSION, Deduplicator, card_key
+from derived_columns import DERIVED_COLUMNS, DERIVED_SCHEMA_VERSION, derive_frame, derive_row
+from external_sort import DEFAULT_CHUNK_ROWS, ExternalSorter, write_run
+from ingest_manifest import IngestManifest
+from input_files import input_key, input_label, is_archive_member, list_input_files, open_input, split_byte_ranges
+from input_watcher import InputWatcher
+from lineage import FILE_ID_COLUMN, LINE_COLUMN, LINEAGE_COLUMNS, lineage_path, load_lineage, write_lineage
+from merchant_normalizer import DEFAULT_NORMALIZER, MerchantCache, MerchantNormalizer
+from partitioned_dataset import dataset_path, write_partitions
+from pipeline_profile import PipelineProfile, profile_path, rule_match_counts
+from row_rejects import REJECTS_NAME, RowRejects, rejects_path, write_rejects
+from transaction_store import STORE_NAME, TransactionStore, apply_edits, apply_frame_edits
+
 # Get the project root directory (parent of scripts/)
 PROJECT_ROOT = Path(__file__).parent.parent
 
@@ -17,6 +39,19 @@ PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / 'data' / 'input'
 OUTPUT_FILE = PROJECT_ROOT / 'data' / 'processed' / 'all_transactions.csv'
 
+# Persistent raw -> normalized merchant cache, stored next to the output file
+MERCHANT_CACHE_NAME = 'merchant_cache.json'
+
+# Manifest and parsed rows of each input file, for incremental rebuilds
+INGEST_CACHE_DIR = '.ingest_cache'
+
+# With --jobs > 1, input files larger than this are split into byte-range
+# chunks so a single large export is parsed by several workers
+PARALLEL_CHUNK_BYTES = 32 * 1024 * 1024
+
+# Rows read before their merchants are normalized as one batch
+NORMALIZE_BATCH_ROWS = 10000
+
 # List of example files that should be excluded when real data exists
 EXAMPLE_FILES = [
     'example_apple.csv',
@@ -32,72 +67,7 @@ def normalize_merchant(merchant):
     Normalize merchant names by consolidating common variations.
     For example, all Amazon variations become "Amazon".
     """
-    if not merchant or pd_isna(merchant):
-        return "Unknown"
-    
-    merchant_upper = merchant.upper().strip()
-    
-    # Define merchant mappings (patterns -> normalized name)
-    merchant_patterns = [
-        (r'AMAZON|AMZN', 'Amazon'),
-        (r'TRADER\s*JOE', 'Trader Joe\'s'),
-        (r'SAFEWAY', 'Safeway'),
-        (r'TARGET', 'Target'),
-        (r'WALMART|WM\s*SUPERCENTER', 'Walmart'),
-        (r'UBER', 'Uber'),
-        (r'LYFT', 'Lyft'),
-        (r'STARBUCKS', 'Starbucks'),
-        (r'MCDONALD', 'McDonald\'s'),
-        (r'WHOLE\s*FOODS|WHOLEFDS', 'Whole Foods'),
-        (r'H\s*MART|HMART', 'H Mart'),
-        (r'BILTPROTECT\s*RENT|BPS\*BILT\s*RENT', 'Bilt Rent Payment'),
-        (r'LEMONADE\s*INSURANCE', 'Lemonade Insurance'),
-        (r'SOUTHWEST|SOUTHWES', 'Southwest Airlines'),
-        (r'DELTA\s*AIR', 'Delta Airlines'),
-        (r'ALASKA\s*AIR', 'Alaska Airlines'),
-        (r'AIRASIA', 'AirAsia'),
-        (r'CATHAYPACAIR', 'Cathay Pacific'),
-        (r'UNIQLO', 'Uniqlo'),
-        (r'PAYMENT\s*THANK\s*YOU|ONLINE\s*ACH\s*PAYMENT|ACH\s*DEPOSIT', 'Payment/Transfer'),
-        (r'TST\*.*IVARS|IVARS', 'Ivar\'s'),
-        (r'TST\*.*SIZZLE.*CRUNCH|SIZZLE.*CRUNCH', 'Sizzle & Crunch'),
-        (r'TST\*.*DONT\s*YELL|DONT\s*YELL', 'Don\'t Yell At Me'),
-        (r'LEE.*S\s*KITCHEN', 'Lee\'s Kitchen'),
-        (r'FOB\s*SUSHI|FOB\s*POKE', 'FOB'),
-        (r'CHASE|Payment Thank You', 'Payment/Transfer'),
-        (r'7-ELEVEN|7\s*ELEVEN|FAMILYMART|FAMILY\s*MART', '7-Eleven/FamilyMart'),
-        (r'KFC', 'KFC'),
-        (r'BURGER\s*KING', 'Burger King'),
-        (r'CHICK-FIL-A|CHICKFILA', 'Chick-fil-A'),
-        (r'ALADDIN', 'Aladdin'),
-        (r'TASTE\s*OF\s*XI.*AN', 'Taste of Xi\'an'),
-        (r'TAIWAN\s*PORRIDGE', 'Taiwan Porridge'),
-        (r'CHA\s*YAN', 'Cha Yan'),
-        (r'SL\.NORD|NORD.*VPN', 'NordVPN'),
-        (r'NOW\s*WIFI', 'NOW WiFi'),
-        (r'APPLE\s*ONLINE|AOS', 'Apple'),
-    ]
-    
-    # Try to match patterns
-    for pattern, normalized_name in merchant_patterns:
-        if re.search(pattern, merchant_upper):
-            return normalized_name
-    
-    # If no pattern matches, clean up the merchant name
-    # Remove common prefixes
-    merchant_clean = re.sub(r'^(TST\*|SQ\s*\*|BB\*|UEP\*|SP\s+)', '', merchant, flags=re.IGNORECASE)
-    
-    # Remove location info (city, state, zip, address numbers)
-    merchant_clean = re.sub(r'\s+\d+.*$', '', merchant_clean)  # Remove everything after numbers
-    merchant_clean = re.sub(r'\s+[A-Z]{2}\s+USA$', '', merchant_clean)  # Remove state + USA
-    merchant_clean = re.sub(r'\s+\d{5}(-\d{4})?\s*$', '', merchant_clean)  # Remove ZIP codes
-    
-    # Limit length
-    merchant_clean = merchant_clean.strip()
-    if len(merchant_clean) > 50:
-        merchant_clean = merchant_clean[:50]
-    
-    return merchant_clean if merchant_clean else merchant[:50]
+    return DEFAULT_NORMALIZER.normalize(merchant)
 
 def pd_isna(value):
     """Simple check for None, empty string, or 'nan'."""
@@ -111,90 +81,136 @@ def extract_card_name(filename):
     return name
 
 def parse_date(date_str):
-    """Parse date string to datetime for sorting."""
-    try:
-        return datetime.strptime(date_str, '%m/%d/%Y')
-    except:
+    """Parse a canonical date string to datetime (datetime.min if it cannot be parsed)."""
+    ordinal = date_key(date_str)
+    if ordinal == BAD_DATE_KEY:
         return datetime.min
+    return datetime.fromordinal(ordinal)
 
 def auto_assign_category(row):
     """
-    Automatically assign category based on transaction type and description.
-    This reduces manual category assignment work.
+    Automatically assign category based on transaction type and description
+    (the auto rules of category_rules.py). This reduces manual category
+    assignment work; rows no rule matches are left empty for manual assignment.
     """
-    # If category already exists and is not empty, keep it
-    if row.get('Category') and row['Category'].strip():
-        return row['Category']
-    
-    transaction_type = str(row.get('Type', '')).strip().lower()
-    description = str(row.get('Description', '')).upper()
-    
-    # Auto-assign based on transaction type
-    if transaction_type == 'payment':
-        return 'Payment'
-    elif transaction_type == 'return':
-        return 'Refund'
-    
-    # Auto-assign based on description patterns
-    if 'PAYMENT' in description or 'ACH DEPOSIT' in description or 'ACH CREDIT' in description:
-        return 'Payment'
-    
-    # Rent payments
-    if 'BILT RENT' in description or 'BILTPROTECT RENT' in description:
-        return 'Rent'
-    
-    # Insurance
-    if 'INSURANCE' in description:
-        return 'Insurance'
-    
-    # Daily cash redemption (Apple Card)
-    if 'DAILY CASH REDEMPTION' in description:
-        return 'Payment'
-    
-    # If no pattern matches, leave empty for manual assignment
-    return ''
+    return DEFAULT_CATEGORY_RULES.assign(row)
+
+def _with_normalized_merchants(rows, normalizer, stats=None):
+    """
+    Fill 'Normalized Merchant' for a batch of rows (each distinct merchant once),
+    adding the time taken to stats['normalize_seconds'].
+    """
+    start = time.perf_counter()
+    normalized = normalizer.normalize_many(row.get('Merchant', '') for row in rows)
+    for row, merchant in zip(rows, normalized):
+        row['Normalized Merchant'] = merchant
+    if stats is not None:
+        stats['normalize_seconds'] = stats.get('normalize_seconds', 0.0) + time.perf_counter() - start
+    return rows
 
-def load_chase_file(filepath, source_name):
-    """Load a Chase CSV file (chase_sapphire_preferred, chase_freedom_unlimited, bilt)."""
+def iter_chase_rows(filepath, source_name, normalizer=None, byte_range=None, amount_sign=None, stats=None):
+    """
+    Yield the rows of a Chase-layout CSV file (chase_sapphire_preferred, chase_freedom_unlimited, bilt).
+    amount_sign defaults to the sign convention of the format detected from the file's header.
+    The number of auto-assigned categories is added to stats['auto_categories'].
+    """
+    if normalizer is None:
+        normalizer = DEFAULT_NORMALIZER
+    if amount_sign is None:
+        amount_sign = detect_input_format(filepath).amount_sign
     rows = []
-    is_bilt = 'bilt' in filepath.name.lower()
-    is_chase = any(x in filepath.name.lower() for x in ['chase', 'sapphire', 'freedom'])
+    auto_assigned = 0
+    rejects = RowRejects(stats)
     
-    with open(filepath, 'r', encoding='utf-8') as f:
+    with open_input(filepath, byte_range) as f:
         reader = csv.DictReader(f)
         for row in reader:
+            # Rows with extra fields, cut off before the Amount, or with an
+            # unparseable amount are rejected (with their line number)
+            if None in row:
+                reject_row(rejects, reader, row, f"too many fields ({len(row) - 1 + len(row[None])}, "
+                                                 f"expected {len(reader.fieldnames)})")
+                continue
+            amount_text = row.get('Amount', '')
+            if amount_text is None:
+                reject_row(rejects, reader, row, truncated_reason(row, reader))
+                continue
+            try:
+                amount = normalize_amount(amount_text)[0]
+            except ValueError as e:
+                reject_row(rejects, reader, row, str(e))
+                continue
+            
             row['Source'] = source_name
+            row[LINE_COLUMN] = reader.line_num
             # Add/normalize merchant from description
             if 'Merchant' not in row or not row.get('Merchant'):
                 row['Merchant'] = row.get('Description', '')
-            row['Normalized Merchant'] = normalize_merchant(row.get('Merchant', ''))
             
             # Auto-assign category if possible
-            row['Category'] = auto_assign_category(row)
+            category = auto_assign_category(row)
+            auto_assigned += bool(category) and category != row.get('Category')
+            row['Category'] = category
             
             # Normalize amount signs to standard convention:
             # Standard: Positive = Expenses, Negative = Refunds/Payments
             # - Apple: Already follows this (positive = expenses)
-            # - Bilt: Already flipped in previous update (positive = expenses)
-            # - Chase: Uses opposite (negative = expenses), need to flip
-            if is_chase:
-                # For Chase: flip the sign so expenses become positive
-                amount = float(row.get('Amount', 0))
-                row['Amount'] = str(-amount)
-            elif is_bilt:
-                # Bilt: Already flipped previously, keep the flip
-                amount = float(row.get('Amount', 0))
-                row['Amount'] = str(-amount)
+            # - Chase, Bilt: Use opposite (negative = expenses), amount_sign = -1 flips them
+            row['Amount'] = format_amount(amount_sign * amount if amount is not None else None)
             
             rows.append(row)
-    return rows
+            if len(rows) >= NORMALIZE_BATCH_ROWS:
+                # Normalize merchants in batches (each distinct string once)
+                yield from _with_normalized_merchants(rows, normalizer, stats)
+                rows = []
+        count_lines(reader, stats)
+    
+    yield from _with_normalized_merchants(rows, normalizer, stats)
+    if stats is not None:
+        stats['auto_categories'] = stats.get('auto_categories', 0) + auto_assigned
 
-def load_apple_file(filepath, source_name):
-    """Load an Apple CSV file with different column structure."""
+def reject_row(rejects, reader, row, reason):
+    """Reject a csv.DictReader row at the reader's current line."""
+    values = [value for value in row.values() if not isinstance(value, list) and value is not None]
+    rejects.add(reader.line_num, reason, values + row.get(None, []))
+
+def count_lines(reader, stats):
+    """Add the number of lines a csv reader read after the header to stats['lines']."""
+    if stats is not None:
+        stats['lines'] = stats.get('lines', 0) + max(reader.line_num - 1, 0)
+
+def truncated_reason(row, reader):
+    fields = sum(value is not None for value in row.values())
+    return f"truncated row ({fields} of {len(reader.fieldnames)} fields)"
+
+def load_chase_file(filepath, source_name, normalizer=None, byte_range=None, amount_sign=None):
+    """Load a Chase-layout CSV file (chase_sapphire_preferred, chase_freedom_unlimited, bilt)."""
+    return list(iter_chase_rows(filepath, source_name, normalizer, byte_range, amount_sign))
+
+def iter_apple_rows(filepath, source_name, normalizer=None, byte_range=None, stats=None):
+    """Yield the rows of an Apple CSV file with different column structure."""
+    if normalizer is None:
+        normalizer = DEFAULT_NORMALIZER
     rows = []
-    with open(filepath, 'r', encoding='utf-8') as f:
+    auto_assigned = 0
+    rejects = RowRejects(stats)
+    with open_input(filepath, byte_range) as f:
         reader = csv.DictReader(f)
         for row in reader:
+            if None in row:
+                reject_row(rejects, reader, row, f"too many fields ({len(row) - 1 + len(row[None])}, "
+                                                 f"expected {len(reader.fieldnames)})")
+                continue
+            amount = row.get('Amount (USD)', '0')
+            if amount is None:
+                reject_row(rejects, reader, row, truncated_reason(row, reader))
+                continue
+            try:
+                amount = format_amount(normalize_amount(amount)[0])
+            except ValueError as e:
+                reject_row(rejects, reader, row, str(e))
+                continue
+            
             # Map Apple columns to standard format
             # Apple: Transaction Date, Clearing Date, Description, Merchant, Category, Type, Amount (USD), Purchased By
             # Standard: Transaction Date, Post Date, Description, Merchant, Category, Type, Amount, Memo
@@ -203,35 +219,494 @@ def load_apple_file(filepath, source_name):
             
             # Apple already uses the standard convention (positive = expenses, negative = refunds)
             # No sign normalization needed
-            amount = row.get('Amount (USD)', '0')
             
             new_row = {
                 'Transaction Date': row.get('Transaction Date', ''),
                 'Post Date': row.get('Clearing Date', ''),
                 'Description': row.get('Description', ''),
                 'Merchant': merchant,
-                'Normalized Merchant': normalize_merchant(merchant),
+                'Normalized Merchant': '',
                 'Category': row.get('Category', ''),
                 'Type': row.get('Type', ''),
                 'Amount': amount,
                 'Memo': '',
-                'Source': source_name
+                'Source': source_name,
+                LINE_COLUMN: reader.line_num,
             }
             
             # Auto-assign category if missing
-            new_row['Category'] = auto_assign_category(new_row)
+            category = auto_assign_category(new_row)
+            auto_assigned += bool(category) and category != new_row['Category']
+            new_row['Category'] = category
             
             rows.append(new_row)
-    return rows
+            if len(rows) >= NORMALIZE_BATCH_ROWS:
+                yield from _with_normalized_merchants(rows, normalizer, stats)
+                rows = []
+        count_lines(reader, stats)
+    
+    yield from _with_normalized_merchants(rows, normalizer, stats)
+    if stats is not None:
+        stats['auto_categories'] = stats.get('auto_categories', 0) + auto_assigned
+
+def load_apple_file(filepath, source_name, normalizer=None, byte_range=None):
+    """Load an Apple CSV file with different column structure."""
+    return list(iter_apple_rows(filepath, source_name, normalizer, byte_range))
+
+def iter_spec_rows(filepath, source_name, card_format, normalizer=None, byte_range=None, stats=None):
+    """
+    Yield the rows of a CSV file in a declaratively specified format (see adapter_specs.py).
+    The spec is bound to the file's header once; rows are then mapped by column position.
+    """
+    if normalizer is None:
+        normalizer = DEFAULT_NORMALIZER
+    rows = []
+    auto_assigned = 0
+    rejects = RowRejects(stats)
+    with open_input(filepath, byte_range) as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        transform = card_format.spec.bind(header)
+        for values in reader:
+            if not values:
+                continue
+            # Short rows are padded (exports drop trailing empty fields); rows
+            # with extra fields or an unparseable amount are rejected
+            if len(values) > len(header):
+                rejects.add(reader.line_num, f"too many fields ({len(values)}, expected {len(header)})", values)
+                continue
+            try:
+                row = transform(values)
+            except ValueError as e:
+                rejects.add(reader.line_num, str(e), values)
+                continue
+            row['Source'] = source_name
+            row[LINE_COLUMN] = reader.line_num
+            
+            # Auto-assign category if missing
+            category = auto_assign_category(row)
+            auto_assigned += bool(category) and category != row['Category']
+            row['Category'] = category
+            
+            rows.append(row)
+            if len(rows) >= NORMALIZE_BATCH_ROWS:
+                yield from _with_normalized_merchants(rows, normalizer, stats)
+                rows = []
+        count_lines(reader, stats)
+    
+    yield from _with_normalized_merchants(rows, normalizer, stats)
+    if stats is not None:
+        stats['auto_categories'] = stats.get('auto_categories', 0) + auto_assigned
+
+def transaction_sort_key(row):
+    """Sort key for a transaction row (the ordinal of its canonical Transaction Date)."""
+    return date_key(row.get('Transaction Date', ''))
+
+def detect_input_format(csv_file):
+    """Format of an input file, detected from its header line."""
+    card_format = card_formats.sniff_format(csv_file)
+    if card_format is None:
+        raise ValueError(f"Unrecognized CSV header in {input_label(csv_file)}")
+    return card_format
+
+def iter_input_rows(csv_file, source_name, normalizer=None, byte_range=None, card_format=None, stats=None):
+    """
+    Yield the rows of one input file (or a byte range of it) with the loader
+    matching its format (detected from the header when not given), counting
+    auto-assigned categories in stats.
+    """
+    if card_format is None:
+        card_format = detect_input_format(csv_file)
+    
+    if card_format.layout == 'apple':
+        return iter_apple_rows(csv_file, source_name, normalizer, byte_range, stats)
+    if card_format.layout == 'spec':
+        return iter_spec_rows(csv_file, source_name, card_format, normalizer, byte_range, stats)
+    return iter_chase_rows(csv_file, source_name, normalizer, byte_range, card_format.amount_sign, stats)
+
+def load_input_frame(csv_file, source_name, normalizer=None, byte_range=None, card_format=None, stats=None):
+    """Columnar counterpart of iter_input_rows: load one input file (or a byte range of it) as a DataFrame."""
+    if card_format is None:
+        card_format = detect_input_format(csv_file)
+    
+    if card_format.layout == 'apple':
+        return columnar_loaders.load_apple_frame(csv_file, source_name, normalizer, byte_range, stats)
+    if card_format.layout == 'spec':
+        return columnar_loaders.load_spec_frame(csv_file, source_name, card_format, normalizer, byte_range, stats)
+    return columnar_loaders.load_chase_frame(csv_file, source_name, normalizer, byte_range, card_format.amount_sign,
+                                             stats)
+
+def resolve_engine(engine='auto', streaming=False):
+    """
+    Pick the ingestion engine: 'columnar' (pandas/pyarrow, whole-column operations)
+    or 'rows' (csv.DictReader, one dict per row). 'auto' prefers columnar when
+    pandas is installed; streaming always uses rows.
+    """
+    if engine not in ('auto', 'rows', 'columnar'):
+        raise ValueError(f"Unknown ingestion engine: {engine}")
+    if streaming:
+        return 'rows'
+    if engine == 'auto':
+        return 'columnar' if columnar_loaders.HAS_PANDAS else 'rows'
+    if engine == 'columnar' and not columnar_loaders.HAS_PANDAS:
+        raise ValueError("The columnar engine requires pandas")
+    return engine
+
+def parse_input_file(csv_file, source_name, normalizer=None, byte_range=None, engine='rows', card_format=None,
+                     file_id=0):
+    """
+    Parse one input file (or a byte range of it), sorted by Transaction Date
+    (most recent first), with the derived columns (derived_columns.py) and
+    the lineage columns: file_id and each row's line number. Returns (rows, stats): a list of rows, or a DataFrame
+    with the columnar engine, plus a dict of per-file counters and timings.
+    """
+    start = time.perf_counter()
+    if card_format is None:
+        card_format = detect_input_format(csv_file)
+    rule_names = set((normalizer or DEFAULT_NORMALIZER).names)
+    stats = {}
+    if engine == 'columnar':
+        frame = load_input_frame(csv_file, source_name, normalizer, byte_range, card_format, stats)
+        # The loaded frames are indexed by line number
+        frame[FILE_ID_COLUMN] = file_id
+        frame[LINE_COLUMN] = frame.index.to_numpy()
+        frame = columnar_loaders.canonicalize_date_columns(frame, stats, card_format.date_format)
+        frame = derive_frame(frame)
+        sort_start = time.perf_counter()
+        result = columnar_loaders.sort_frame(frame)
+        stats['sort_seconds'] = time.perf_counter() - sort_start
+        merchant_counts = result['Normalized Merchant'].value_counts().to_dict()
+    else:
+        rows = iter_input_rows(csv_file, source_name, normalizer, byte_range, card_format, stats)
+        result = list(canonicalize_dates(rows, stats, card_format.date_format))
+        for row in result:
+            derive_row(row)
+            row[FILE_ID_COLUMN] = file_id
+        sort_start = time.perf_counter()
+        result.sort(key=transaction_sort_key, reverse=True)
+        stats['sort_seconds'] = time.perf_counter() - sort_start
+        merchant_counts = Counter(row['Normalized Merchant'] for row in result)
+    stats['rules'], stats['unmatched_merchants'] = rule_match_counts(merchant_counts, rule_names)
+    stats['seconds'] = time.perf_counter() - start
+    return result, stats
+
+def spool_input_file(csv_file, source_name, run_path, normalizer=None, chunk_rows=DEFAULT_CHUNK_ROWS, tmp_dir=None,
+                     card_format=None, file_id=0):
+    """
+    Parse one input file in bounded memory and write its rows, sorted by
+    Transaction Date (most recent first), with the derived columns and
+    tagged with file_id, to the run file run_path. Returns (row_count, columns, stats).
+    """
+    start = time.perf_counter()
+    if card_format is None:
+        card_format = detect_input_format(csv_file)
+    rule_names = set((normalizer or DEFAULT_NORMALIZER).names)
+    merchant_counts = Counter()
+    
+    def counted(rows):
+        for row in rows:
+            merchant_counts[row['Normalized Merchant']] += 1
+            derive_row(row)
+            row[FILE_ID_COLUMN] = file_id
+            yield row
+    
+    stats = {}
+    with ExternalSorter(transaction_sort_key, reverse=True, chunk_rows=chunk_rows, tmp_dir=tmp_dir) as sorter:
+        rows = iter_input_rows(csv_file, source_name, normalizer, card_format=card_format, stats=stats)
+        sorter.extend(counted(canonicalize_dates(rows, stats, card_format.date_format)))
+        row_count, columns = write_run(run_path, sorter.sorted())
+    stats['rules'], stats['unmatched_merchants'] = rule_match_counts(merchant_counts, rule_names)
+    stats['seconds'] = time.perf_counter() - start
+    return row_count, columns, stats
+
+# Per-process normalizer used by parallel parse workers
+_worker_normalizer = None
+
+def _init_worker(patterns, fingerprint, cache_entries):
+    """Process pool initializer: build a normalizer warmed with the merchant cache."""
+    global _worker_normalizer
+    cache = MerchantCache(None, fingerprint)
+    cache.entries.update(cache_entries)
+    _worker_normalizer = MerchantNormalizer(patterns, cache=cache)
+
+def _parse_task(task):
+    """Parse one (csv_file, source_name, card_format, file_id, byte_range, engine) task in a worker process."""
+    csv_file, source_name, card_format, file_id, byte_range, engine = task
+    cache = _worker_normalizer.cache
+    hits, misses = cache.hits, cache.misses
+    result = parse_input_file(csv_file, source_name, _worker_normalizer, byte_range, engine, card_format, file_id)
+    return result, cache.take_updates(), cache.hits - hits, cache.misses - misses
+
+def _spool_task(task):
+    """
+    Spool one (csv_file, source_name, card_format, file_id, run_path, chunk_rows, tmp_dir)
+    task in a worker process.
+    """
+    csv_file, source_name, card_format, file_id, run_path, chunk_rows, tmp_dir = task
+    cache = _worker_normalizer.cache
+    hits, misses = cache.hits, cache.misses
+    stats = spool_input_file(csv_file, source_name, run_path, _worker_normalizer, chunk_rows, tmp_dir, card_format,
+                             file_id)
+    return stats, cache.take_updates(), cache.hits - hits, cache.misses - misses
+
+def _resolve_jobs(jobs):
+    """Number of worker processes to use; 0 or less means every core."""
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+def _worker_pool(normalizer, jobs):
+    """Process pool whose workers start with a snapshot of the merchant cache."""
+    cache = normalizer.cache
+    cache_entries = dict(cache.entries) if cache is not None else {}
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                               initargs=(normalizer.patterns, normalizer.fingerprint, cache_entries))
+
+def merge_stats(stats_list):
+    """
+    Combine per-chunk stats dicts: counters (and dicts of counters) are summed,
+    lists (rejected rows) are concatenated, other values keep the first seen.
+    """
+    merged = {}
+    for stats in stats_list:
+        for name, value in stats.items():
+            if isinstance(value, (int, float)) and name in merged:
+                merged[name] += value
+            elif isinstance(value, list):
+                merged.setdefault(name, []).extend(value)
+            elif isinstance(value, dict):
+                counts = merged.setdefault(name, {})
+                for key, count in value.items():
+                    counts[key] = counts.get(key, 0) + count
+            else:
+                merged.setdefault(name, value)
+    return merged
+
+def _merge_chunks(chunks, engine):
+    """
+    Merge the sorted (result, stats) of a file's byte-range chunks back into
+    one, renumbering each chunk's lines (as its reader saw them, after the
+    header) by the lines of the chunks before it.
+    """
+    if len(chunks) == 1:
+        return chunks[0]
+    offset = 0
+    for result, chunk_stats in chunks:
+        if offset:
+            if engine == 'columnar':
+                result[LINE_COLUMN] += offset
+            else:
+                for row in result:
+                    row[LINE_COLUMN] += offset
+            for reject in chunk_stats.get('rejects', []):
+                reject[0] += offset
+            chunk_stats['bad_date_lines'] = [line + offset for line in chunk_stats.get('bad_date_lines', [])]
+        offset += chunk_stats.get('lines', 0)
+    stats = merge_stats(chunk_stats for _, chunk_stats in chunks)
+    stats['bad_date_lines'] = stats.get('bad_date_lines', [])[:BAD_DATE_LINES]
+    results = [result for result, _ in chunks]
+    if engine == 'columnar':
+        return columnar_loaders.sort_frame(columnar_loaders.pd.concat(results, ignore_index=True)), stats
+    return list(heapq.merge(*results, key=transaction_sort_key, reverse=True)), stats
+
+def parse_files(files, normalizer, jobs=1, chunk_bytes=PARALLEL_CHUNK_BYTES, engine='rows'):
+    """
+    Parse (csv_file, source_name, card_format, file_id) tuples and return (rows, stats)
+    for each, in the same order; rows are sorted lists, or DataFrames with the
+    columnar engine.
+    
+    With jobs > 1, parsing fans out to a process pool; files larger than
+    chunk_bytes are split into byte-range chunks whose sorted rows are merged
+    back together (archive members are always parsed whole). Results are
+    identical to sequential parsing.
+    """
+    jobs = _resolve_jobs(jobs)
+    
+    tasks = []
+    for index, (csv_file, source_name, card_format, file_id) in enumerate(files):
+        if jobs > 1 and not is_archive_member(csv_file) and csv_file.stat().st_size > chunk_bytes:
+            ranges = split_byte_ranges(csv_file, chunk_bytes) or [None]
+        else:
+            ranges = [None]
+        tasks.extend((index, (csv_file, source_name, card_format, file_id, byte_range, engine))
+                     for byte_range in ranges)
+    
+    if jobs <= 1 or len(tasks) <= 1:
+        return [
+            parse_input_file(csv_file, source_name, normalizer, engine=engine, card_format=card_format, file_id=file_id)
+            for csv_file, source_name, card_format, file_id in files
+        ]
+    
+    cache = normalizer.cache
+    chunk_rows = [[] for _ in files]
+    with _worker_pool(normalizer, min(jobs, len(tasks))) as executor:
+        # map() yields results in submission order, keeping the output stable
+        results = executor.map(_parse_task, [task for _, task in tasks])
+        for (index, _), (result, updates, hits, misses) in zip(tasks, results):
+            chunk_rows[index].append(result)
+            if cache is not None:
+                cache.merge(updates, hits, misses)
+    
+    return [_merge_chunks(chunks, engine) for chunks in chunk_rows]
+
+def spool_files(files, normalizer, jobs=1, chunk_rows=DEFAULT_CHUNK_ROWS, tmp_dir=None):
+    """
+    Spool (csv_file, source_name, card_format, file_id, run_path) tuples to sorted run
+    files in bounded memory, optionally in a process pool. Returns (row_count,
+    columns, stats) for each file, in the same order.
+    """
+    jobs = _resolve_jobs(jobs)
+    if jobs <= 1 or len(files) <= 1:
+        return [
+            spool_input_file(csv_file, source_name, run_path, normalizer, chunk_rows, tmp_dir, card_format, file_id)
+            for csv_file, source_name, card_format, file_id, run_path in files
+        ]
+    
+    cache = normalizer.cache
+    stats = []
+    with _worker_pool(normalizer, min(jobs, len(files))) as executor:
+        tasks = [
+            (csv_file, source_name, card_format, file_id, run_path, chunk_rows, tmp_dir)
+            for csv_file, source_name, card_format, file_id, run_path in files
+        ]
+        for file_stats, updates, hits, misses in executor.map(_spool_task, tasks):
+            stats.append(file_stats)
+            if cache is not None:
+                cache.merge(updates, hits, misses)
+    return stats
+
+def report_file_stats(stats):
+    """Print the noteworthy per-file counters gathered while parsing."""
+    if stats.get('date_format') and stats['date_format'] != CANONICAL_DATE_FORMAT:
+        print(f"    Dates detected as {stats['date_format']} (rewritten as {CANONICAL_DATE_FORMAT})")
+    if stats.get('bad_dates'):
+        lines = ', '.join(str(line) for line in stats.get('bad_date_lines', []))
+        print(f"    ⚠ {stats['bad_dates']} row(s) with an unparseable Transaction Date"
+              + (f" (line {lines}{', ...' if stats['bad_dates'] > BAD_DATE_LINES else ''})" if lines else ''))
+    if stats.get('rejects'):
+        print(f"    ⚠ {len(stats['rejects'])} malformed row(s) skipped (listed in {REJECTS_NAME})")
+
+def dedup_counts(csv_files, deduplicator):
+    """{file label: [rows contributed, duplicate rows dropped]} after a deduplicated merge."""
+    return {
+        input_label(csv_file): [contributed, duplicates]
+        for csv_file, contributed, duplicates in zip(csv_files, deduplicator.contributed, deduplicator.duplicates)
+    }
+
+def get_column_order(all_columns):
+    """
+    Define column order: Source first, then standard order, then any remaining
+    columns, then the derived columns (Transaction Type, Absolute Amount, Month,
+    Transaction ID) and the lineage columns (File ID, Line) last.
+    """
+    standard_columns = ['Transaction Date', 'Post Date', 'Description', 'Merchant', 'Normalized Merchant', 'Category', 'Type', 'Amount', 'Memo']
+    column_order = ['Source'] + [col for col in standard_columns if col in all_columns]
+    # Add any remaining columns
+    for col in sorted(all_columns):
+        if col not in column_order and col not in DERIVED_COLUMNS and col not in LINEAGE_COLUMNS:
+            column_order.append(col)
+    column_order.extend(col for col in DERIVED_COLUMNS if col in all_columns)
+    column_order.extend(col for col in LINEAGE_COLUMNS if col in all_columns)
+    return column_order
+
+def iter_output_rows(all_rows, entries, manifest, edits=None):
+    """
+    Iterate over the consolidated rows again as dicts: from the in-memory
+    result (a list, or a DataFrame with the columnar engine) or, when
+    streaming, from a fresh merge of the manifest run files with the store's
+    edits applied.
+    """
+    if all_rows is None:
+        deduplicator = Deduplicator(card_key(entry['source']) for entry in entries)
+        rows = deduplicator.iter_unique([manifest.iter_rows(entry) for entry in entries], transaction_sort_key)
+        return apply_edits(rows, edits) if edits else rows
+    if isinstance(all_rows, list):
+        return iter(all_rows)
+    columns = list(all_rows.columns)
+    return (dict(zip(columns, values)) for values in all_rows.itertuples(index=False, name=None))
 
-def concatenate_transactions(data_dir=None, output_file=None):
+def update_transaction_store(store_file, output_rows, output_info):
+    """
+    Upsert the consolidated rows into the SQLite store unless it already holds
+    the output described by output_info (the manifest's output record).
+    """
+    with TransactionStore(store_file) as store:
+        if store.get_meta('output') == output_info:
+            return False
+        inserted, updated, deleted = store.upsert_rows(output_rows)
+        store.set_meta('output', output_info)
+    print(f"✓ Updated {store_file.absolute()} ({inserted} new, {updated} updated, {deleted} removed)")
+    return True
+
+
+def rewrite_outputs(output_path, edits=None):
+    """
+    Write the store's edits (see TransactionStore.edits), if any, into an
+    existing consolidated CSV, then refresh its typed Parquet copy and
+    partitioned dataset from it, as the next ingestion would write them.
+    Returns the outputs rewritten.
+    """
+    output_path = Path(output_path)
+    with open(output_path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        columns = reader.fieldnames
+        rows = list(apply_edits(reader, edits or {}))
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, output_path)
+    written = [output_path]
+    
+    if columnar_loaders.HAS_TYPED_OUTPUT:
+        typed_path = columnar_loaders.typed_output_path(output_path)
+        columnar_loaders.write_typed_output(typed_path, columns, rows)
+        written.append(typed_path)
+    dataset_dir = dataset_path(output_path)
+    if dataset_dir.exists():
+        write_partitions(dataset_dir, columns, rows)
+        written.append(dataset_dir)
+    return written
+
+def concatenate_transactions(data_dir=None, output_file=None, incremental=True, jobs=1,
+                             streaming=False, chunk_rows=DEFAULT_CHUNK_ROWS, engine='auto', store=None,
+                             format_specs=None, normalizer=None, profile=False, partitions=True, strict=False):
     """
     Concatenate all CSV transaction files from data_dir and save to output_file.
     
     Args:
         data_dir: Directory containing CSV files (default: PROJECT_ROOT/data/input)
         output_file: Output filename for concatenated transactions (default: PROJECT_ROOT/data/processed/all_transactions.csv)
+        incremental: Reuse parsed rows of unchanged files from the ingestion manifest
+            and only reparse new or changed files (default: True)
+        jobs: Number of worker processes used to parse files; 0 uses every core (default: 1)
+        streaming: Keep memory bounded by sorting each file in chunks of chunk_rows rows
+            (spilled to temporary files) and merging straight into the output (default: False)
+        chunk_rows: Maximum rows held in memory per file when streaming
+        engine: 'columnar' (pandas/pyarrow), 'rows' (csv module) or 'auto' (columnar
+            when pandas is installed and not streaming)
+        store: Upsert the rows into the SQLite store next to output_file; True creates it,
+            None (default) only updates an existing store, False skips it
+        format_specs: JSON file of additional card formats (default: data/config/card_formats.json)
+        normalizer: MerchantNormalizer (with its MerchantCache) to reuse across calls, as --watch
+            does to keep merchant normalization warm; loaded from the cache file when None
+        profile: Also write the run's stage timings and counters as JSON next to
+            output_file (a summary line is printed either way)
+        partitions: Also write the year/month partitioned dataset next to output_file,
+            rewriting only the months whose rows changed (default: True)
+        strict: Once every file is parsed, fail on the first malformed row
+            (unparseable amount, truncated line, extra fields) in file order
+            instead of skipping it and listing it in rejects.csv next to
+            output_file; no output is written (default: False)
+    
+    Returns:
+        The concatenated transactions (a list of row dicts, or a DataFrame with the
+        columnar engine), or the number of rows written when streaming.
     """
+    engine = resolve_engine(engine, streaming)
+    profiler = PipelineProfile()
+    
     if data_dir is None:
         data_path = DATA_DIR
     else:
@@ -248,10 +723,8 @@ def concatenate_transactions(data_dir=None, output_file=None):
     # Ensure output directory exists
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    all_rows = []
-    
-    # Get all CSV files in the directory
-    all_csv_files = list(data_path.glob('*.csv')) + list(data_path.glob('*.CSV'))
+    # Get all CSV files in the directory, including those inside .zip and .csv.gz archives
+    all_csv_files = list_input_files(data_path)
     
     if not all_csv_files:
         raise ValueError(f"No CSV files found in {data_path}")
@@ -267,60 +740,365 @@ def concatenate_transactions(data_dir=None, output_file=None):
         csv_files = all_csv_files
         print(f"\n⚠ No real data files found - using {len(csv_files)} example file(s) for demonstration")
     
+    # Card formats declared in JSON (Amex, Discover, Capital One, Citi, ...)
+    specs = adapter_specs.register_spec_formats(format_specs or adapter_specs.SPEC_FILE)
+    if specs:
+        print(f"✓ Loaded {len(specs)} card format spec(s): {', '.join(spec.name for spec in specs)}")
+    
+    # Reuse normalized merchant names from previous runs
+    if normalizer is None:
+        merchant_cache = MerchantCache.load(output_path.parent / MERCHANT_CACHE_NAME, DEFAULT_NORMALIZER.fingerprint)
+        normalizer = MerchantNormalizer(cache=merchant_cache)
+    else:
+        # Warm cache from an earlier call: only this run's hits and misses are reported
+        merchant_cache = normalizer.cache
+        merchant_cache.hits = merchant_cache.misses = 0
+    
+    # Parsed rows of unchanged files are reused from the manifest
+    pipeline = (f"{DEFAULT_NORMALIZER.fingerprint}:{DEFAULT_CATEGORY_RULES.fingerprint}:{engine}:"
+                f"{card_formats.registry_fingerprint()}:derived{DERIVED_SCHEMA_VERSION}:dedup{DEDUP_KEY_VERSION}")
+    manifest = IngestManifest(output_path.parent / INGEST_CACHE_DIR, pipeline)
+    if not incremental:
+        manifest.entries = {}
+    profiler.lap('setup')
+    
     print(f"\nProcessing {len(csv_files)} CSV file(s):")
     
+    ingested_files = []
+    entries = []
+    pending = []
+    
     for csv_file in csv_files:
         source_name = extract_card_name(csv_file.name)
-        print(f"  - Processing {csv_file.name} -> Source: {source_name}")
         
-        # Determine file type based on filename
-        filename_lower = csv_file.name.lower()
+        entry, fingerprint = manifest.check(csv_file)
+        if entry is not None:
+            # The format detected when the file was parsed is kept in the manifest
+            print(f"  - Unchanged {input_label(csv_file)} -> Source: {source_name} "
+                  f"({entry['row_count']} cached transactions, {entry['format']} format)")
+            profiler.add_file(input_label(csv_file), entry['row_count'], {**entry.get('stats', {}), 'format': entry['format']},
+                              cached=True)
+            ingested_files.append(csv_file)
+            entries.append(entry)
+            continue
         
-        if 'apple' in filename_lower:
-            rows = load_apple_file(csv_file, source_name)
-        else:
-            # Assume Chase format for others (chase_sapphire_preferred, chase_freedom_unlimited, bilt)
-            rows = load_chase_file(csv_file, source_name)
-        
-        all_rows.extend(rows)
-        print(f"    Loaded {len(rows)} transactions")
+        # New or changed file: classify it from its header line
+        card_format = card_formats.sniff_format(csv_file)
+        if card_format is None:
+            print(f"  ⚠ Skipping {input_label(csv_file)}: unrecognized header (see docs/AGENTS.md to convert it)")
+            profiler.count('unrecognized_files')
+            continue
+        conflicts = card_formats.sniff_conflicts(csv_file, card_format)
+        if conflicts:
+            names = ', '.join(other.name for other in conflicts)
+            print(f"  ⚠ {input_label(csv_file)}: header also matches {names}; read as {card_format.name} "
+                  f"(amount sign {card_format.amount_sign:+d}). If it is an unconverted export, put the card name "
+                  f"in the file name to choose its format.")
+            profiler.count('ambiguous_formats')
+        pending.append((len(entries), csv_file, source_name, card_format, fingerprint))
+        ingested_files.append(csv_file)
+        entries.append(None)
     
-    # Sort by Transaction Date (most recent first)
-    print("\nSorting transactions by date...")
-    all_rows.sort(key=lambda x: parse_date(x.get('Transaction Date', '')), reverse=True)
+    csv_files = ingested_files
+    if not csv_files:
+        raise ValueError(f"No CSV files with a recognized header found in {data_path}")
+    file_rows = [None] * len(csv_files)
+    profiler.lap('discover')
     
-    # Get all unique column names
+    # Parse new or changed files, possibly in parallel
+    if streaming:
+        # Each file is sorted in bounded chunks straight into its manifest run file
+        spooled = spool_files(
+            [(csv_file, source_name, card_format, manifest.file_id(csv_file), manifest.rows_path(csv_file))
+             for _, csv_file, source_name, card_format, _ in pending],
+            normalizer, jobs, chunk_rows, tmp_dir=manifest.cache_dir / 'tmp'
+        )
+        for (position, csv_file, source_name, card_format, fingerprint), (row_count, columns, stats) in zip(pending, spooled):
+            print(f"  - Processing {input_label(csv_file)} -> Source: {source_name} ({card_format.name} format)")
+            entries[position] = manifest.record(csv_file, fingerprint, row_count, columns, source=source_name,
+                                                format=card_format.name, stats=stats)
+            print(f"    Loaded {row_count} transactions")
+            report_file_stats(stats)
+            profiler.add_file(input_label(csv_file), row_count, {**stats, 'format': card_format.name})
+    else:
+        parsed = parse_files([(csv_file, source_name, card_format, manifest.file_id(csv_file))
+                              for _, csv_file, source_name, card_format, _ in pending],
+                             normalizer, jobs, engine=engine)
+        for (position, csv_file, source_name, card_format, fingerprint), (rows, stats) in zip(pending, parsed):
+            print(f"  - Processing {input_label(csv_file)} -> Source: {source_name} ({card_format.name} format)")
+            info = {'source': source_name, 'format': card_format.name, 'stats': stats}
+            if engine == 'columnar':
+                entries[position] = manifest.store_frame(csv_file, fingerprint, rows, **info)
+            else:
+                entries[position] = manifest.store(csv_file, fingerprint, rows, **info)
+            file_rows[position] = rows
+            print(f"    Loaded {len(rows)} transactions")
+            report_file_stats(stats)
+            profiler.add_file(input_label(csv_file), len(rows), {**stats, 'format': card_format.name})
+    changed_files = len(pending)
+    profiler.lap('parse')
+    
+    removed_files = manifest.prune(csv_files)
+    for removed in removed_files:
+        print(f"  - Removed {Path(removed).name} (rows dropped)")
+    profiler.count('files_changed', changed_files)
+    profiler.count('files_removed', len(removed_files))
+    
+    # Malformed rows were skipped; list them (cached files' included) for fixing
+    file_rejects = [(input_label(csv_file), entry.get('stats', {}).get('rejects', []))
+                    for csv_file, entry in zip(csv_files, entries)]
+    if strict:
+        for label, rejects in file_rejects:
+            if rejects:
+                line, reason, _ = min(rejects, key=lambda reject: reject[0])
+                raise ValueError(f"{label}, line {line}: {reason}")
+    rejects_file = rejects_path(output_path)
+    rejected_rows = write_rejects(rejects_file, file_rejects)
+    profiler.count('rejected_rows', rejected_rows)
+    
+    # Column union comes from the manifest entries
     all_columns = set()
-    for row in all_rows:
-        all_columns.update(row.keys())
+    bad_dates = 0
+    for entry in entries:
+        all_columns.update(entry['columns'])
+        bad_dates += entry.get('stats', {}).get('bad_dates', 0)
+    column_order = get_column_order(all_columns)
+    profiler.lap('columns')
     
-    # Define column order: Source first, then standard order
-    standard_columns = ['Transaction Date', 'Post Date', 'Description', 'Merchant', 'Normalized Merchant', 'Category', 'Type', 'Amount', 'Memo']
-    column_order = ['Source'] + [col for col in standard_columns if col in all_columns]
-    # Add any remaining columns
-    for col in sorted(all_columns):
-        if col not in column_order:
-            column_order.append(col)
+    # Each file's rows are already sorted by Transaction Date (most recent first),
+    # so a k-way merge replaces the full sort; rows repeated across overlapping
+    # exports of the same card are dropped on the way
+    deduplicator = Deduplicator(card_key(entry['source']) for entry in entries)
+    print("\nMerging transactions by date...")
+    if streaming:
+        file_streams = [manifest.iter_rows(entry) for entry in entries]
+        all_rows = None
+    elif engine == 'columnar':
+        frames = [
+            frame if frame is not None else manifest.load_frame(entry)
+            for frame, entry in zip(file_rows, entries)
+        ]
+        all_rows = columnar_loaders.dedupe_frames(frames, deduplicator)
+    else:
+        file_streams = [
+            rows if rows is not None else manifest.load_rows(entry)
+            for rows, entry in zip(file_rows, entries)
+        ]
+        all_rows = list(deduplicator.iter_unique(file_streams, transaction_sort_key))
+    profiler.lap('merge')
     
-    # Write to output file
-    with open(output_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=column_order)
-        writer.writeheader()
-        writer.writerows(all_rows)
+    # Categories and merchants edited in the SQLite store (assign_categories.py)
+    # are kept in every output, not only in the store
+    store_file = output_path.parent / STORE_NAME
+    use_store = store or (store is None and store_file.exists())
+    edits = {}
+    if use_store and store_file.exists():
+        with TransactionStore(store_file) as transaction_store:
+            edits = transaction_store.edits()
+    if edits and engine == 'columnar':
+        apply_frame_edits(all_rows, edits)
+    elif edits and all_rows is not None:
+        all_rows = list(apply_edits(all_rows, edits))
     
-    # Count by source
+    wrote_output = changed_files or removed_files or not manifest.output_is_current(output_path)
+    if wrote_output:
+        # Write to a temporary file and swap it in, so readers (the dashboard)
+        # never see a partially written output file
+        tmp_path = output_path.with_name(output_path.name + '.tmp')
+        if engine == 'columnar':
+            all_rows.to_csv(tmp_path, index=False, columns=column_order, encoding='utf-8', lineterminator='\r\n',
+                            float_format=AMOUNT_FORMAT)
+        else:
+            merged = all_rows if all_rows is not None else deduplicator.iter_unique(file_streams, transaction_sort_key)
+            if all_rows is None and edits:
+                merged = apply_edits(merged, edits)
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=column_order)
+                writer.writeheader()
+                writer.writerows(merged)
+        os.replace(tmp_path, output_path)
+        file_counts = dedup_counts(csv_files, deduplicator)
+        manifest.record_output(output_path, file_counts=file_counts)
+        # Streaming runs merge while writing, so their merge time is counted here
+        profiler.lap('write')
+    else:
+        # Streaming runs did not merge anything: reuse the counts from the last write
+        if streaming:
+            file_counts = manifest.output.get('file_counts', {})
+        else:
+            file_counts = dedup_counts(csv_files, deduplicator)
+    
+    # Per-file and per-source counts of the rows actually written
     source_counts = {}
-    for row in all_rows:
-        source = row.get('Source', 'Unknown')
-        source_counts[source] = source_counts.get(source, 0) + 1
+    total_rows = 0
+    duplicate_rows = 0
+    for csv_file, entry in zip(csv_files, entries):
+        contributed, duplicates = file_counts.get(input_label(csv_file), [entry['row_count'], 0])
+        source_counts[entry['source']] = source_counts.get(entry['source'], 0) + contributed
+        total_rows += contributed
+        duplicate_rows += duplicates
+    
+    profiler.count('rows_written', total_rows)
+    profiler.count('duplicates_dropped', duplicate_rows)
+    
+    if wrote_output:
+        print(f"\n✓ Successfully concatenated {total_rows} transactions")
+        print(f"✓ Saved to {output_path.absolute()}")
+    else:
+        print(f"\n✓ No input changes - {output_path.absolute()} is up to date ({total_rows} transactions)")
+    if duplicate_rows:
+        print(f"\n⚠ Dropped {duplicate_rows} duplicate transaction(s) found in overlapping exports:")
+        for csv_file in csv_files:
+            contributed, duplicates = file_counts.get(input_label(csv_file), [0, 0])
+            print(f"  {input_label(csv_file)}: {contributed} contributed, {duplicates} duplicate(s)")
+    
+    # Typed Parquet copy for the dashboard (dates, floats and categoricals
+    # already decoded), refreshed whenever the CSV is newer
+    typed_path = columnar_loaders.typed_output_path(output_path)
+    if columnar_loaders.HAS_TYPED_OUTPUT:
+        if wrote_output or not columnar_loaders.typed_output_is_current(typed_path, output_path):
+            # Streaming runs merge the run files again rather than holding the rows
+            typed_rows = all_rows if all_rows is not None else iter_output_rows(all_rows, entries, manifest, edits)
+            columnar_loaders.write_typed_output(typed_path, column_order, typed_rows, chunk_rows)
+            print(f"✓ Saved typed copy to {typed_path.absolute()}")
+    elif wrote_output:
+        print("  (install pyarrow to also write a typed Parquet copy for faster dashboard loads)")
+    profiler.lap('typed_output')
+    
+    # Monthly partitions, so the dashboard only reads the months it shows
+    if partitions:
+        dataset_dir = dataset_path(output_path)
+        partition_rows = all_rows if engine == 'columnar' else iter_output_rows(all_rows, entries, manifest, edits)
+        counts = write_partitions(dataset_dir, column_order, partition_rows, manifest.output)
+        if counts is not None:
+            written, unchanged, removed = counts
+            print(f"✓ Updated {dataset_dir.absolute()} ({written} partition(s) rewritten, {unchanged} unchanged, "
+                  f"{removed} removed)")
+        profiler.lap('partitions')
+    
+    # Lineage: the dictionary of input files behind the File ID column, and
+    # the output rows each of them contributed
+    lineage_file = lineage_path(output_path)
+    lineage = load_lineage(lineage_file)
+    if lineage is None or lineage.get('output') != manifest.output:
+        files = {
+            manifest.file_id(csv_file): {'file': input_label(csv_file), 'key': input_key(csv_file),
+                                         'source': entry['source'], 'format': entry['format']}
+            for csv_file, entry in zip(csv_files, entries)
+        }
+        if engine == 'columnar':
+            file_ids = all_rows[FILE_ID_COLUMN].to_numpy()
+        else:
+            file_ids = (row.get(FILE_ID_COLUMN) for row in iter_output_rows(all_rows, entries, manifest, edits))
+        write_lineage(lineage_file, files, file_ids, manifest.output)
+        profiler.lap('lineage')
+    
+    # Optional SQLite backend, kept in step with the CSV
+    if use_store:
+        update_transaction_store(store_file, iter_output_rows(all_rows, entries, manifest, edits), manifest.output)
+        profiler.lap('store')
+    
+    manifest.save()
+    merchant_cache.save()
+    profiler.lap('save')
+    profiler.count('merchant_cache_hits', merchant_cache.hits)
+    profiler.count('merchant_cache_misses', merchant_cache.misses)
     
-    print(f"\n✓ Successfully concatenated {len(all_rows)} transactions")
-    print(f"✓ Saved to {output_path.absolute()}")
     print(f"\nBreakdown by source:")
     for source, count in sorted(source_counts.items()):
         print(f"  {source}: {count} transactions")
+    if bad_dates:
+        print(f"\n⚠ {bad_dates} transaction(s) have an unparseable Transaction Date and are listed last")
+    if rejected_rows:
+        print(f"\n⚠ {rejected_rows} malformed row(s) could not be parsed and were skipped; "
+              f"see {rejects_file.absolute()}")
+    print(f"\n{merchant_cache.summary()}")
+    print(profiler.summary())
+    if profile:
+        report_path = profile_path(output_path)
+        profiler.save(report_path)
+        print(f"✓ Saved profile to {report_path.absolute()}")
+    
+    return all_rows if all_rows is not None else total_rows
+
+def watch_transactions(data_dir=None, output_file=None, interval=2.0, debounce=2.0, incremental=True, **options):
+    """
+    Build the consolidated file, then rebuild it whenever CSV files in data_dir
+    are added, changed or removed, until interrupted (Ctrl+C).
+    
+    Args:
+        data_dir, output_file: As for concatenate_transactions
+        interval: Seconds between polls of the input directory
+        debounce: Seconds the directory must stay unchanged before rebuilding,
+            so files still being copied are not read half-written
+        incremental: Reuse cached rows for the first build (later builds always do)
+        options: Other concatenate_transactions arguments (jobs, streaming, engine, ...)
+    """
+    data_path = Path(data_dir) if data_dir is not None else DATA_DIR
+    output_path = Path(output_file) if output_file is not None else OUTPUT_FILE
+    if not data_path.exists():
+        raise FileNotFoundError(f"Directory {data_path} not found")
     
-    return all_rows
+    # One normalizer for the whole session: merchants seen by earlier builds
+    # stay in memory instead of being reloaded from the cache file each time
+    merchant_cache = MerchantCache.load(output_path.parent / MERCHANT_CACHE_NAME, DEFAULT_NORMALIZER.fingerprint)
+    normalizer = MerchantNormalizer(cache=merchant_cache)
+    
+    # Snapshot before the first build, so files dropped in during it are picked up
+    watcher = InputWatcher(data_path, interval, debounce)
+    
+    def rebuild(incremental):
+        try:
+            concatenate_transactions(data_path, output_path, incremental=incremental, normalizer=normalizer, **options)
+        except (FileNotFoundError, ValueError) as e:
+            print(f"\n❌ {e}")
+    
+    rebuild(incremental)
+    print(f"\nWatching {data_path} for CSV changes (Ctrl+C to stop)...")
+    try:
+        for added, changed, removed in watcher.changes():
+            for label, names in (('Added', added), ('Changed', changed), ('Removed', removed)):
+                if names:
+                    print(f"\n{label}: {', '.join(names)}")
+            rebuild(True)
+            print(f"\nWatching {data_path} for CSV changes (Ctrl+C to stop)...")
+    except KeyboardInterrupt:
+        print("\n✓ Stopped watching")
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Concatenate transaction CSV files into one consolidated file')
+    parser.add_argument('--data-dir', default=None, help='Directory containing CSV files (default: data/input)')
+    parser.add_argument('--output', default=None, help='Output CSV file (default: data/processed/all_transactions.csv)')
+    parser.add_argument('--full', action='store_true', help='Reparse every input file instead of reusing unchanged ones')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N', help='Parse files with N worker processes (0 = all cores, default: 1)')
+    parser.add_argument('--stream', action='store_true', help='Stream rows through a bounded-memory external sort instead of loading every row')
+    parser.add_argument('--engine', choices=['auto', 'columnar', 'rows'], default='auto', help='Ingestion engine (default: columnar when pandas is installed)')
+    parser.add_argument('--formats', default=None, help='JSON file of card format specs (default: data/config/card_formats.json)')
+    parser.add_argument('--watch', action='store_true', help='Keep running and rebuild whenever CSV files in the data directory change')
+    parser.add_argument('--interval', type=float, default=2.0, metavar='SECONDS', help='With --watch, seconds between checks of the data directory (default: 2)')
+    parser.add_argument('--debounce', type=float, default=2.0, metavar='SECONDS', help='With --watch, seconds without further changes before rebuilding (default: 2)')
+    parser.add_argument('--profile', action='store_true', help='Write per-stage and per-file timings and counters to a JSON file next to the output')
+    parser.add_argument('--strict', action='store_true', help=f'Fail without writing any output if a row is malformed, reporting the first one, '
+                             f'instead of skipping it and listing it in data/processed/{REJECTS_NAME}')
+    parser.add_argument('--no-partitions', action='store_true', help='Do not write the year/month partitioned dataset (data/processed/transactions/)')
+    parser.add_argument('--sqlite', action='store_true', help=f'Also load the transactions into the SQLite store (data/processed/{STORE_NAME}); an existing store is always kept up to date')
+    
+    args = parser.parse_args()
+    
+    options = dict(jobs=args.jobs, streaming=args.stream, engine=args.engine, store=args.sqlite or None,
+                   format_specs=args.formats, profile=args.profile, partitions=not args.no_partitions,
+                   strict=args.strict)
+    try:
+        if args.watch:
+            watch_transactions(args.data_dir, args.output, args.interval, args.debounce,
+                               incremental=not args.full, **options)
+        else:
+            concatenate_transactions(args.data_dir, args.output, incremental=not args.full, **options)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"\n❌ {e}")
+        return 1
 
 if __name__ == '__main__':
-    concatenate_transactions()
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Date Parsing
+Detects the date format of each input file once, parses each distinct date
+string only once, and produces integer ordinal sort keys. Dates that cannot
+be parsed are counted instead of being silently sorted to the bottom.
+"""
+
+import itertools
+from datetime import datetime
+from functools import lru_cache
+
+from lineage import LINE_COLUMN
+
+# Dates are written to the consolidated file in this format
+CANONICAL_DATE_FORMAT = '%m/%d/%Y'
+
+# Formats used by card issuers' exports, tried in this order during detection
+DATE_FORMATS = [
+    '%m/%d/%Y',  # Chase, Bilt, Apple, Amex, Discover, Citi
+    '%m/%d/%y',  # short year (hand-edited or spreadsheet re-saved exports)
+    '%Y-%m-%d',  # Capital One, ISO
+    '%m-%d-%Y',
+    '%Y/%m/%d',
+    '%b %d, %Y',
+    '%d %b %Y',
+]
+
+# Number of values inspected to detect a file's date format
+DETECTION_SAMPLE_SIZE = 200
+
+# Sort key for unparseable dates: below every real ordinal, so most-recent-first
+# sorting puts them last
+BAD_DATE_KEY = 0
+
+DATE_COLUMNS = ('Transaction Date', 'Post Date')
+
+# Line numbers of unparseable Transaction Dates kept per file, for the report
+BAD_DATE_LINES = 5
+
+
+def _parse(value, fmt):
+    try:
+        return datetime.strptime(value.strip(), fmt)
+    except (ValueError, AttributeError):
+        return None
+
+
+def detect_date_format(values, formats=DATE_FORMATS):
+    """
+    Return the first format that parses every non-empty sample value, or the
+    format parsing the most samples when none parses them all.
+    """
+    samples = list(itertools.islice((v for v in values if v and str(v).strip()), DETECTION_SAMPLE_SIZE))
+    if not samples:
+        return CANONICAL_DATE_FORMAT
+
+    best_format, best_count = CANONICAL_DATE_FORMAT, 0
+    for fmt in formats:
+        parsed = sum(1 for value in samples if _parse(value, fmt) is not None)
+        if parsed == len(samples):
+            return fmt
+        if parsed > best_count:
+            best_format, best_count = fmt, parsed
+    return best_format
+
+
+class DateParser:
+    """Memoizing parser for one date format."""
+
+    def __init__(self, fmt=CANONICAL_DATE_FORMAT):
+        self.fmt = fmt
+        self._cache = {}
+        self._canonical = {}
+
+    def parse(self, value):
+        """Parse value into a datetime, or None if it does not match the format."""
+        try:
+            return self._cache[value]
+        except KeyError:
+            parsed = self._cache[value] = _parse(value, self.fmt)
+            return parsed
+
+    def canonical(self, value):
+        """
+        value rewritten in CANONICAL_DATE_FORMAT, or None if unparseable.
+        Dates already in that format are rewritten too: strptime accepts
+        unpadded ('2/5/2026') and space-padded values.
+        """
+        try:
+            return self._canonical[value]
+        except KeyError:
+            parsed = self.parse(value)
+            canonical = self._canonical[value] = parsed.strftime(CANONICAL_DATE_FORMAT) if parsed is not None else None
+            return canonical
+
+
+@lru_cache(maxsize=65536)
+def parse_date(value):
+    """A canonical date string as a datetime, or None if unparseable."""
+    return _parse(value, CANONICAL_DATE_FORMAT)
+
+
+@lru_cache(maxsize=65536)
+def date_key(value):
+    """Integer ordinal sort key for a canonical date string (BAD_DATE_KEY if unparseable)."""
+    parsed = parse_date(value)
+    return parsed.toordinal() if parsed is not None else BAD_DATE_KEY
+
+
+def canonicalize_dates(rows, stats, fmt=None):
+    """
+    Detect the date format from the first rows (unless the format declares it
+    as fmt), then yield every row with its date columns rewritten to
+    CANONICAL_DATE_FORMAT. Rows whose Transaction Date cannot be parsed are
+    counted in stats['bad_dates'], and the first lines they came from listed
+    in stats['bad_date_lines'].
+    """
+    rows = iter(rows)
+    head = list(itertools.islice(rows, DETECTION_SAMPLE_SIZE))
+    parser = DateParser(fmt or detect_date_format(row.get('Transaction Date') for row in head))
+    stats['date_format'] = parser.fmt
+    stats.setdefault('bad_dates', 0)
+    bad_lines = stats.setdefault('bad_date_lines', [])
+
+    for row in itertools.chain(head, rows):
+        for column in DATE_COLUMNS:
+            value = row.get(column)
+            canonical = parser.canonical(value) if value else None
+            if canonical is not None:
+                row[column] = canonical
+            elif column == 'Transaction Date':
+                stats['bad_dates'] += 1
+                if len(bad_lines) < BAD_DATE_LINES and LINE_COLUMN in row:
+                    bad_lines.append(row[LINE_COLUMN])
+        yield row
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Deduplication
+Drops transactions that appear in more than one input file, as happens when
+overlapping date ranges are exported (e.g. a quarterly export plus monthly
+exports of the same card).
+"""
+
+import heapq
+import re
+
+# Bump when the dedup key changes: it is part of the ingestion pipeline
+# fingerprint, so outputs deduplicated with the old key are rebuilt
+DEDUP_KEY_VERSION = 2
+
+# Filename tokens naming a statement period rather than the card, ignored
+# when deciding whether two files are exports of the same card: years
+# (19xx/20xx), compact year-month(-day) dates, month and day numbers,
+# ordinals, quarters, halves and month names. Other numbers, like the last
+# four digits of a card, stay in the key.
+PERIOD_TOKEN_RE = re.compile(
+    r'^((19|20)\d{2}((0[1-9]|1[0-2])(0[1-9]|[12]\d|3[01])?)?|\d{1,2}|\d{1,2}(st|nd|rd|th)|q[1-4]|h[12]|ytd|'
+    r'jan(uary)?|feb(ruary)?|mar(ch)?|apr(il)?|may|june?|july?|aug(ust)?|'
+    r'sept?(ember)?|oct(ober)?|nov(ember)?|dec(ember)?)$',
+    re.IGNORECASE,
+)
+
+
+def card_key(source_name):
+    """
+    Identity of the card behind a source name, ignoring period tokens:
+    "Chase Sapphire 2025 Q1" and "Chase Sapphire Jan 2025" are the same card,
+    "Chase 4321" and "Chase 8765" are not.
+    """
+    tokens = re.split(r'[\s_\-.]+', source_name.lower())
+    card_tokens = [token for token in tokens if token and not PERIOD_TOKEN_RE.match(token)]
+    return ' '.join(card_tokens) or source_name.lower()
+
+
+def amount_key(value):
+    """Amount rounded to cents, so '-12.5' and '-12.50' compare equal."""
+    try:
+        return round(float(value), 2)
+    except (TypeError, ValueError):
+        return str(value)
+
+
+class Deduplicator:
+    """
+    Merges per-file row streams (each sorted by date, most recent first) and
+    drops rows already contributed by an earlier file.
+
+    A row is keyed by (card, date, amount, description, occurrence), where
+    occurrence counts identical rows within the same file. Genuine repeats,
+    like two identical coffees on one day, therefore survive, while a
+    transaction exported in two overlapping files is kept once. Because the
+    merged stream is ordered by date, only the keys of the current date are
+    held in the hash index, which keeps memory bounded when streaming.
+    After iterating, contributed[i] and duplicates[i] hold the counts of
+    file i.
+    """
+
+    def __init__(self, card_keys):
+        self.card_keys = list(card_keys)
+        self.contributed = [0] * len(self.card_keys)
+        self.duplicates = [0] * len(self.card_keys)
+
+    def _keyed(self, index, rows, sort_key):
+        """Yield (key, index, row) for the rows of file index."""
+        card = self.card_keys[index]
+        occurrences = {}
+        current_day = None
+        for row in rows:
+            day = sort_key(row)
+            if day != current_day:
+                occurrences.clear()
+                current_day = day
+            base = (card, row.get('Transaction Date', ''), amount_key(row.get('Amount')), row.get('Description', ''))
+            occurrence = occurrences.get(base, 0)
+            occurrences[base] = occurrence + 1
+            yield base + (occurrence,), index, row
+
+    def iter_unique(self, file_streams, sort_key):
+        """k-way merge of the sorted file streams, without cross-file duplicates."""
+        keyed = [self._keyed(index, rows, sort_key) for index, rows in enumerate(file_streams)]
+        merged = heapq.merge(*keyed, key=lambda item: sort_key(item[2]), reverse=True)
+        seen = set()
+        current_day = None
+        for key, index, row in merged:
+            day = sort_key(row)
+            if day != current_day:
+                seen.clear()
+                current_day = day
+            if key in seen:
+                self.duplicates[index] += 1
+                continue
+            seen.add(key)
+            self.contributed[index] += 1
+            yield row
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+External Sort
+Sorts row streams in bounded memory: rows are sorted in fixed-size chunks,
+spilled to temporary run files when they do not fit, and k-way merged back.
+"""
+
+import heapq
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+# Rows per pickled batch inside a run file
+RUN_BATCH_ROWS = 5000
+
+# Rows held in memory before a sorted chunk is spilled to disk
+DEFAULT_CHUNK_ROWS = 100000
+
+
+def write_run(path, rows, batch_rows=RUN_BATCH_ROWS):
+    """
+    Write rows to a run file as a sequence of pickled batches.
+    Returns (row_count, columns) gathered in the same pass.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    row_count = 0
+    columns = set()
+    batch = []
+    with open(tmp_path, 'wb') as f:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_rows:
+                pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+                row_count += len(batch)
+                for batch_row in batch:
+                    columns.update(batch_row.keys())
+                batch = []
+        if batch:
+            pickle.dump(batch, f, protocol=pickle.HIGHEST_PROTOCOL)
+            row_count += len(batch)
+            for batch_row in batch:
+                columns.update(batch_row.keys())
+    os.replace(tmp_path, path)
+    return row_count, columns
+
+
+def read_run(path):
+    """Yield the rows of a run file one batch at a time."""
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+            yield from batch
+
+
+class ExternalSorter:
+    """
+    Bounded-memory sorter for row dicts.
+
+    Use as a context manager: add() rows, then iterate sorted(). At most
+    chunk_rows rows are held in memory; larger inputs are spilled to sorted
+    run files in a temporary directory that is removed on exit. Sorting is
+    stable, matching list.sort(key=key, reverse=reverse).
+    """
+
+    def __init__(self, key, reverse=False, chunk_rows=DEFAULT_CHUNK_ROWS, tmp_dir=None):
+        self.key = key
+        self.reverse = reverse
+        self.chunk_rows = chunk_rows
+        self.tmp_dir = tmp_dir
+        self.buffer = []
+        self.runs = []
+        self._tmp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Remove any spilled run files."""
+        self.buffer = []
+        self.runs = []
+        if self._tmp is not None:
+            self._tmp.cleanup()
+            self._tmp = None
+
+    def add(self, row):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.chunk_rows:
+            self._spill()
+
+    def extend(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def _spill(self):
+        """Sort the in-memory chunk and write it out as a run file."""
+        if self._tmp is None:
+            if self.tmp_dir is not None:
+                Path(self.tmp_dir).mkdir(parents=True, exist_ok=True)
+            self._tmp = tempfile.TemporaryDirectory(prefix='sort-', dir=self.tmp_dir)
+        self.buffer.sort(key=self.key, reverse=self.reverse)
+        run_path = Path(self._tmp.name) / f'run-{len(self.runs):05d}.pkl'
+        write_run(run_path, self.buffer)
+        self.runs.append(run_path)
+        self.buffer = []
+
+    def sorted(self):
+        """Iterate over all added rows in sorted order."""
+        self.buffer.sort(key=self.key, reverse=self.reverse)
+        if not self.runs:
+            return iter(self.buffer)
+        # Runs were spilled in input order, so merging them keeps the sort stable
+        streams = [read_run(run) for run in self.runs] + [iter(self.buffer)]
+        return heapq.merge(*streams, key=self.key, reverse=self.reverse)
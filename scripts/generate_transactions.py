@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Synthetic Transaction Generator
+Writes realistic Chase-, Bilt- and Apple-format CSV exports of any size, for
+benchmarking ingestion beyond the example files. Merchants are drawn from a
+Zipf-like distribution over a pool of raw description variants (store
+numbers, order ids), so the same strings repeat the way they do in real
+statements; dates are spread over a period with busier weekends, most
+recent first as the issuers export them.
+"""
+
+import csv
+import random
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+
+# Get the project root directory (parent of scripts/)
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Column headers of each issuer's export
+HEADERS = {
+    'chase': ['Transaction Date', 'Post Date', 'Description', 'Category', 'Type', 'Amount', 'Memo'],
+    'bilt': ['Transaction Date', 'Post Date', 'Description', 'Merchant', 'Category', 'Type', 'Amount', 'Memo'],
+    'apple': ['Transaction Date', 'Clearing Date', 'Description', 'Merchant', 'Category', 'Type', 'Amount (USD)',
+              'Purchased By'],
+}
+
+# Raw description template, merchant, category, typical amount, number of
+# distinct store/order ids ({id} in the template), in order of popularity
+MERCHANT_POOL = [
+    ('AMAZON.COM*{id}', 'Amazon', 'Shopping', 35.0, 5000),
+    ('STARBUCKS STORE {id}', 'Starbucks', 'Dining', 6.5, 40),
+    ('UBER *TRIP {id}', 'Uber', 'Transportation', 18.0, 3000),
+    ("TRADER JOE'S #{id}", "Trader Joe's", 'Groceries', 60.0, 8),
+    ('WHOLEFDS MKT {id}', 'Whole Foods', 'Groceries', 75.0, 6),
+    ('SHELL OIL {id}', 'Shell', 'Gas/Fuel', 45.0, 25),
+    ('DOORDASH*{id}', 'DoorDash', 'Dining', 32.0, 2000),
+    ('TARGET {id}', 'Target', 'Shopping', 48.0, 12),
+    ('LYFT *RIDE {id}', 'Lyft', 'Transportation', 16.0, 1500),
+    ('SAFEWAY #{id}', 'Safeway', 'Groceries', 55.0, 10),
+    ('CHIPOTLE {id}', 'Chipotle', 'Dining', 14.0, 15),
+    ('COSTCO WHSE #{id}', 'Costco', 'Groceries', 140.0, 4),
+    ('DUNKIN #{id}', "Dunkin'", 'Dining', 7.5, 20),
+    ('CVS/PHARMACY #{id}', 'CVS', 'Health', 22.0, 18),
+    ('WALGREENS #{id}', 'Walgreens', 'Health', 19.0, 14),
+    ('SQ *BLUE BOTTLE {id}', 'Blue Bottle Coffee', 'Dining', 7.0, 6),
+    ('NETFLIX.COM', 'Netflix', 'Entertainment', 15.49, 1),
+    ('SPOTIFY USA', 'Spotify', 'Entertainment', 10.99, 1),
+    ('APPLE.COM/BILL', 'Apple', 'Technology', 2.99, 1),
+    ('CHEVRON {id}', 'Chevron', 'Gas/Fuel', 50.0, 20),
+    ('HOME DEPOT #{id}', 'Home Depot', 'Home', 85.0, 6),
+    ('BEST BUY {id}', 'Best Buy', 'Technology', 180.0, 5),
+    ('SWEETGREEN {id}', 'Sweetgreen', 'Dining', 16.0, 10),
+    ('PG&E WEB ONLINE', 'PG&E', 'Utilities', 120.0, 1),
+    ('COMCAST CABLE COMM', 'Comcast', 'Utilities', 80.0, 1),
+    ('UNITED AIRLINES {id}', 'United Airlines', 'Travel', 420.0, 300),
+    ('MARRIOTT {id}', 'Marriott', 'Travel', 260.0, 40),
+    ('AIRBNB * {id}', 'Airbnb', 'Travel', 350.0, 400),
+    ('GEICO *AUTO', 'Geico', 'Insurance', 110.0, 1),
+    ('PLANET FITNESS', 'Planet Fitness', 'Health', 24.99, 1),
+]
+
+# Zipf exponent of merchant popularity
+ZIPF_EXPONENT = 1.1
+
+# Relative transaction volume by weekday (Monday first)
+WEEKDAY_WEIGHTS = [0.9, 0.9, 0.95, 1.0, 1.2, 1.4, 1.25]
+
+# Share of purchases that are later returned
+RETURN_RATE = 0.02
+
+# Rows written per csv.writer batch
+WRITE_BATCH_ROWS = 50000
+
+
+def _pick_days(rng, row_count, start, end):
+    """Number of transactions on each day between start and end (inclusive)."""
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    weights = [WEEKDAY_WEIGHTS[day.weekday()] for day in days]
+    counts = Counter()
+    remaining = row_count
+    # Draw in batches so 10M-row files do not build a 10M-element list
+    while remaining:
+        batch = min(remaining, 1_000_000)
+        counts.update(rng.choices(range(len(days)), weights=weights, k=batch))
+        remaining -= batch
+    return [(days[index], counts[index]) for index in range(len(days)) if counts[index]]
+
+
+def _merchant_picker(rng):
+    """Function drawing (description, merchant, category, amount) tuples."""
+    weights = [1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(len(MERCHANT_POOL))]
+    cumulative = []
+    total = 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+
+    def pick(k):
+        picks = []
+        for template, merchant, category, typical, ids in rng.choices(MERCHANT_POOL, cum_weights=cumulative, k=k):
+            if ids > 100:
+                # Order/trip ids: mostly distinct strings
+                store_id = rng.randrange(ids) + 1000
+            else:
+                # Store numbers are themselves skewed: a few locations dominate
+                store_id = int(rng.paretovariate(1.2)) % ids + 1000
+            description = template.format(id=store_id) if '{id}' in template else template
+            amount = round(rng.lognormvariate(0, 0.6) * typical, 2)
+            picks.append((description, merchant, category, amount))
+        return picks
+
+    return pick
+
+
+def _format_row(card, day, description, merchant, category, kind, amount, memo, post_lag):
+    """One export row in the card's layout; amount follows the standard sign (positive = expense)."""
+    transaction_date = day.strftime('%m/%d/%Y')
+    post_date = (day + timedelta(days=post_lag)).strftime('%m/%d/%Y')
+    if card == 'apple':
+        return [transaction_date, post_date, description, merchant, category, kind, f'{amount:.2f}', 'John Doe']
+    # Chase and Bilt write expenses as negative amounts
+    signed = f'{-amount:.2f}'
+    if card == 'bilt':
+        return [transaction_date, post_date, description, merchant, category, kind, signed, memo]
+    return [transaction_date, post_date, description, category, kind, signed, memo]
+
+
+def generate_file(path, card, row_count, start, end, seed=0):
+    """
+    Write a synthetic export of row_count transactions for card ('chase',
+    'bilt' or 'apple') dated between start and end, most recent first.
+    Returns the number of rows written.
+    """
+    if card not in HEADERS:
+        raise ValueError(f"Unknown card layout: {card}")
+    rng = random.Random(f'{seed}:{card}')
+    pick = _merchant_picker(rng)
+    payment_kind = 'Payment'
+    purchase_kind = 'Purchase' if card == 'apple' else 'Sale'
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS[card])
+        batch = []
+        for day, count in reversed(_pick_days(rng, row_count, start, end)):
+            for description, merchant, category, amount in pick(count):
+                roll = rng.random()
+                if day.day == 1 and roll < 0.02:
+                    # Statement payment (and rent for Bilt) around the first of the month
+                    if card == 'bilt' and roll < 0.01:
+                        row = _format_row(card, day, 'BPS*BILT RENT NEW YORK NY', 'Bilt Rent Payment', 'Rent',
+                                          purchase_kind, 2500.00, 'Rent payment', 0)
+                    else:
+                        description = 'ACH DEPOSIT INTERNET TRANSFER' if card == 'apple' else 'Payment Thank You-Mobile'
+                        row = _format_row(card, day, description, 'Payment', 'Payment', payment_kind,
+                                          -round(amount * 20, 2), '', 0)
+                elif roll < RETURN_RATE:
+                    row = _format_row(card, day, description, merchant, category, 'Return', -amount, '', 1)
+                else:
+                    row = _format_row(card, day, description, merchant, category, purchase_kind, amount, '',
+                                      rng.randint(0, 2))
+                batch.append(row)
+            if len(batch) >= WRITE_BATCH_ROWS:
+                writer.writerows(batch)
+                written += len(batch)
+                batch = []
+        writer.writerows(batch)
+        written += len(batch)
+    return written
+
+
+def generate_dataset(output_dir, total_rows, cards=('chase', 'bilt', 'apple'), years=3, end=None, seed=0):
+    """
+    Split total_rows across one synthetic export per card in output_dir,
+    covering the `years` years up to end (default: today). Returns the paths.
+    """
+    end = end or date.today()
+    start = end - timedelta(days=365 * years)
+    output_dir = Path(output_dir)
+    paths = []
+    for index, card in enumerate(cards):
+        # Spread the remainder over the first files
+        row_count = total_rows // len(cards) + (1 if index < total_rows % len(cards) else 0)
+        path = output_dir / f'synthetic_{card}.csv'
+        generate_file(path, card, row_count, start, end, seed)
+        paths.append(path)
+    return paths
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate synthetic card exports for benchmarking')
+    parser.add_argument('--rows', type=int, default=100000, help='Total transactions across all files (default: 100000)')
+    parser.add_argument('--output-dir', default=str(PROJECT_ROOT / 'data' / 'synthetic'),
+                        help='Directory to write the CSV files to (default: data/synthetic)')
+    parser.add_argument('--cards', default='chase,bilt,apple', help='Comma-separated layouts to generate (default: chase,bilt,apple)')
+    parser.add_argument('--years', type=int, default=3, help='Years of history to spread the transactions over (default: 3)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible files (default: 0)')
+
+    args = parser.parse_args()
+
+    cards = [card.strip() for card in args.cards.split(',') if card.strip()]
+    try:
+        paths = generate_dataset(args.output_dir, args.rows, cards, args.years, seed=args.seed)
+    except ValueError as e:
+        print(f"\n❌ {e}")
+        return 1
+
+    print(f"\n✓ Generated {args.rows} transactions in {len(paths)} file(s):")
+    for path in paths:
+        print(f"  {path} ({path.stat().st_size / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Ingestion Manifest
+Tracks a fingerprint (size, mtime, content hash) for every input file together
+with its already-parsed rows, so concatenation only reparses what changed.
+CSVs inside archives are tracked per member, by the CRC-32 and size the
+archive records for them.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+
+from external_sort import read_run, write_run
+from input_files import ArchiveMember, input_key
+
+# Bump when the parsed row layout changes so every cached file is reparsed
+MANIFEST_VERSION = 4
+
+MANIFEST_NAME = 'manifest.json'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(filepath):
+    """Content hash of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """
+    Manifest of parsed input files stored under cache_dir.
+
+    Each entry records the file's size, mtime and content hash plus the name
+    of a run file holding its parsed rows, sorted and stored as pickled
+    batches so they can be loaded at once or streamed. The whole manifest is
+    discarded when pipeline_fingerprint (the parser/normalizer version) changes,
+    except for the file ids (see file_id), which stay stable across rebuilds.
+    """
+
+    def __init__(self, cache_dir, pipeline_fingerprint):
+        self.cache_dir = Path(cache_dir)
+        self.rows_dir = self.cache_dir / 'rows'
+        self.manifest_file = self.cache_dir / MANIFEST_NAME
+        self.pipeline_fingerprint = pipeline_fingerprint
+        self.entries = {}
+        self.output = {}
+        self.file_ids = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        """Load the manifest from disk, ignoring it if the pipeline changed."""
+        if not self.manifest_file.exists():
+            return
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading ingestion manifest: {e}")
+            return
+
+        self.file_ids = data.get('file_ids', {})
+        if (data.get('version') != MANIFEST_VERSION or
+                data.get('pipeline') != self.pipeline_fingerprint):
+            self._dirty = True
+            return
+        self.entries = data.get('files', {})
+        self.output = data.get('output', {})
+
+    @staticmethod
+    def _key(filepath):
+        return input_key(filepath)
+
+    def fingerprint(self, filepath, entry=None):
+        """
+        Return the current fingerprint of filepath.
+
+        The content hash is only computed when size or mtime differ from the
+        cached entry, so unchanged files cost a single stat() call. Archive
+        members are fingerprinted from the archive's metadata instead.
+        """
+        if isinstance(filepath, ArchiveMember):
+            return filepath.fingerprint()
+        stat = os.stat(filepath)
+        fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        if entry and entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+            fingerprint['sha256'] = entry.get('sha256')
+        else:
+            fingerprint['sha256'] = hash_file(filepath)
+        return fingerprint
+
+    def check(self, filepath):
+        """
+        Return (entry, None) for an unchanged file whose rows are cached, or
+        (None, fingerprint) when the file is new or changed and must be parsed.
+        """
+        key = self._key(filepath)
+        entry = self.entries.get(key)
+        fingerprint = self.fingerprint(filepath, entry)
+        if (entry is None or entry.get('sha256') != fingerprint.get('sha256') or
+                entry.get('digest') != fingerprint.get('digest') or
+                not (self.rows_dir / entry['rows_file']).exists()):
+            return None, fingerprint
+
+        if entry.get('mtime_ns') != fingerprint.get('mtime_ns'):
+            # Touched but not modified - remember the new mtime
+            entry['mtime_ns'] = fingerprint['mtime_ns']
+            self._dirty = True
+        return entry, None
+
+    def file_id(self, filepath):
+        """
+        Lineage id of an input file: a small integer assigned the first time
+        the file is seen and never reused, so rows keep their id across
+        incremental and full rebuilds.
+        """
+        key = self._key(filepath)
+        file_id = self.file_ids.get(key)
+        if file_id is None:
+            file_id = self.file_ids[key] = max(self.file_ids.values(), default=0) + 1
+            self._dirty = True
+        return file_id
+
+    def rows_path(self, filepath):
+        """Path of the run file holding the parsed rows of filepath."""
+        key = self._key(filepath)
+        self.rows_dir.mkdir(parents=True, exist_ok=True)
+        return self.rows_dir / (hashlib.sha1(key.encode('utf-8')).hexdigest() + '.pkl')
+
+    def iter_rows(self, entry):
+        """Stream the cached rows of an entry."""
+        return read_run(self.rows_dir / entry['rows_file'])
+
+    def load_rows(self, entry):
+        """Load all cached rows of an entry into a list."""
+        return list(self.iter_rows(entry))
+
+    def store(self, filepath, fingerprint, rows, **info):
+        """Cache the parsed (already sorted) rows of filepath along with its fingerprint."""
+        row_count, columns = write_run(self.rows_path(filepath), rows)
+        return self.record(filepath, fingerprint, row_count, columns, **info)
+
+    def store_frame(self, filepath, fingerprint, frame, **info):
+        """Cache the parsed (already sorted) DataFrame of filepath along with its fingerprint."""
+        rows_path = self.rows_path(filepath)
+        tmp_path = rows_path.with_name(rows_path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(frame, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, rows_path)
+        return self.record(filepath, fingerprint, len(frame), frame.columns, **info)
+
+    def load_frame(self, entry):
+        """Load the cached DataFrame of an entry written by store_frame."""
+        with open(self.rows_dir / entry['rows_file'], 'rb') as f:
+            return pickle.load(f)
+
+    def record(self, filepath, fingerprint, row_count, columns, **info):
+        """Register a run file already written to rows_path(filepath)."""
+        entry = dict(fingerprint)
+        entry['rows_file'] = self.rows_path(filepath).name
+        entry['row_count'] = row_count
+        entry['columns'] = sorted(columns)
+        entry.update(info)
+        self.entries[self._key(filepath)] = entry
+        self._dirty = True
+        return entry
+
+    def prune(self, live_files):
+        """Drop entries for files that are no longer ingested. Returns their paths."""
+        live_keys = {self._key(f) for f in live_files}
+        removed = [key for key in self.entries if key not in live_keys]
+        for key in removed:
+            entry = self.entries.pop(key)
+            try:
+                (self.rows_dir / entry['rows_file']).unlink()
+            except OSError:
+                pass
+        if removed:
+            self._dirty = True
+        return removed
+
+    def output_is_current(self, output_path):
+        """True if output_path is exactly the file this manifest last wrote."""
+        output_path = Path(output_path)
+        if not output_path.exists() or not self.output:
+            return False
+        stat = output_path.stat()
+        return (self.output.get('path') == self._key(output_path) and
+                self.output.get('size') == stat.st_size and
+                self.output.get('mtime_ns') == stat.st_mtime_ns)
+
+    def record_output(self, output_path, **info):
+        """Remember the output file written from the current entries (plus any info about it)."""
+        stat = Path(output_path).stat()
+        self.output = {
+            'path': self._key(output_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+        self.output.update(info)
+        self._dirty = True
+
+    def save(self):
+        """Write the manifest to disk if it changed."""
+        if not self._dirty:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.manifest_file.with_name(MANIFEST_NAME + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': MANIFEST_VERSION,
+                'pipeline': self.pipeline_fingerprint,
+                'files': self.entries,
+                'output': self.output,
+                'file_ids': self.file_ids,
+            }, f, indent=2)
+        os.replace(tmp_file, self.manifest_file)
+        self._dirty = False
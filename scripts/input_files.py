@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Input File Helpers
+Finds the input CSVs (plain files, .csv.gz files and CSVs inside .zip
+archives, including nested ones) and opens them (whole or by byte range)
+for the row-wise and columnar loaders. Archive members are decompressed as
+streams; nothing is extracted to disk.
+"""
+
+import csv
+import gzip
+import io
+import os
+import struct
+import zipfile
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+# Plain CSVs and the archives searched for CSVs, as glob patterns
+CSV_PATTERNS = ('*.csv', '*.CSV')
+ARCHIVE_PATTERNS = ('*.zip', '*.ZIP', '*.csv.gz', '*.CSV.GZ')
+
+
+def _is_csv(name):
+    return name.lower().endswith('.csv')
+
+
+def _is_gzipped_csv(name):
+    return name.lower().endswith('.csv.gz')
+
+
+def _is_zip(name):
+    return name.lower().endswith('.zip')
+
+
+class ArchiveMember:
+    """
+    A CSV read from an archive: a .csv.gz file (members is empty), or a .csv
+    or .csv.gz member of a .zip, reached through members (the chain of
+    member names, outermost first, when .zip files are nested).
+
+    digest identifies the member's content from the archive metadata alone
+    (CRC-32 and size from the zip directory or the gzip trailer), so an
+    unchanged member is recognized without decompressing it.
+    """
+
+    def __init__(self, archive, members=(), digest=None):
+        self.archive = Path(archive)
+        self.members = tuple(members)
+        self.digest = digest
+
+    def __repr__(self):
+        return f"ArchiveMember({self.label!r})"
+
+    @property
+    def name(self):
+        """File name of the CSV itself (without a .gz suffix)."""
+        name = (self.members[-1] if self.members else self.archive.name).rsplit('/', 1)[-1]
+        return name[:-3] if _is_gzipped_csv(name) else name
+
+    @property
+    def label(self):
+        """Archive-relative path used in reports, e.g. statements_2023.zip/chase_q1.csv."""
+        return '/'.join((self.archive.name,) + self.members)
+
+    @property
+    def key(self):
+        """Unique identity of the member, used as its manifest key."""
+        return '!'.join((str(self.archive.resolve()),) + self.members)
+
+    def fingerprint(self):
+        """Fingerprint of the member's content, taken from the archive metadata."""
+        return {'digest': self.digest or _gzip_digest(self.archive)}
+
+    @contextmanager
+    def open_binary(self):
+        """Binary stream of the decompressed CSV."""
+        with ExitStack() as stack:
+            stream = stack.enter_context(open(self.archive, 'rb'))
+            for depth, member in enumerate(self.members):
+                archive = stack.enter_context(zipfile.ZipFile(stream))
+                stream = stack.enter_context(archive.open(member))
+                if depth < len(self.members) - 1:
+                    # zipfile needs to seek, so a nested archive is buffered in memory
+                    stream = io.BytesIO(stream.read())
+            last = self.members[-1] if self.members else self.archive.name
+            if _is_gzipped_csv(last):
+                stream = stack.enter_context(gzip.GzipFile(fileobj=stream))
+            yield stream
+
+    @contextmanager
+    def open_text(self):
+        """Text stream of the decompressed CSV."""
+        with self.open_binary() as stream:
+            yield io.TextIOWrapper(stream, encoding='utf-8', newline='')
+
+
+def _gzip_digest(path):
+    """CRC-32 and size of a gzip file's content, read from its 8-byte trailer."""
+    with open(path, 'rb') as f:
+        f.seek(-8, os.SEEK_END)
+        crc, size = struct.unpack('<II', f.read(8))
+    return f'crc32:{crc:08x}:{size}'
+
+
+def _zip_members(stream, archive_path, prefix=()):
+    """Yield the CSV members of the zip archive in stream, descending into nested zips."""
+    with zipfile.ZipFile(stream) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            base = name.rsplit('/', 1)[-1]
+            # Skip directories and macOS resource forks (__MACOSX/, ._name)
+            if info.is_dir() or name.startswith('__MACOSX/') or base.startswith('.'):
+                continue
+            if _is_csv(name) or _is_gzipped_csv(name):
+                yield ArchiveMember(archive_path, prefix + (name,), f'crc32:{info.CRC:08x}:{info.file_size}')
+            elif _is_zip(name):
+                with archive.open(info) as inner:
+                    nested = io.BytesIO(inner.read())
+                yield from _zip_members(nested, archive_path, prefix + (name,))
+
+
+def list_input_files(data_path):
+    """
+    The input CSVs of data_path: plain .csv files (as Paths), then the CSVs
+    found in its .csv.gz and .zip archives (as ArchiveMembers). Unreadable
+    archives are reported and skipped.
+    """
+    data_path = Path(data_path)
+    inputs = [path for pattern in CSV_PATTERNS for path in data_path.glob(pattern)]
+    archives = sorted({path for pattern in ARCHIVE_PATTERNS for path in data_path.glob(pattern)})
+    for archive in archives:
+        try:
+            if _is_zip(archive.name):
+                with open(archive, 'rb') as f:
+                    inputs.extend(_zip_members(f, archive))
+            else:
+                inputs.append(ArchiveMember(archive, digest=_gzip_digest(archive)))
+        except (OSError, zipfile.BadZipFile, struct.error) as e:
+            print(f"  ⚠ Skipping {archive.name}: cannot read archive ({e})")
+    return inputs
+
+
+def is_archive_member(source):
+    return isinstance(source, ArchiveMember)
+
+
+def input_key(source):
+    """Unique identity of an input (file path or archive member)."""
+    if isinstance(source, ArchiveMember):
+        return source.key
+    return str(Path(source).resolve())
+
+
+def input_label(source):
+    """Name of an input in reports: the file name, or the path inside its archive."""
+    if isinstance(source, ArchiveMember):
+        return source.label
+    return Path(source).name
+
+
+def read_byte_range(filepath, byte_range):
+    """Return the header line of filepath followed by the data rows in byte_range=(start, end)."""
+    start, end = byte_range
+    with open(filepath, 'rb') as f:
+        header = f.readline()
+        f.seek(start)
+        data = f.read(end - start)
+    return header + data
+
+
+def _check_whole(member, byte_range):
+    if byte_range is not None:
+        raise ValueError(f"Archive member {member.label} cannot be read by byte range")
+
+
+def open_input(filepath, byte_range=None):
+    """
+    Open an input CSV for reading, without newline translation (as the csv
+    module expects, so quoted line breaks are kept as written, as the
+    columnar readers keep them). With byte_range=(start, end), only the data
+    rows in that byte range are returned, preceded by the file's header line.
+    Archive members are always read whole.
+    """
+    if isinstance(filepath, ArchiveMember):
+        _check_whole(filepath, byte_range)
+        return filepath.open_text()
+    if byte_range is None:
+        return open(filepath, 'r', encoding='utf-8', newline='')
+    return io.StringIO(read_byte_range(filepath, byte_range).decode('utf-8'), newline='')
+
+
+def open_input_binary(filepath, byte_range=None):
+    """Binary counterpart of open_input, for readers that decode the bytes themselves."""
+    if isinstance(filepath, ArchiveMember):
+        _check_whole(filepath, byte_range)
+        return filepath.open_binary()
+    if byte_range is None:
+        return open(filepath, 'rb')
+    return io.BytesIO(read_byte_range(filepath, byte_range))
+
+
+def split_byte_ranges(filepath, chunk_bytes):
+    """
+    Split the data rows of a CSV file into (start, end) byte ranges of roughly
+    chunk_bytes each, aligned to line boundaries. Assumes no quoted field spans
+    multiple lines, which holds for card statement exports.
+    """
+    ranges = []
+    with open(filepath, 'rb') as f:
+        f.readline()  # Skip header
+        start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()  # Advance to the end of the current line
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def read_header(filepath):
+    """Column names from the first line of a CSV file (nothing else is read)."""
+    with open_input_binary(filepath) as f:
+        first_line = f.readline()
+    text = first_line.decode('utf-8-sig').rstrip('\r\n')
+    return [column.strip() for column in next(csv.reader([text]), [])]
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Input Directory Watcher
+Polls the input directory for added, changed or removed CSV files (and
+.zip / .csv.gz archives) so --watch can rebuild the consolidated file as
+soon as new statements are dropped in. Bursts of writes (a file still being copied, several exports
+saved at once) are debounced: a change is only reported once the directory
+has been quiet for the debounce interval.
+"""
+
+import time
+from pathlib import Path
+
+from input_files import ARCHIVE_PATTERNS, CSV_PATTERNS
+
+# Input files looked at (the same files concatenate_transactions reads)
+INPUT_PATTERNS = CSV_PATTERNS + ARCHIVE_PATTERNS
+
+
+def snapshot(data_path):
+    """Map the name of each input file in data_path to its (size, mtime_ns)."""
+    files = {}
+    for pattern in INPUT_PATTERNS:
+        for path in Path(data_path).glob(pattern):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # Removed between glob and stat
+                continue
+            files[path.name] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def diff_snapshots(old, new):
+    """Return the (added, changed, removed) file names between two snapshots."""
+    added = sorted(name for name in new if name not in old)
+    changed = sorted(name for name in new if name in old and new[name] != old[name])
+    removed = sorted(name for name in old if name not in new)
+    return added, changed, removed
+
+
+class InputWatcher:
+    """
+    Polls data_path every interval seconds. changes() yields
+    (added, changed, removed) once per settled burst of changes, compared
+    with the directory as it was at the previous report (or at creation).
+    """
+
+    def __init__(self, data_path, interval=2.0, debounce=2.0):
+        self.data_path = Path(data_path)
+        self.interval = interval
+        self.debounce = debounce
+        self.state = snapshot(self.data_path)
+
+    def _settle(self, current):
+        """Poll until the directory has not changed for the debounce interval."""
+        quiet_since = time.monotonic()
+        while time.monotonic() - quiet_since < self.debounce:
+            time.sleep(min(self.interval, self.debounce))
+            latest = snapshot(self.data_path)
+            if latest != current:
+                current = latest
+                quiet_since = time.monotonic()
+        return current
+
+    def changes(self):
+        """Yield (added, changed, removed) each time the directory settles after a change."""
+        while True:
+            time.sleep(self.interval)
+            current = snapshot(self.data_path)
+            if current == self.state:
+                continue
+            current = self._settle(current)
+            added, changed, removed = diff_snapshots(self.state, current)
+            self.state = current
+            if added or changed or removed:
+                yield added, changed, removed
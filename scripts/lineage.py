@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Row Lineage
+Every consolidated row carries the id of the input file it came from and its
+line number in that file (File ID and Line columns). lineage.json, written
+next to the consolidated file, is the file dictionary (id -> file, source,
+format) plus a reverse index from each file id to the ranges of output rows
+it contributed, so the rows of one input file are found without scanning
+the whole output.
+"""
+
+import csv
+import io
+import json
+import os
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # The reverse index is built row by row without numpy
+    np = None
+
+# Lineage columns, appended after every other column of the output
+FILE_ID_COLUMN = 'File ID'
+LINE_COLUMN = 'Line'
+LINEAGE_COLUMNS = (FILE_ID_COLUMN, LINE_COLUMN)
+
+LINEAGE_NAME = 'lineage.json'
+
+# Bump when the lineage file layout changes
+LINEAGE_VERSION = 1
+
+
+def lineage_path(output_path):
+    """Path of the lineage file for a consolidated output file."""
+    return Path(output_path).parent / LINEAGE_NAME
+
+
+def _reader_lines(data, count):
+    """record_lines read with the csv module, for files the quote count cannot split."""
+    reader = csv.reader(io.StringIO(data.decode('utf-8-sig'), newline=''))
+    next(reader, None)
+    lines = [reader.line_num for values in reader if values]
+    if len(lines) < count:
+        return np.arange(2, count + 2)
+    return np.array(lines[:count])
+
+
+def record_lines(data, count):
+    """
+    Line numbers (the header is line 1) of the count records of CSV bytes,
+    as the rows engine's csv reader reports them (its line_num): the line a
+    record ends on, so a quoted field spanning lines shifts the records
+    after it. Blank lines are not records. Line breaks inside quotes (after
+    an odd number of quote characters) do not end a record; if the quotes
+    are unbalanced, or the records found are not the count the parser read,
+    the csv module numbers them instead.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    if not len(buffer):
+        return np.arange(2, count + 2)
+    newline = buffer == ord('\n')
+    carriage = buffer == ord('\r')
+    # Line breaks as the csv reader counts them: \n, \r\n (at its \n) or a lone \r
+    breaks = newline.copy()
+    breaks[:-1] |= carriage[:-1] & ~newline[1:]
+    breaks[-1] |= carriage[-1]
+    break_positions = np.flatnonzero(breaks)
+    quotes = np.flatnonzero(buffer == ord('"'))
+    if len(quotes) % 2:
+        return _reader_lines(data, count)
+
+    # Records end at the breaks outside quotes; each is numbered by its break
+    outside = np.searchsorted(quotes, break_positions) % 2 == 0
+    ends = break_positions[outside]
+    end_lines = np.flatnonzero(outside) + 1
+    starts = np.concatenate(([0], ends + 1))
+    stops = np.concatenate((ends, [len(buffer)]))
+    end_lines = np.concatenate((end_lines, [len(break_positions) + 1]))
+    lengths = stops - starts
+    blank = lengths == 0
+    carriage_only = lengths == 1
+    blank[carriage_only] = carriage[starts[carriage_only]]
+    lines = end_lines[~blank][1:]
+    if len(lines) != count:
+        return _reader_lines(data, count)
+    return lines
+
+
+def row_ranges(file_ids):
+    """
+    Reverse index of a column of file ids, in output row order:
+    {file id: [[start, end), ...]} runs of consecutive row positions.
+    """
+    ranges = {}
+    if np is not None and isinstance(file_ids, np.ndarray):
+        if not len(file_ids):
+            return ranges
+        # Split at every change of file id, then group the runs by id
+        breaks = np.flatnonzero(file_ids[1:] != file_ids[:-1]) + 1
+        starts = np.concatenate(([0], breaks))
+        ends = np.concatenate((breaks, [len(file_ids)]))
+        for file_id, start, end in zip(file_ids[starts].tolist(), starts.tolist(), ends.tolist()):
+            ranges.setdefault(file_id, []).append([start, end])
+        return ranges
+
+    for position, file_id in enumerate(file_ids):
+        runs = ranges.setdefault(file_id, [])
+        if runs and runs[-1][1] == position:
+            runs[-1][1] = position + 1
+        else:
+            runs.append([position, position + 1])
+    return ranges
+
+
+def write_lineage(path, files, file_ids, output_info=None):
+    """
+    Write the lineage file: files maps each file id to its description
+    (file label, key, source, format), file_ids is the File ID column of
+    the output in row order. output_info (the ingestion manifest's output
+    record) ties the index to the output file it describes.
+    """
+    ranges = row_ranges(file_ids)
+    lineage = {
+        'version': LINEAGE_VERSION,
+        'output': output_info,
+        'files': {
+            str(file_id): {**info, 'rows': sum(end - start for start, end in ranges.get(file_id, [])),
+                           'row_ranges': ranges.get(file_id, [])}
+            for file_id, info in sorted(files.items())
+        },
+    }
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(lineage, f)
+    os.replace(tmp_path, path)
+    return lineage
+
+
+def load_lineage(path):
+    """The lineage file at path, or None if there is none (or it is outdated)."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lineage = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error loading lineage file: {e}")
+        return None
+    if lineage.get('version') != LINEAGE_VERSION:
+        return None
+    return lineage
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Merchant Normalization Engine
+Compiles the merchant rule table once into a single matcher and normalizes
+raw merchant strings (e.g. "AMAZON.COM*AB4K9L23" -> "Amazon").
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+
+# Merchant mappings (pattern -> normalized name), evaluated against the
+# uppercased merchant string. Order matters: the first rule that matches wins.
+MERCHANT_PATTERNS = [
+    (r'AMAZON|AMZN', 'Amazon'),
+    (r'TRADER\s*JOE', 'Trader Joe\'s'),
+    (r'SAFEWAY', 'Safeway'),
+    (r'TARGET', 'Target'),
+    (r'WALMART|WM\s*SUPERCENTER', 'Walmart'),
+    (r'UBER', 'Uber'),
+    (r'LYFT', 'Lyft'),
+    (r'STARBUCKS', 'Starbucks'),
+    (r'MCDONALD', 'McDonald\'s'),
+    (r'WHOLE\s*FOODS|WHOLEFDS', 'Whole Foods'),
+    (r'H\s*MART|HMART', 'H Mart'),
+    (r'BILTPROTECT\s*RENT|BPS\*BILT\s*RENT', 'Bilt Rent Payment'),
+    (r'LEMONADE\s*INSURANCE', 'Lemonade Insurance'),
+    (r'SOUTHWEST|SOUTHWES', 'Southwest Airlines'),
+    (r'DELTA\s*AIR', 'Delta Airlines'),
+    (r'ALASKA\s*AIR', 'Alaska Airlines'),
+    (r'AIRASIA', 'AirAsia'),
+    (r'CATHAYPACAIR', 'Cathay Pacific'),
+    (r'UNIQLO', 'Uniqlo'),
+    (r'PAYMENT\s*THANK\s*YOU|ONLINE\s*ACH\s*PAYMENT|ACH\s*DEPOSIT', 'Payment/Transfer'),
+    (r'TST\*.*IVARS|IVARS', 'Ivar\'s'),
+    (r'TST\*.*SIZZLE.*CRUNCH|SIZZLE.*CRUNCH', 'Sizzle & Crunch'),
+    (r'TST\*.*DONT\s*YELL|DONT\s*YELL', 'Don\'t Yell At Me'),
+    (r'LEE.*S\s*KITCHEN', 'Lee\'s Kitchen'),
+    (r'FOB\s*SUSHI|FOB\s*POKE', 'FOB'),
+    (r'CHASE|Payment Thank You', 'Payment/Transfer'),
+    (r'7-ELEVEN|7\s*ELEVEN|FAMILYMART|FAMILY\s*MART', '7-Eleven/FamilyMart'),
+    (r'KFC', 'KFC'),
+    (r'BURGER\s*KING', 'Burger King'),
+    (r'CHICK-FIL-A|CHICKFILA', 'Chick-fil-A'),
+    (r'ALADDIN', 'Aladdin'),
+    (r'TASTE\s*OF\s*XI.*AN', 'Taste of Xi\'an'),
+    (r'TAIWAN\s*PORRIDGE', 'Taiwan Porridge'),
+    (r'CHA\s*YAN', 'Cha Yan'),
+    (r'SL\.NORD|NORD.*VPN', 'NordVPN'),
+    (r'NOW\s*WIFI', 'NOW WiFi'),
+    (r'APPLE\s*ONLINE|AOS', 'Apple'),
+]
+
+# Cleanup applied when no rule matches
+PREFIX_RE = re.compile(r'^(TST\*|SQ\s*\*|BB\*|UEP\*|SP\s+)', re.IGNORECASE)
+TRAILING_NUMBERS_RE = re.compile(r'\s+\d+.*$')  # Remove everything after numbers
+STATE_USA_RE = re.compile(r'\s+[A-Z]{2}\s+USA$')  # Remove state + USA
+ZIP_RE = re.compile(r'\s+\d{5}(-\d{4})?\s*$')  # Remove ZIP codes
+
+MAX_MERCHANT_LENGTH = 50
+
+# Bump when the cleanup logic changes so cached results are discarded
+NORMALIZER_VERSION = 1
+
+# Default bound on the number of raw merchant strings kept in the on-disk cache
+DEFAULT_CACHE_SIZE = 50000
+
+
+def _is_missing(value):
+    """Simple check for None, empty string, or 'nan'."""
+    return value is None or value == '' or str(value).lower() == 'nan'
+
+
+class MerchantNormalizer:
+    """
+    Normalizes merchant names with a rule table compiled into one regex.
+
+    Each rule becomes a lookahead alternative anchored at the start of the
+    string, tagged with a named group. The regex engine tries alternatives in
+    rule order, so a single match call keeps first-match-wins semantics while
+    avoiding one Python-level re.search per rule.
+    """
+
+    def __init__(self, patterns=None, cache=None):
+        if patterns is None:
+            patterns = MERCHANT_PATTERNS
+        self.cache = cache
+        self.patterns = list(patterns)
+        self.names = [name for _, name in self.patterns]
+        alternatives = [
+            f'(?=.*?(?:{pattern}))(?P<r{i}>)'
+            for i, (pattern, _) in enumerate(self.patterns)
+        ]
+        self._matcher = re.compile('|'.join(alternatives), re.DOTALL)
+        self._group_rule = {f'r{i}': i for i in range(len(self.patterns))}
+        self.fingerprint = self._compute_fingerprint()
+
+    def _compute_fingerprint(self):
+        """Hash of the rule table, used to invalidate anything derived from it."""
+        parts = [f"{pattern}\x1f{name}" for pattern, name in self.patterns]
+        parts.append(f"version={NORMALIZER_VERSION}|max_length={MAX_MERCHANT_LENGTH}")
+        return hashlib.sha1('\x1e'.join(parts).encode('utf-8')).hexdigest()
+
+    def match_rule(self, merchant):
+        """Return the index of the first rule matching merchant, or None."""
+        match = self._matcher.match(merchant.upper().strip())
+        if match is None:
+            return None
+        return self._group_rule[match.lastgroup]
+
+    def normalize(self, merchant):
+        """
+        Normalize a single merchant name by consolidating common variations.
+        For example, all Amazon variations become "Amazon".
+        """
+        if not merchant or _is_missing(merchant):
+            return "Unknown"
+
+        rule = self.match_rule(merchant)
+        if rule is not None:
+            return self.names[rule]
+
+        # If no pattern matches, clean up the merchant name
+        merchant_clean = PREFIX_RE.sub('', merchant)
+        merchant_clean = TRAILING_NUMBERS_RE.sub('', merchant_clean)
+        merchant_clean = STATE_USA_RE.sub('', merchant_clean)
+        merchant_clean = ZIP_RE.sub('', merchant_clean)
+
+        # Limit length
+        merchant_clean = merchant_clean.strip()
+        if len(merchant_clean) > MAX_MERCHANT_LENGTH:
+            merchant_clean = merchant_clean[:MAX_MERCHANT_LENGTH]
+
+        return merchant_clean if merchant_clean else merchant[:MAX_MERCHANT_LENGTH]
+
+    def normalize_many(self, merchants):
+        """
+        Normalize an iterable of merchant names, returning a list in the same order.
+        Each distinct raw string is normalized only once per call, and the
+        attached MerchantCache (if any) is consulted before running the rules.
+        """
+        cache = self.cache
+        seen = {}
+        results = []
+        for merchant in merchants:
+            try:
+                normalized = seen[merchant]
+            except KeyError:
+                normalized = None
+                if cache is not None and isinstance(merchant, str):
+                    normalized = cache.get(merchant)
+                if normalized is None:
+                    normalized = self.normalize(merchant)
+                    if cache is not None and isinstance(merchant, str):
+                        cache.put(merchant, normalized)
+                seen[merchant] = normalized
+            except TypeError:
+                # Unhashable input - normalize without memoizing
+                normalized = self.normalize(merchant)
+            results.append(normalized)
+        return results
+
+
+class MerchantCache:
+    """
+    Persistent raw merchant -> normalized name cache with LRU eviction.
+
+    The cache file records the fingerprint of the rule table it was built
+    with; loading it against a different fingerprint starts from empty.
+    A cache without a cache_file lives in memory only (e.g. in a worker
+    process) and collects its new entries in `updates`, along with the
+    entries it hit, so merging them refreshes their recency in the parent.
+    """
+
+    def __init__(self, cache_file, fingerprint, max_entries=DEFAULT_CACHE_SIZE):
+        self.cache_file = Path(cache_file) if cache_file is not None else None
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidated = False
+        self.updates = {}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, cache_file, fingerprint, max_entries=DEFAULT_CACHE_SIZE):
+        """Load the cache from disk, discarding it if the rule set changed."""
+        cache = cls(cache_file, fingerprint, max_entries)
+        if cache.cache_file is None or not cache.cache_file.exists():
+            return cache
+        try:
+            with open(cache.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading merchant cache: {e}")
+            return cache
+
+        if data.get('fingerprint') != fingerprint:
+            # Rules changed since the cache was written
+            cache.invalidated = True
+            cache._dirty = True
+            return cache
+
+        # Entries are stored least recently used first
+        for raw, normalized in data.get('entries', [])[-max_entries:]:
+            cache.entries[raw] = normalized
+        return cache
+
+    def get(self, raw):
+        """Return the cached normalized name for raw, or None."""
+        normalized = self.entries.get(raw)
+        if normalized is None:
+            self.misses += 1
+            return None
+        if next(reversed(self.entries)) != raw:
+            # The LRU order changed: save it, or the next eviction drops
+            # entries this run used
+            self.entries.move_to_end(raw)
+            self._dirty = True
+        if self.cache_file is None:
+            self.updates[raw] = normalized
+        self.hits += 1
+        return normalized
+
+    def put(self, raw, normalized):
+        """Store a normalized name, evicting the least recently used entries."""
+        self.entries[raw] = normalized
+        self.entries.move_to_end(raw)
+        self.updates[raw] = normalized
+        self._dirty = True
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def take_updates(self):
+        """Return and reset the entries added (or, in memory, hit) since the last call."""
+        updates, self.updates = self.updates, {}
+        return updates
+
+    def merge(self, updates, hits=0, misses=0):
+        """Fold in entries and counters gathered by another (worker) cache."""
+        for raw, normalized in updates.items():
+            self.put(raw, normalized)
+        self.hits += hits
+        self.misses += misses
+
+    def save(self):
+        """Write the cache to disk if it changed."""
+        if not self._dirty or self.cache_file is None:
+            return
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.cache_file.with_name(self.cache_file.name + '.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'fingerprint': self.fingerprint,
+                'entries': list(self.entries.items()),
+            }, f)
+        os.replace(tmp_file, self.cache_file)
+        self._dirty = False
+
+    def summary(self):
+        """Human-readable hit/miss line for the end-of-run report."""
+        lookups = self.hits + self.misses
+        hit_rate = (self.hits / lookups * 100) if lookups else 0.0
+        line = (f"Merchant cache: {self.hits} hit(s), {self.misses} miss(es) "
+                f"({hit_rate:.1f}% hit rate), {len(self.entries)} entries")
+        if self.evictions:
+            line += f", {self.evictions} evicted"
+        if self.invalidated:
+            line += " (rebuilt: normalization rules changed)"
+        return line
+
+
+# Shared default engine, compiled once at import time
+DEFAULT_NORMALIZER = MerchantNormalizer()
+
+
+def normalize_merchant(merchant):
+    """Normalize a single merchant name with the default rule table."""
+    return DEFAULT_NORMALIZER.normalize(merchant)
+
+
+def normalize_many(merchants):
+    """Normalize an iterable of merchant names with the default rule table."""
+    return DEFAULT_NORMALIZER.normalize_many(merchants)
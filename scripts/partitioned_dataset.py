@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Partitioned Transaction Dataset
+Writes the consolidated transactions as one file per month
+(transactions/year=YYYY/month=MM/part.parquet, or part.csv without pyarrow)
+plus a small partition manifest with each partition's row count, date range
+and content digest. Rebuilds only rewrite the partitions whose rows changed,
+and readers (the dashboard) only open the partitions overlapping the date
+range they show.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import columnar_loaders
+from amount_parsing import format_amount
+from date_parsing import CANONICAL_DATE_FORMAT, parse_date
+
+pd = columnar_loaders.pd
+pa = columnar_loaders.pa
+pa_parquet = columnar_loaders.pa_parquet
+
+# Directory of the dataset, next to the consolidated CSV
+DATASET_DIR_NAME = 'transactions'
+PARTITION_MANIFEST_NAME = '_partitions.json'
+
+# Bump when the partition layout changes so every partition is rewritten
+PARTITION_VERSION = 1
+
+# Partition of rows whose Transaction Date cannot be parsed
+UNKNOWN_PARTITION = 'unknown'
+
+
+def dataset_path(output_path):
+    """Directory of the partitioned dataset for a consolidated output file."""
+    return Path(output_path).parent / DATASET_DIR_NAME
+
+
+def partition_key(transaction_date):
+    """'YYYY-MM' of a canonical (MM/DD/YYYY) date string, or UNKNOWN_PARTITION."""
+    parsed = parse_date(transaction_date)
+    if parsed is None:
+        return UNKNOWN_PARTITION
+    return parsed.strftime('%Y-%m')
+
+
+def partition_dir(key):
+    """Relative directory of a partition (year=YYYY/month=MM)."""
+    if key == UNKNOWN_PARTITION:
+        return f"year={UNKNOWN_PARTITION}/month={UNKNOWN_PARTITION}"
+    year, month = key.split('-')
+    return f"year={year}/month={month}"
+
+
+def load_partition_manifest(dataset_dir):
+    """The partition manifest of dataset_dir, or None if there is no (readable) dataset."""
+    manifest_file = Path(dataset_dir) / PARTITION_MANIFEST_NAME
+    if not manifest_file.exists():
+        return None
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error loading partition manifest: {e}")
+        return None
+    if manifest.get('version') != PARTITION_VERSION:
+        return None
+    return manifest
+
+
+def _iter_groups(rows, columns):
+    """
+    Yield (partition key, rows) for consolidated rows, which arrive sorted by
+    date (unparseable dates last) so each month is one contiguous run.
+    DataFrames are split with a vectorized key; row dicts are grouped as they stream.
+    """
+    if pd is not None and isinstance(rows, pd.DataFrame):
+        dates = rows['Transaction Date']
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates.fillna('').astype(str), format=CANONICAL_DATE_FORMAT,
+                                   errors='coerce', cache=True)
+        months = (dates.dt.year * 100 + dates.dt.month).fillna(-1).astype(int)
+        for month, group in rows.groupby(months.to_numpy(), sort=False):
+            yield (f"{month // 100:04d}-{month % 100:02d}" if month >= 0 else UNKNOWN_PARTITION), group
+        return
+
+    key, group = None, []
+    for row in rows:
+        row_key = partition_key(row.get('Transaction Date', ''))
+        if row_key != key and group:
+            yield key, group
+            group = []
+        key = row_key
+        group.append(row)
+    if group:
+        yield key, group
+
+
+def _date_range(dates):
+    """(min, max) ISO dates of a partition's parsed Transaction Dates, or (None, None)."""
+    dates = [d for d in dates if d is not None]
+    if not dates:
+        return None, None
+    return min(dates).isoformat(), max(dates).isoformat()
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, CANONICAL_DATE_FORMAT).date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _encode_parquet(group, columns):
+    """
+    Content digest, date range and row count of a partition, plus a function
+    returning its typed Parquet bytes (only called when the partition changed).
+    """
+    if not isinstance(group, pd.DataFrame):
+        group = pd.DataFrame.from_records(group, columns=columns)
+    if pd.api.types.is_datetime64_any_dtype(group['Transaction Date']):
+        # Slice of a frame typed as a whole: drop the other months' categories
+        typed = group.apply(lambda column: column.cat.remove_unused_categories()
+                            if isinstance(column.dtype, pd.CategoricalDtype) else column)
+    else:
+        typed = columnar_loaders.to_typed_frame(group, columns)
+    # Hash the typed values, so both engines produce the same digest
+    digest = hashlib.sha1(pd.util.hash_pandas_object(typed, index=False).to_numpy().tobytes())
+    digest.update('\x1f'.join(columns).encode('utf-8'))
+    dates = typed['Transaction Date'].dropna()
+    date_range = (dates.min().date().isoformat(), dates.max().date().isoformat()) if len(dates) else (None, None)
+
+    def serialize():
+        table = pa.Table.from_pandas(typed, schema=columnar_loaders.typed_schema(columns), preserve_index=False)
+        buffer = pa.BufferOutputStream()
+        pa_parquet.write_table(table, buffer)
+        return buffer.getvalue().to_pybytes()
+
+    return digest.hexdigest(), date_range, len(typed), serialize
+
+
+def _encode_csv(group, columns):
+    """Digest, date range and row count of a partition written as CSV, plus a function returning the CSV bytes."""
+    if pd is not None and isinstance(group, pd.DataFrame):
+        group = group.copy()
+        for column in columnar_loaders.FLOAT_COLUMNS:
+            if column in group.columns:
+                group[column] = group[column].map(format_amount)
+        frame_columns = list(group.columns)
+        group = (dict(zip(frame_columns, values)) for values in group.itertuples(index=False, name=None))
+    text = io.StringIO(newline='')
+    writer = csv.DictWriter(text, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    count = 0
+    dates = []
+    for row in group:
+        writer.writerow(row)
+        dates.append(_parse_date(row.get('Transaction Date')))
+        count += 1
+    data = text.getvalue().encode('utf-8')
+    return hashlib.sha1(data).hexdigest(), _date_range(dates), count, lambda: data
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _remove_partition(dataset_dir, relative_path):
+    """Delete a partition file and the year/month directories it leaves empty."""
+    path = dataset_dir / relative_path
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    for directory in (path.parent, path.parent.parent):
+        try:
+            directory.rmdir()
+        except OSError:  # Not empty (or already gone)
+            break
+
+
+def write_partitions(dataset_dir, columns, rows, output_info=None):
+    """
+    Write consolidated rows (a DataFrame or row dicts sorted by date) as a
+    monthly partitioned dataset under dataset_dir. A partition is only
+    rewritten when its content digest changed; partitions with no rows left
+    are deleted. Skips everything when the manifest already describes
+    output_info (the ingestion manifest's output record).
+    Returns (written, unchanged, removed) partition counts, or None if skipped.
+    """
+    dataset_dir = Path(dataset_dir)
+    columns = list(columns)
+    previous = load_partition_manifest(dataset_dir) or {}
+    if output_info is not None and previous.get('output') == output_info:
+        return None
+
+    file_format = 'parquet' if columnar_loaders.HAS_TYPED_OUTPUT else 'csv'
+    encode = _encode_parquet if file_format == 'parquet' else _encode_csv
+    if file_format == 'parquet' and isinstance(rows, pd.DataFrame):
+        # Type the whole frame once rather than month by month
+        rows = columnar_loaders.to_typed_frame(rows, columns)
+    old_partitions = previous.get('partitions', {})
+    if previous.get('format') != file_format or previous.get('columns') != columns:
+        old_partitions = {key: {'path': entry['path']} for key, entry in old_partitions.items()}
+
+    partitions = {}
+    written = unchanged = 0
+    for key, group in _iter_groups(rows, columns):
+        if key in partitions:
+            raise ValueError(f"Rows for partition {key} are not contiguous (rows must be sorted by date)")
+        digest, (min_date, max_date), count, serialize = encode(group, columns)
+        relative_path = f"{partition_dir(key)}/part.{file_format}"
+        old = old_partitions.get(key, {})
+        if old.get('digest') == digest and old.get('path') == relative_path and (dataset_dir / relative_path).exists():
+            unchanged += 1
+        else:
+            _write_atomic(dataset_dir / relative_path, serialize())
+            written += 1
+        partitions[key] = {'path': relative_path, 'rows': count, 'min_date': min_date, 'max_date': max_date,
+                           'digest': digest}
+
+    removed = 0
+    for key, entry in old_partitions.items():
+        if partitions.get(key, {}).get('path') != entry['path']:
+            _remove_partition(dataset_dir, entry['path'])
+            removed += key not in partitions
+
+    manifest = {
+        'version': PARTITION_VERSION,
+        'format': file_format,
+        'columns': columns,
+        'output': output_info,
+        'partitions': dict(sorted(partitions.items())),
+    }
+    tmp_file = dataset_dir / (PARTITION_MANIFEST_NAME + '.tmp')
+    dataset_dir.mkdir(parents=True, exist_ok=True)
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_file, dataset_dir / PARTITION_MANIFEST_NAME)
+    return written, unchanged, removed
+
+
+def select_partitions(manifest, start_date=None, end_date=None):
+    """
+    Partition entries whose date range overlaps [start_date, end_date]
+    (datetime.date bounds; None leaves that side open), in date order. Rows
+    with an unparseable date can never match a date filter, so their
+    partition is only included when both bounds are open.
+    """
+    start = start_date.isoformat() if start_date is not None else None
+    end = end_date.isoformat() if end_date is not None else None
+    selected = []
+    for entry in manifest['partitions'].values():
+        if entry['min_date'] is None:
+            if start is None and end is None:
+                selected.append(entry)
+            continue
+        if (start is None or entry['max_date'] >= start) and (end is None or entry['min_date'] <= end):
+            selected.append(entry)
+    return selected
+
+
+def read_partitions(dataset_dir, start_date=None, end_date=None, columns=None, manifest=None):
+    """
+    Read the partitions of dataset_dir overlapping [start_date, end_date]
+    into one DataFrame (most recent first, as in the consolidated CSV), with
+    typed dates, amounts and categoricals. columns restricts the columns read.
+    """
+    dataset_dir = Path(dataset_dir)
+    if manifest is None:
+        manifest = load_partition_manifest(dataset_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"No partitioned dataset in {dataset_dir}")
+    entries = sorted(select_partitions(manifest, start_date, end_date), key=lambda entry: entry['path'], reverse=True)
+    # Unparseable dates sort last, as in the CSV
+    entries.sort(key=lambda entry: entry['min_date'] is None)
+    columns = list(columns) if columns is not None else manifest['columns']
+    paths = [dataset_dir / entry['path'] for entry in entries]
+
+    if manifest['format'] == 'parquet':
+        schema = columnar_loaders.typed_schema(columns)
+        tables = [pa_parquet.read_table(path, columns=columns) for path in paths]
+        if not tables:
+            return schema.empty_table().to_pandas()
+        return pa.concat_tables(tables).to_pandas()
+
+    frames = [pd.read_csv(path, usecols=columns, dtype=str, keep_default_na=False) for path in paths]
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    return columnar_loaders.to_typed_frame(frame, columns)
+
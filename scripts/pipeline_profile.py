@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Pipeline Profile
+Timing spans and counters for one ingestion run: how long each stage took
+(and each file within the parse stage), how many rows were parsed or reused,
+how often each merchant normalization rule matched, how many categories were
+auto-assigned and how many values failed to parse. A one-line summary is
+printed on every run; --profile also writes the full report as JSON.
+"""
+
+import json
+import os
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+# Suffix of the JSON report written next to the output file
+PROFILE_SUFFIX = '.profile.json'
+
+
+def profile_path(output_path):
+    """Path of the profile report for a consolidated output file."""
+    output_path = Path(output_path)
+    return output_path.with_name(output_path.stem + PROFILE_SUFFIX)
+
+
+def rule_match_counts(merchant_counts, rule_names):
+    """
+    Split {normalized merchant: rows} into rows per normalization rule
+    (rules are identified by the name they produce) and the number of rows
+    no rule matched. Returns (rule counts, unmatched rows).
+    """
+    matched = {name: int(count) for name, count in merchant_counts.items() if name in rule_names}
+    unmatched = int(sum(merchant_counts.values())) - sum(matched.values())
+    return matched, unmatched
+
+
+class PipelineProfile:
+    """
+    Collects the spans and counters of one run.
+
+    The pipeline runs its stages one after another and calls lap(stage) as
+    each one ends; add_file() records the per-file parse time and counters
+    gathered (possibly in a worker process) while parsing; count() bumps a
+    named counter.
+    """
+
+    def __init__(self):
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self._start = self._lap_start = time.perf_counter()
+        self.stages = {}
+        self.parse_breakdown = {}
+        self.files = []
+        self.counters = Counter()
+        self.rules = Counter()
+        self.unmatched_merchants = 0
+
+    def lap(self, stage):
+        """End stage: the time since the previous lap (or the start) is added to it."""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self._lap_start
+        self._lap_start = now
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def add_file(self, name, rows, stats, cached=False):
+        """Record one input file: its row count and the stats gathered while parsing it."""
+        record = {'file': name, 'rows': rows, 'cached': cached}
+        if not cached:
+            record['seconds'] = round(stats.get('seconds', 0.0), 6)
+            for part in ('normalize', 'sort'):
+                if f'{part}_seconds' not in stats:
+                    continue
+                seconds = stats[f'{part}_seconds']
+                record[f'{part}_seconds'] = round(seconds, 6)
+                self.parse_breakdown[part] = self.parse_breakdown.get(part, 0.0) + seconds
+            self.count('rows_parsed', rows)
+            self.count('auto_categories', stats.get('auto_categories', 0))
+            self.rules.update(stats.get('rules', {}))
+            self.unmatched_merchants += stats.get('unmatched_merchants', 0)
+        else:
+            self.count('rows_cached', rows)
+        self.count('bad_dates', stats.get('bad_dates', 0))
+        for key in ('format', 'date_format', 'bad_dates', 'auto_categories'):
+            if key in stats:
+                record[key] = stats[key]
+        if stats.get('rejects'):
+            record['rejected_rows'] = len(stats['rejects'])
+        self.files.append(record)
+
+    @property
+    def total_seconds(self):
+        return time.perf_counter() - self._start
+
+    def summary(self):
+        """
+        One line with the time of each stage, slowest first; the parse stage
+        also shows the time its files spent normalizing merchants and sorting
+        (summed over files, so with --jobs it can exceed the stage's wall time).
+        """
+        stages = sorted(self.stages.items(), key=lambda item: item[1], reverse=True)
+        parts = []
+        for stage, seconds in stages:
+            part = f"{stage} {seconds:.2f}s"
+            if stage == 'parse' and self.parse_breakdown:
+                part += ' (' + ', '.join(f"{name} {value:.2f}s" for name, value in self.parse_breakdown.items()) + ')'
+            parts.append(part)
+        return f"Timings ({self.total_seconds:.2f}s): {', '.join(parts)}"
+
+    def report(self):
+        """The profile as a JSON-serializable dict."""
+        return {
+            'started': self.started,
+            'total_seconds': round(self.total_seconds, 6),
+            'stages': {stage: round(seconds, 6) for stage, seconds in self.stages.items()},
+            'parse_breakdown': {part: round(seconds, 6) for part, seconds in self.parse_breakdown.items()},
+            'files': self.files,
+            'counters': dict(self.counters),
+            'merchant_rules': {
+                'matched': dict(self.rules.most_common()),
+                'unmatched': self.unmatched_merchants,
+            },
+        }
+
+    def save(self, path):
+        """Write the report to path (atomically)."""
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        os.replace(tmp_path, path)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Row Rejects
+Collects the input rows that cannot be parsed (an unparseable amount, a
+truncated line, extra fields) with their file and line number, so they are
+skipped instead of aborting the run, and writes them to rejects.csv next to
+the consolidated file.
+"""
+
+import csv
+import io
+import os
+from pathlib import Path
+
+# Side output listing the rejected rows, written next to the consolidated file
+REJECTS_NAME = 'rejects.csv'
+REJECT_COLUMNS = ['File', 'Line', 'Reason', 'Record']
+
+
+def format_record(values):
+    """The fields of a rejected row as one CSV line (without line terminator)."""
+    text = io.StringIO()
+    csv.writer(text, lineterminator='').writerow(['' if value is None else value for value in values])
+    return text.getvalue()
+
+
+class RowRejects:
+    """
+    Rejected rows of one input file (or of a byte range of it), stored in
+    stats['rejects'] as [line, reason, record] lists so they are cached
+    in the ingestion manifest and merged like the other per-file stats.
+
+    Line numbers are those the reader sees (the header is line 1); the rows
+    of a byte range are renumbered when its chunks are merged back together.
+    """
+
+    def __init__(self, stats=None):
+        self.rejects = stats.setdefault('rejects', []) if stats is not None else []
+
+    def __len__(self):
+        return len(self.rejects)
+
+    def add(self, line, reason, values):
+        """Reject the row read at line, given its field values."""
+        self.rejects.append([int(line), reason, format_record(values)])
+
+
+def rejects_path(output_path):
+    """Path of the rejects file for a consolidated output file."""
+    return Path(output_path).parent / REJECTS_NAME
+
+
+def write_rejects(path, file_rejects):
+    """
+    Write rejected rows to path as (File, Line, Reason, Record) rows, given
+    (file label, rejects) pairs in file order. Removes a stale file when
+    nothing was rejected. Returns the number of rows written.
+    """
+    path = Path(path)
+    rows = [
+        [label, line, reason, record]
+        for label, rejects in file_rejects
+        for line, reason, record in sorted(rejects, key=lambda reject: reject[0])
+    ]
+    if not rows:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        return 0
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(REJECT_COLUMNS)
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+    return len(rows)
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Transaction Store
+Optional SQLite backend for the consolidated transactions. Ingestion upserts
+rows into it, the category tool updates single rows in place (its edits
+are then written into the consolidated outputs with apply_edits), and the
+dashboard queries it with date, source and category filters applied in SQL
+instead of loading and rewriting the whole CSV.
+"""
+
+import hashlib
+import json
+import sqlite3
+from datetime import date
+from pathlib import Path
+
+from date_parsing import BAD_DATE_KEY, date_key
+from derived_columns import transaction_type
+
+# Default database file name, stored next to all_transactions.csv
+STORE_NAME = 'transactions.db'
+
+# Bump when the table layout changes; older databases are rebuilt
+SCHEMA_VERSION = 3
+
+# Rows sent to SQLite per executemany() call during an upsert
+UPSERT_BATCH_ROWS = 5000
+
+# Consolidated CSV column -> table column. Any other CSV columns are kept
+# as JSON in the `extra` column.
+COLUMNS = [
+    ('Source', 'source'),
+    ('Transaction Date', 'transaction_date_text'),
+    ('Post Date', 'post_date'),
+    ('Description', 'description'),
+    ('Merchant', 'merchant'),
+    ('Normalized Merchant', 'normalized_merchant'),
+    ('Category', 'category'),
+    ('Type', 'type'),
+    ('Amount', 'amount'),
+    ('Memo', 'memo'),
+    ('Transaction Type', 'transaction_type'),
+    ('Absolute Amount', 'absolute_amount'),
+    ('Month', 'month'),
+    ('Transaction ID', 'transaction_hash'),
+    ('File ID', 'file_id'),
+    ('Line', 'line'),
+]
+CSV_COLUMNS = [csv_column for csv_column, _ in COLUMNS]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    txn_key TEXT NOT NULL UNIQUE,
+    position INTEGER NOT NULL,
+    generation INTEGER NOT NULL,
+    transaction_date TEXT,
+    transaction_date_text TEXT,
+    post_date TEXT,
+    source TEXT,
+    description TEXT,
+    merchant TEXT,
+    normalized_merchant TEXT,
+    category TEXT,
+    type TEXT,
+    amount REAL,
+    memo TEXT,
+    transaction_type TEXT,
+    absolute_amount REAL,
+    month TEXT,
+    transaction_hash TEXT,
+    file_id INTEGER,
+    line INTEGER,
+    extra TEXT,
+    category_edited INTEGER NOT NULL DEFAULT 0,
+    merchant_edited INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (transaction_date);
+CREATE INDEX IF NOT EXISTS idx_transactions_source ON transactions (source);
+CREATE INDEX IF NOT EXISTS idx_transactions_merchant ON transactions (normalized_merchant);
+CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (category);
+CREATE INDEX IF NOT EXISTS idx_transactions_position ON transactions (position);
+CREATE INDEX IF NOT EXISTS idx_transactions_file ON transactions (file_id, line);
+"""
+
+# Re-ingested rows refresh everything except values edited by hand
+UPSERT_SQL = """
+INSERT INTO transactions (
+    txn_key, position, generation, transaction_date, transaction_date_text, post_date,
+    source, description, merchant, normalized_merchant, category, type, amount, memo,
+    transaction_type, absolute_amount, month, transaction_hash, file_id, line, extra
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (txn_key) DO UPDATE SET
+    position = excluded.position,
+    generation = excluded.generation,
+    transaction_date = excluded.transaction_date,
+    transaction_date_text = excluded.transaction_date_text,
+    post_date = excluded.post_date,
+    source = excluded.source,
+    description = excluded.description,
+    merchant = excluded.merchant,
+    normalized_merchant = CASE WHEN transactions.merchant_edited
+        THEN transactions.normalized_merchant ELSE excluded.normalized_merchant END,
+    category = CASE WHEN transactions.category_edited
+        THEN transactions.category ELSE excluded.category END,
+    type = excluded.type,
+    amount = excluded.amount,
+    memo = excluded.memo,
+    transaction_type = CASE WHEN transactions.category_edited
+        THEN transactions.transaction_type ELSE excluded.transaction_type END,
+    absolute_amount = excluded.absolute_amount,
+    month = excluded.month,
+    transaction_hash = excluded.transaction_hash,
+    file_id = excluded.file_id,
+    line = excluded.line,
+    extra = excluded.extra
+"""
+
+SELECT_COLUMNS = ', '.join(['id'] + [f'{column} AS "{csv_column}"' for csv_column, column in COLUMNS] + ['extra'])
+
+
+def _text(value):
+    """A cell as text, '' for missing values (None or NaN)."""
+    if value is None or value != value:
+        return ''
+    return str(value)
+
+
+def _amount(value):
+    """A cell as a float, or None if it is empty or not a number."""
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return None
+    return amount if amount == amount else None
+
+
+def _integer(value):
+    """A cell as an int, or None if it is empty or not a number."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _iso_date(value):
+    """ISO date (YYYY-MM-DD) of a canonical date string, or None if unparseable."""
+    ordinal = date_key(_text(value))
+    if ordinal == BAD_DATE_KEY:
+        return None
+    return date.fromordinal(ordinal).isoformat()
+
+
+def _as_iso(value):
+    """Filter bound as an ISO date string (accepts date/datetime objects or strings)."""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()[:10]
+    return str(value)
+
+
+def _keyed_rows(rows):
+    """Yield (transaction key, row) for consolidated rows in output order."""
+    occurrences = {}
+    for row in rows:
+        base_key = TransactionStore.transaction_key(row)
+        occurrence = occurrences.get(base_key, 0)
+        occurrences[base_key] = occurrence + 1
+        yield (base_key if occurrence == 0 else TransactionStore.transaction_key(row, occurrence)), row
+
+
+def apply_edits(rows, edits):
+    """
+    Yield consolidated row dicts (in output order) with the store's edits
+    (see TransactionStore.edits) applied in place, so the CSV and the other
+    outputs agree with the store.
+    """
+    for key, row in _keyed_rows(rows):
+        values = edits.get(key)
+        if values:
+            row.update((column, value) for column, value in values.items() if column in row)
+        yield row
+
+
+def apply_frame_edits(frame, edits):
+    """Apply the store's edits to a consolidated DataFrame in place; returns the number of rows changed."""
+    columns = list(frame.columns)
+    rows = (dict(zip(columns, values)) for values in frame.itertuples(index=False, name=None))
+    changed = 0
+    for position, (key, _) in enumerate(_keyed_rows(rows)):
+        values = edits.get(key)
+        if not values:
+            continue
+        for column, value in values.items():
+            if column in frame:
+                frame.iat[position, frame.columns.get_loc(column)] = value
+        changed += 1
+    return changed
+
+
+class TransactionStore:
+    """
+    Repository over a SQLite database of consolidated transactions.
+
+    Every transaction is identified by a key built from its source, date,
+    amount and description plus an occurrence counter, so identical
+    transactions on the same day stay distinct and re-ingesting the same
+    files updates rows in place. Categories and merchants changed through
+    update_category()/update_merchant() are kept across re-ingestion.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = Path(db_file)
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_file))
+        self.conn.row_factory = sqlite3.Row
+        self._ensure_schema()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.conn.commit()
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _ensure_schema(self):
+        """Create the tables, rebuilding them if the schema version changed."""
+        version = None
+        try:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+            version = int(row[0]) if row else None
+        except sqlite3.OperationalError:
+            pass
+        if version is not None and version != SCHEMA_VERSION:
+            self.conn.executescript("DROP TABLE IF EXISTS transactions; DROP TABLE IF EXISTS meta;")
+        self.conn.executescript(SCHEMA)
+        self.set_meta('schema_version', SCHEMA_VERSION)
+        self.conn.commit()
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    @staticmethod
+    def transaction_key(row, occurrence=0):
+        """Stable identity of a transaction row (occurrence separates exact repeats)."""
+        amount = _amount(row.get('Amount'))
+        parts = [
+            _text(row.get('Source')),
+            _text(row.get('Transaction Date')),
+            f"{amount:.2f}" if amount is not None else '',
+            _text(row.get('Description')),
+            str(occurrence),
+        ]
+        return hashlib.sha1('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    def upsert_rows(self, rows):
+        """
+        Replace the stored transactions with rows (consolidated row dicts, in
+        output order): new rows are inserted, known rows updated in place and
+        rows no longer present deleted. Returns (inserted, updated, deleted).
+        """
+        generation = self.get_meta('generation', 0) + 1
+        before = self.count()
+        batch = []
+        total = 0
+
+        with self.conn:
+            for position, (key, row) in enumerate(_keyed_rows(rows)):
+                extra = {column: _text(value) for column, value in row.items() if column not in CSV_COLUMNS}
+                batch.append((
+                    key, position, generation,
+                    _iso_date(row.get('Transaction Date')),
+                    _text(row.get('Transaction Date')),
+                    _text(row.get('Post Date')),
+                    _text(row.get('Source')),
+                    _text(row.get('Description')),
+                    _text(row.get('Merchant')),
+                    _text(row.get('Normalized Merchant')),
+                    _text(row.get('Category')),
+                    _text(row.get('Type')),
+                    _amount(row.get('Amount')),
+                    _text(row.get('Memo')),
+                    _text(row.get('Transaction Type')),
+                    _amount(row.get('Absolute Amount')),
+                    _text(row.get('Month')),
+                    _text(row.get('Transaction ID')),
+                    _integer(row.get('File ID')),
+                    _integer(row.get('Line')),
+                    json.dumps(extra) if extra else None,
+                ))
+                if len(batch) >= UPSERT_BATCH_ROWS:
+                    self.conn.executemany(UPSERT_SQL, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                self.conn.executemany(UPSERT_SQL, batch)
+                total += len(batch)
+
+            deleted = self.conn.execute("DELETE FROM transactions WHERE generation != ?", (generation,)).rowcount
+            self.set_meta('generation', generation)
+
+        inserted = self.count() - (before - deleted)
+        return inserted, total - inserted, deleted
+
+    def _where(self, start_date=None, end_date=None, sources=None, categories=None, exclude_categories=None,
+               merchants=None, exclude_merchants=None, file_ids=None):
+        """
+        WHERE clause and parameters for the supported filters. Dates bound the
+        transaction date (inclusive); each list keeps (or with exclude_, drops)
+        rows whose column is one of its values (file_ids selects the rows of
+        input files by lineage id). None means no filter.
+        """
+        clauses = []
+        params = []
+        if start_date is not None:
+            clauses.append("transaction_date >= ?")
+            params.append(_as_iso(start_date))
+        if end_date is not None:
+            clauses.append("transaction_date <= ?")
+            params.append(_as_iso(end_date))
+        for column, values, negate in (('source', sources, False),
+                                       ('category', categories, False),
+                                       ('category', exclude_categories, True),
+                                       ('normalized_merchant', merchants, False),
+                                       ('normalized_merchant', exclude_merchants, True),
+                                       ('file_id', file_ids, False)):
+            if values is None:
+                continue
+            values = list(values)
+            if not values:
+                if not negate:
+                    clauses.append("0")
+                continue
+            placeholders = ', '.join('?' * len(values))
+            clauses.append(f"{column} {'NOT IN' if negate else 'IN'} ({placeholders})")
+            params.extend(values)
+        sql = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        return sql, params
+
+    def iter_rows(self, **filters):
+        """Yield matching transactions as consolidated row dicts, in output order."""
+        where, params = self._where(**filters)
+        cursor = self.conn.execute(f"SELECT {SELECT_COLUMNS} FROM transactions{where} ORDER BY position", params)
+        for record in cursor:
+            row = {column: record[column] for column in CSV_COLUMNS}
+            if record['extra']:
+                row.update(json.loads(record['extra']))
+            yield row
+
+    def read_frame(self, parse_dates=True, **filters):
+        """
+        Matching transactions as a DataFrame indexed by transaction id, with
+        the consolidated CSV's column names. Dates are parsed unless
+        parse_dates is False.
+        """
+        import pandas as pd
+
+        where, params = self._where(**filters)
+        frame = pd.read_sql_query(f"SELECT {SELECT_COLUMNS} FROM transactions{where} ORDER BY position",
+                                  self.conn, params=params, index_col='id')
+        extra = frame.pop('extra')
+        if extra.notna().any():
+            extra_frame = pd.DataFrame([json.loads(value) if value else {} for value in extra], index=frame.index)
+            frame = frame.join(extra_frame)
+        if parse_dates:
+            for column in ('Transaction Date', 'Post Date'):
+                frame[column] = pd.to_datetime(frame[column], format='%m/%d/%Y', errors='coerce')
+        return frame
+
+    def count(self, **filters):
+        """Number of matching transactions."""
+        where, params = self._where(**filters)
+        return self.conn.execute(f"SELECT COUNT(*) FROM transactions{where}", params).fetchone()[0]
+
+    def distinct(self, csv_column):
+        """Sorted distinct values of a column (e.g. 'Source' or 'Category')."""
+        column = dict(COLUMNS)[csv_column]
+        cursor = self.conn.execute(f"SELECT DISTINCT {column} FROM transactions ORDER BY {column}")
+        return [value for (value,) in cursor]
+
+    def date_range(self):
+        """(first, last) ISO transaction dates, or (None, None) when empty."""
+        first, last = self.conn.execute(
+            "SELECT MIN(transaction_date), MAX(transaction_date) FROM transactions"
+        ).fetchone()
+        return first, last
+
+    def update_category(self, transaction_id, category):
+        """
+        Set the category of one transaction; it is kept across re-ingestion.
+        Its Transaction Type is classified again, since a Payment category
+        makes it a payment.
+        """
+        row = self.conn.execute("SELECT type, amount FROM transactions WHERE id = ?",
+                                (int(transaction_id),)).fetchone()
+        if row is None:
+            return
+        self.conn.execute(
+            "UPDATE transactions SET category = ?, category_edited = 1, transaction_type = ? WHERE id = ?",
+            (category, transaction_type(row['type'], category, row['amount']), int(transaction_id)),
+        )
+
+    def edits(self):
+        """
+        Values changed through update_category()/update_merchant(), by
+        transaction key: {key: {CSV column: value}}. Empty when nothing was edited.
+        """
+        edits = {}
+        cursor = self.conn.execute(
+            "SELECT txn_key, category, transaction_type, normalized_merchant, category_edited, merchant_edited "
+            "FROM transactions WHERE category_edited OR merchant_edited"
+        )
+        for record in cursor:
+            values = {}
+            if record['category_edited']:
+                values['Category'] = record['category']
+                values['Transaction Type'] = record['transaction_type']
+            if record['merchant_edited']:
+                values['Normalized Merchant'] = record['normalized_merchant']
+            edits[record['txn_key']] = values
+        return edits
+
+    def update_merchant(self, transaction_id, merchant):
+        """Set the normalized merchant of one transaction; it is kept across re-ingestion."""
+        self.conn.execute(
+            "UPDATE transactions SET normalized_merchant = ?, merchant_edited = 1 WHERE id = ?",
+            (merchant, int(transaction_id)),
+        )
+
+    def commit(self):
+        self.conn.commit()
@@ -4,17 +4,27 @@ Interactive Finance Dashboard
 Displays spending analysis with pie charts and bar graphs, with dynamic filtering capabilities.
 """
 
+import sys
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from pathlib import Path
-from ignore_list_manager import IgnoreListManager
+from ignore_list_manager import IgnoreListManager, TRANSACTION_ID_COLUMN
+from spending_cube import amount_bounds, build_cube, rollup, slice_cube
 
 # Get the project root directory (parent of src/)
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_FILE = PROJECT_ROOT / 'data' / 'processed' / 'all_transactions.csv'
+# Typed copy written by concatenate_transactions.py when pyarrow is installed
+TYPED_DATA_FILE = DATA_FILE.with_suffix('.parquet')
+# Optional SQLite store (concatenate_transactions.py --sqlite); used instead of the CSV when present
+STORE_FILE = DATA_FILE.with_name('transactions.db')
+# Year/month partitioned copy written by concatenate_transactions.py; only the
+# months in the selected date range are read from it
+DATASET_DIR = DATA_FILE.with_name('transactions')
+PARTITION_MANIFEST = DATASET_DIR / '_partitions.json'
 
 # Page configuration
 st.set_page_config(
@@ -46,24 +56,55 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
-def load_data(file_path=None):
-    """Load and preprocess the transaction data."""
-    if file_path is None:
-        file_path = DATA_FILE
-    df = pd.read_csv(file_path)
-    df['Transaction Date'] = pd.to_datetime(df['Transaction Date'])
-    df['Post Date'] = pd.to_datetime(df['Post Date'])
+def file_version(path):
+    """(mtime_ns, size) of a file, or None when it does not exist; keys the caches of data read from it."""
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def typed_data_is_current():
+    """True if the typed Parquet copy exists and is at least as new as the CSV."""
+    if not TYPED_DATA_FILE.exists():
+        return False
+    if not DATA_FILE.exists():
+        return True
+    return TYPED_DATA_FILE.stat().st_mtime_ns >= DATA_FILE.stat().st_mtime_ns
+
+def fill_blank(series, value):
+    """Replace missing and empty values with value (categorical columns stay categorical)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        if value not in series.cat.categories:
+            series = series.cat.add_categories([value])
+        series = series.fillna(value)
+        return series.where(series != '', value).cat.remove_unused_categories()
+    return series.fillna(value).replace('', value)
+
+def data_file_version():
+    """Version of the file load_data() reads: the typed copy when it is current, otherwise the CSV."""
+    path = TYPED_DATA_FILE if typed_data_is_current() else DATA_FILE
+    return path.name, file_version(path)
+
+@st.cache_data(max_entries=2)
+def load_data(data_version):
+    """Load and preprocess the transaction data (data_version keys the cache)."""
+    if data_version[0] == TYPED_DATA_FILE.name:
+        # Dates, amounts and categorical columns are already typed
+        df = pd.read_parquet(TYPED_DATA_FILE)
+    else:
+        df = pd.read_csv(DATA_FILE)
+        df['Transaction Date'] = pd.to_datetime(df['Transaction Date'])
+        df['Post Date'] = pd.to_datetime(df['Post Date'])
     
     # Fill missing categories and merchants
-    df['Category'] = df['Category'].fillna('Other')
-    df['Category'] = df['Category'].replace('', 'Other')
+    df['Category'] = fill_categories(df)
     
     # Fill missing merchants with "Unknown"
-    df['Normalized Merchant'] = df['Normalized Merchant'].fillna('Unknown')
-    df['Normalized Merchant'] = df['Normalized Merchant'].replace('', 'Unknown')
+    df['Normalized Merchant'] = fill_blank(df['Normalized Merchant'], 'Unknown')
     
-    return df
+    # Transaction type, month and ignore-list id, once per loaded dataset
+    return add_derived_columns(df)
     """Load transaction data from CSV file."""
     df = pd.read_csv(file_path)
     # Convert Transaction Date to datetime
@@ -81,40 +122,192 @@ def load_data(file_path=None):
     
     return df
 
-def categorize_transaction(row):
+def transaction_store_mtime():
+    """Modification time of the SQLite store, or None when it does not exist."""
+    if not STORE_FILE.exists():
+        return None
+    return STORE_FILE.stat().st_mtime_ns
+
+def use_scripts_modules():
+    """Make the ingestion modules in scripts/ importable."""
+    scripts_dir = str(PROJECT_ROOT / 'scripts')
+    if scripts_dir not in sys.path:
+        sys.path.insert(0, scripts_dir)
+
+def open_transaction_store():
+    """Open the SQLite transaction store (its repository class lives in scripts/)."""
+    use_scripts_modules()
+    from transaction_store import TransactionStore
+    return TransactionStore(STORE_FILE)
+
+def fill_categories(df):
     """
-    Categorize credit card transactions correctly.
-    
-    After amount normalization, all cards follow this convention:
-    - Positive amounts = Expenses (money you spent)
-    - Negative amounts = Refunds/Payments (money coming back)
-    
-    Transaction types:
-    - Purchase/Sale = Expense
-    - Return = Refund (reduces expenses)
-    - Payment = Credit card payment (excluded from expense calculations)
+    Fill blank categories with the auto rules ingestion uses (scripts/category_rules.py),
+    then with "Other". Only matters for files written before a rule existed or edited by hand.
     """
-    transaction_type = str(row['Type']).strip().lower()
-    category = str(row.get('Category', '')).strip().lower()
-    
-    # Check category first (for auto-assigned "Payment" categories)
-    if category == 'payment':
-        return 'Payment'
-    
-    # Then check transaction type
-    if transaction_type == 'payment':
-        return 'Payment'
-    elif transaction_type == 'return':
-        return 'Refund'
-    elif transaction_type in ['purchase', 'sale']:
-        return 'Expense'
-    else:
-        # Fallback: use amount sign
-        # Positive = Expense, Negative = Refund/Payment
-        if row['Amount'] < 0:
-            return 'Refund'
-        else:
-            return 'Expense'
+    use_scripts_modules()
+    from category_rules import DEFAULT_CATEGORY_RULES
+    category = df['Category']
+    blank = category.isna() | (category.astype(object) == '')
+    if blank.any():
+        matched = DEFAULT_CATEGORY_RULES.match_column(df[blank])
+        matched = matched[matched != '']
+        if len(matched):
+            if isinstance(category.dtype, pd.CategoricalDtype):
+                category = category.cat.add_categories(sorted(set(matched) - set(category.cat.categories)))
+            category = category.copy()
+            category[matched.index] = matched
+    return fill_blank(category, 'Other')
+
+def partitioned_dataset_mtime():
+    """Modification time of the partition manifest, or None when there is no up-to-date partitioned dataset."""
+    if not PARTITION_MANIFEST.exists():
+        return None
+    mtime = PARTITION_MANIFEST.stat().st_mtime_ns
+    if DATA_FILE.exists() and mtime < DATA_FILE.stat().st_mtime_ns:
+        return None  # Written by an older run than the CSV
+    return mtime
+
+@st.cache_data
+def load_partition_catalog(dataset_mtime):
+    """
+    Filter options and data-quality counts for the partitioned dataset: dates and
+    totals from the partition manifest, the rest from its low-cardinality columns only.
+    """
+    use_scripts_modules()
+    from partitioned_dataset import load_partition_manifest, read_partitions
+    manifest = load_partition_manifest(DATASET_DIR)
+    dated = [entry for entry in manifest['partitions'].values() if entry['min_date']]
+    today = datetime.now().date()
+    df = read_partitions(DATASET_DIR, columns=['Source', 'Category', 'Normalized Merchant'], manifest=manifest)
+    categories = df['Category'].astype(object).fillna('')
+    merchants = df['Normalized Merchant'].astype(object).fillna('')
+    return {
+        'min_date': datetime.fromisoformat(min(e['min_date'] for e in dated)).date() if dated else today,
+        'max_date': datetime.fromisoformat(max(e['max_date'] for e in dated)).date() if dated else today,
+        'sources': sorted(df['Source'].astype(object).dropna().unique()),
+        'categories': sorted({cat or 'Other' for cat in categories.unique()}),
+        'merchants': sorted(m for m in merchants.unique() if m and m != 'Unknown'),
+        'total': sum(entry['rows'] for entry in manifest['partitions'].values()),
+        'missing_categories': int(categories.isin(['', 'Other']).sum()),
+        'missing_merchants': int(merchants.isin(['', 'Unknown']).sum()),
+    }
+
+@st.cache_data
+def load_partitions(dataset_mtime, start_date, end_date):
+    """Transactions of the monthly partitions overlapping the date range (dataset_mtime keys the cache)."""
+    use_scripts_modules()
+    from partitioned_dataset import read_partitions
+    df = read_partitions(DATASET_DIR, start_date, end_date)
+    df['Category'] = fill_categories(df)
+    df['Normalized Merchant'] = fill_blank(df['Normalized Merchant'], 'Unknown')
+    return add_derived_columns(df)
+
+@st.cache_data
+def load_store_catalog(store_mtime):
+    """Filter options and data-quality counts from the store, without loading any rows."""
+    with open_transaction_store() as store:
+        first, last = store.date_range()
+        today = datetime.now().date()
+        return {
+            'min_date': datetime.fromisoformat(first).date() if first else today,
+            'max_date': datetime.fromisoformat(last).date() if last else today,
+            'sources': store.distinct('Source'),
+            'categories': sorted({cat or 'Other' for cat in store.distinct('Category')}),
+            'merchants': [m for m in store.distinct('Normalized Merchant') if m and m != 'Unknown'],
+            'total': store.count(),
+            'missing_categories': store.count(categories=['', 'Other']),
+            'missing_merchants': store.count(merchants=['', 'Unknown']),
+        }
+
+def store_categories(categories):
+    """Dashboard category selection as stored values ('Other' also matches blank categories)."""
+    if categories is None:
+        return None
+    return tuple(categories) + (('',) if 'Other' in categories else ())
+
+def store_merchants(merchants):
+    """Dashboard merchant selection as stored values ('Unknown' also matches blank merchants)."""
+    if merchants is None:
+        return None
+    return tuple(merchants) + (('',) if 'Unknown' in merchants else ())
+
+@st.cache_data
+def query_store(store_mtime, start_date, end_date, sources, categories, exclude_categories,
+                merchants, exclude_merchants, ignore_version):
+    """
+    Transactions matching the sidebar filters, selected in SQL, without ignored
+    rows, the number ignored and their spending cube (store_mtime and
+    ignore_version key the cache).
+    """
+    with open_transaction_store() as store:
+        df = store.read_frame(start_date=start_date, end_date=end_date, sources=sources,
+                              categories=categories, exclude_categories=exclude_categories,
+                              merchants=merchants, exclude_merchants=exclude_merchants)
+    df['Category'] = fill_categories(df)
+    df['Normalized Merchant'] = fill_blank(df['Normalized Merchant'], 'Unknown')
+    df, ignored_count = exclude_ignored(add_derived_columns(df), ignore_version[0])
+    return df, ignored_count, build_cube(df)
+
+def add_derived_columns(df):
+    """
+    Transaction Type, Absolute Amount, Month and Transaction ID columns. Ingestion
+    writes them (scripts/derived_columns.py); they are only derived here for data
+    written before it did.
+    """
+    if 'Transaction Type' not in df:
+        use_scripts_modules()
+        from derived_columns import transaction_types
+        categories = df['Category'] if 'Category' in df else None
+        df['Transaction Type'] = pd.Series(transaction_types(df['Type'], categories, df['Amount']), index=df.index)
+    if 'Absolute Amount' not in df:
+        df['Absolute Amount'] = df['Amount'].abs()
+    if 'Month' not in df:
+        df['Month'] = df['Transaction Date'].dt.to_period('M').astype(str)
+    if TRANSACTION_ID_COLUMN not in df:
+        df[TRANSACTION_ID_COLUMN] = IgnoreListManager.transaction_ids(df)
+    return df
+
+def ignore_list_version(ignore_manager):
+    """Version of the ignore list file, keying the caches of frames it was applied to."""
+    return str(ignore_manager.ignore_file), file_version(ignore_manager.ignore_file)
+
+def exclude_ignored(df, ignore_file):
+    """(rows of df not on the ignore list in ignore_file, number of rows ignored)."""
+    ignored = IgnoreListManager(ignore_file).ignored_mask(df)
+    if not ignored.any():
+        return df, 0
+    return df[~ignored], int(ignored.sum())
+
+@st.cache_data(max_entries=2)
+def load_prepared_data(data_version, ignore_version):
+    """
+    The loaded transactions without ignored rows, the number ignored, the
+    sidebar's filter options and the spending cube the charts are rolled up
+    from, prepared once per version of the data file and of the ignore list
+    and shared by every session.
+    """
+    df, ignored_count = exclude_ignored(load_data(data_version), ignore_version[0])
+    catalog = {
+        'min_date': df['Transaction Date'].min().date(),
+        'max_date': df['Transaction Date'].max().date(),
+        'sources': sorted(df['Source'].unique()),
+        'categories': sorted([cat for cat in df['Category'].unique() if pd.notna(cat) and cat != '']),
+        'merchants': sorted([m for m in df['Normalized Merchant'].unique() if pd.notna(m) and m != '' and m != 'Unknown']),
+        'total': len(df),
+        'missing_categories': int((df['Category'] == 'Other').sum()),
+        'missing_merchants': int((df['Normalized Merchant'] == 'Unknown').sum()),
+    }
+    return df, ignored_count, catalog, build_cube(df)
+
+@st.cache_data(max_entries=8)
+def load_prepared_partitions(dataset_mtime, start_date, end_date, ignore_version):
+    """
+    Transactions of the partitions overlapping the date range without ignored
+    rows, the number ignored and their spending cube.
+    """
+    df, ignored_count = exclude_ignored(load_partitions(dataset_mtime, start_date, end_date), ignore_version[0])
+    return df, ignored_count, build_cube(df)
 
 def main():
     st.markdown('<div class="main-header">🌿 Finley </div>', unsafe_allow_html=True)
@@ -129,7 +322,6 @@ def main():
             st.warning("⚠️ Transaction data not found. Running concatenation script...")
             
             # Import and run concatenation
-            import sys
             sys.path.insert(0, str(PROJECT_ROOT / 'scripts'))
             
             try:
@@ -153,29 +345,39 @@ def main():
                 st.info("Please check your CSV files and try running `scripts/concatenate_transactions.py` manually.")
                 st.stop()
         
-        df = load_data()
+        store_mtime = transaction_store_mtime()
+        dataset_mtime = partitioned_dataset_mtime() if store_mtime is None else None
+        if dataset_mtime is not None:
+            # The partition manifest answers the date range; months are
+            # loaded for the selected range below
+            catalog = load_partition_catalog(dataset_mtime)
+        elif store_mtime is None:
+            # Loaded, ignore-filtered and summarized once per version of the
+            # data file and the ignore list
+            df, ignored_count, catalog, cube = load_prepared_data(data_file_version(),
+                                                                  ignore_list_version(ignore_manager))
+        else:
+            # The SQLite store answers the sidebar lookups; rows are only
+            # loaded for the selected filters below
+            catalog = load_store_catalog(store_mtime)
     except FileNotFoundError:
         st.error(f"❌ Error: {DATA_FILE} not found after concatenation attempt.")
         st.stop()
     
-    # Filter out ignored transactions early
-    original_count = len(df)
-    df = df[~df.apply(ignore_manager.is_ignored, axis=1)].copy()
-    ignored_count = original_count - len(df)
-    
-    if ignored_count > 0:
-        st.info(f"ℹ️ {ignored_count} transaction(s) are currently ignored and excluded from all calculations.")
-    
-    # Add transaction type classification
-    df['Transaction Type'] = df.apply(categorize_transaction, axis=1)
+    min_date = catalog['min_date']
+    max_date = catalog['max_date']
+    all_sources = catalog['sources']
+    all_categories = catalog['categories']
+    all_merchants = catalog['merchants']
+    total_count = catalog['total']
+    missing_categories = catalog['missing_categories']
+    missing_merchants = catalog['missing_merchants']
     
     # Sidebar filters
     st.sidebar.header("🎛️ Filters")
     
     # Date range filter
     st.sidebar.subheader("📅 Date Range")
-    min_date = df['Transaction Date'].min().date()
-    max_date = df['Transaction Date'].max().date()
     
     date_option = st.sidebar.radio(
         "Select date range:",
@@ -204,19 +406,13 @@ def main():
         start_date = min_date
         end_date = max_date
     
-    # Filter by date
-    mask = (df['Transaction Date'].dt.date >= start_date) & (df['Transaction Date'].dt.date <= end_date)
-    filtered_df = df[mask].copy()
-    
     # Source (Card) filter
     st.sidebar.subheader("💳 Card Source")
-    all_sources = sorted(df['Source'].unique())
     selected_sources = st.sidebar.multiselect(
         "Select cards:",
         options=all_sources,
         default=all_sources
     )
-    filtered_df = filtered_df[filtered_df['Source'].isin(selected_sources)]
     
     # Transaction Type filter
     st.sidebar.subheader("📊 Transaction Type")
@@ -225,63 +421,87 @@ def main():
         options=['Expense', 'Refund', 'Payment', 'Other'],
         default=['Expense', 'Refund']
     )
-    filtered_df = filtered_df[filtered_df['Transaction Type'].isin(transaction_types)]
     
-    # Category filter
+    # Category filter (None = all categories)
     st.sidebar.subheader("🏷️ Categories")
-    all_categories = sorted([cat for cat in df['Category'].unique() if pd.notna(cat) and cat != ''])
+    include_categories = None
+    exclude_categories = None
     
     category_option = st.sidebar.radio("Category selection:", ["All Categories", "Include Specific", "Exclude Specific"])
     if category_option == "Include Specific":
-        selected_categories = st.sidebar.multiselect(
+        # If no categories selected, show nothing
+        include_categories = st.sidebar.multiselect(
             "Include these categories:",
             options=all_categories,
             default=[]
         )
-        if selected_categories:
-            filtered_df = filtered_df[filtered_df['Category'].isin(selected_categories)]
-        else:
-            # If no categories selected, show nothing
-            filtered_df = filtered_df[filtered_df['Category'].isin([])]
     elif category_option == "Exclude Specific":
-        excluded_categories = st.sidebar.multiselect(
+        exclude_categories = st.sidebar.multiselect(
             "Exclude these categories:",
             options=all_categories,
             default=[]
-        )
-        if excluded_categories:
-            filtered_df = filtered_df[~filtered_df['Category'].isin(excluded_categories)]
+        ) or None
     
-    # Merchant filter
+    # Merchant filter (None = all merchants)
     st.sidebar.subheader("🏪 Merchants")
-    all_merchants = sorted([m for m in df['Normalized Merchant'].unique() if pd.notna(m) and m != '' and m != 'Unknown'])
+    include_merchants = None
+    exclude_merchants = None
     
     merchant_option = st.sidebar.radio("Merchant selection:", ["All Merchants", "Include Specific", "Exclude Specific"])
     if merchant_option == "Include Specific":
-        selected_merchants = st.sidebar.multiselect(
+        # If no merchants selected, show nothing
+        include_merchants = st.sidebar.multiselect(
             "Include these merchants:",
             options=all_merchants,
             default=[]
         )
-        if selected_merchants:
-            filtered_df = filtered_df[filtered_df['Normalized Merchant'].isin(selected_merchants)]
-        else:
-            # If no merchants selected, show nothing
-            filtered_df = filtered_df[filtered_df['Normalized Merchant'].isin([])]
     elif merchant_option == "Exclude Specific":
-        excluded_merchants = st.sidebar.multiselect(
+        exclude_merchants = st.sidebar.multiselect(
             "Exclude these merchants:",
             options=all_merchants,
             default=['Payment/Transfer']  # Commonly excluded
-        )
-        if excluded_merchants:
-            filtered_df = filtered_df[~filtered_df['Normalized Merchant'].isin(excluded_merchants)]
+        ) or None
+    
+    if dataset_mtime is not None:
+        # Partition pruning: only the months overlapping the date range are read
+        df, ignored_count, cube = load_prepared_partitions(dataset_mtime, start_date, end_date,
+                                                           ignore_list_version(ignore_manager))
+    
+    if store_mtime is None:
+        # Filter by date
+        mask = (df['Transaction Date'].dt.date >= start_date) & (df['Transaction Date'].dt.date <= end_date)
+        filtered_df = df[mask].copy()
+        filtered_df = filtered_df[filtered_df['Source'].isin(selected_sources)]
+        if include_categories is not None:
+            filtered_df = filtered_df[filtered_df['Category'].isin(include_categories)]
+        if exclude_categories is not None:
+            filtered_df = filtered_df[~filtered_df['Category'].isin(exclude_categories)]
+        if include_merchants is not None:
+            filtered_df = filtered_df[filtered_df['Normalized Merchant'].isin(include_merchants)]
+        if exclude_merchants is not None:
+            filtered_df = filtered_df[~filtered_df['Normalized Merchant'].isin(exclude_merchants)]
+        # The same filters on the spending cube, for the metrics and charts
+        spending_cube = slice_cube(cube, start_date, end_date, selected_sources, include_categories,
+                                   exclude_categories, include_merchants, exclude_merchants, transaction_types)
+    else:
+        # Date, source, category and merchant filters run as SQL
+        filtered_df, ignored_count, cube = query_store(store_mtime, start_date, end_date, tuple(selected_sources),
+                                                       store_categories(include_categories),
+                                                       store_categories(exclude_categories),
+                                                       store_merchants(include_merchants),
+                                                       store_merchants(exclude_merchants),
+                                                       ignore_list_version(ignore_manager))
+        spending_cube = slice_cube(cube, transaction_types=transaction_types)
+    filtered_df = filtered_df[filtered_df['Transaction Type'].isin(transaction_types)]
+    
+    if ignored_count > 0:
+        st.info(f"ℹ️ {ignored_count} transaction(s) are currently ignored and excluded from all calculations.")
     
     # Amount range filter
     st.sidebar.subheader("💵 Amount Range")
-    if len(filtered_df) > 0:
-        min_amount = float(filtered_df['Amount'].min())
-        max_amount = float(filtered_df['Amount'].max())
+    bounds = amount_bounds(spending_cube)
+    if bounds is not None:
+        min_amount, max_amount = bounds
         
         # Handle edge case where all amounts are the same
         if min_amount == max_amount:
@@ -300,6 +520,9 @@ def main():
             (filtered_df['Amount'] >= amount_range[0]) & 
             (filtered_df['Amount'] <= amount_range[1])
         ]
+        if tuple(amount_range) != (min_amount, max_amount):
+            # Cube cells do not keep single amounts: aggregate the rows left
+            spending_cube = build_cube(filtered_df)
     
     # Ignore List Management in Sidebar
     st.sidebar.subheader("🚫 Ignore List")
@@ -338,9 +561,6 @@ def main():
     st.header("📈 Summary Metrics")
     
     # Check for missing data
-    missing_categories = len(df[df['Category'] == 'Other'])
-    missing_merchants = len(df[df['Normalized Merchant'] == 'Unknown'])
-    
     if missing_categories > 0 or missing_merchants > 0:
         st.warning(f"⚠️ Data Quality: {missing_categories} transactions with 'Other' category, {missing_merchants} with 'Unknown' merchant. Use the category assignment tool to fix.")
         with st.expander("How to assign categories and merchants"):
@@ -365,20 +585,21 @@ def main():
     
     col1, col2, col3, col4 = st.columns(4)
     
-    # Calculate expenses and refunds correctly for credit cards
-    expense_transactions = filtered_df[filtered_df['Transaction Type'] == 'Expense']
-    refund_transactions = filtered_df[filtered_df['Transaction Type'] == 'Refund']
+    # Calculate expenses and refunds correctly for credit cards, from the cube cells
+    expense_cube = spending_cube[spending_cube['Transaction Type'] == 'Expense']
+    refund_cube = spending_cube[spending_cube['Transaction Type'] == 'Refund']
     
-    # For expenses: take absolute value (handles both positive and negative amounts)
-    total_expenses = expense_transactions['Amount'].abs().sum()
+    # For expenses: absolute amounts (handles both positive and negative amounts)
+    total_expenses = expense_cube['Absolute Amount'].sum()
     
-    # For refunds: take absolute value (these reduce expenses)
-    total_refunds = refund_transactions['Amount'].abs().sum()
+    # For refunds: absolute amounts (these reduce expenses)
+    total_refunds = refund_cube['Absolute Amount'].sum()
     
     # Net expenses = expenses - refunds
     net_expenses = total_expenses - total_refunds
     
-    total_transactions = len(filtered_df)
+    # Transactions with an amount (the amount range filter drops the others)
+    total_transactions = int(spending_cube['Amount Count'].sum())
     
     with col1:
         st.metric("💸 Total Expenses", f"${total_expenses:,.2f}", 
@@ -396,20 +617,14 @@ def main():
     # Visualizations
     st.header("📊 Spending Analysis")
     
-    # Prepare expense data for charts
-    # Include both Expense and Refund types, but show refunds separately if needed
-    expense_df = filtered_df[filtered_df['Transaction Type'] == 'Expense'].copy()
-    expense_df['Absolute Amount'] = expense_df['Amount'].abs()
-    
-    if len(expense_df) > 0:
+    # Charts roll up the expense cells of the cube; refunds are shown separately
+    if len(expense_cube) > 0:
         # Show refund summary if there are refunds
-        refund_df = filtered_df[filtered_df['Transaction Type'] == 'Refund'].copy()
-        if len(refund_df) > 0:
-            refund_total = refund_df['Amount'].abs().sum()
-            st.info(f"💰 Note: You have ${refund_total:,.2f} in refunds. Net expenses shown below already subtract these refunds.")
+        if len(refund_cube) > 0:
+            st.info(f"💰 Note: You have ${total_refunds:,.2f} in refunds. Net expenses shown below already subtract these refunds.")
         
-        # Group by category
-        category_spending = expense_df.groupby('Category')['Absolute Amount'].sum().reset_index()
+        # Roll up by category
+        category_spending = rollup(expense_cube, 'Category')[['Category', 'Absolute Amount']]
         category_spending = category_spending.sort_values('Absolute Amount', ascending=False)
         
         # Two column layout for charts
@@ -449,8 +664,7 @@ def main():
         
         # Spending over time
         st.subheader("📈 Spending Over Time")
-        expense_df['Month'] = expense_df['Transaction Date'].dt.to_period('M').astype(str)
-        monthly_spending = expense_df.groupby('Month')['Absolute Amount'].sum().reset_index()
+        monthly_spending = rollup(expense_cube, 'Month')[['Month', 'Absolute Amount']]
         
         fig_line = px.line(
             monthly_spending,
@@ -465,7 +679,7 @@ def main():
         
         # Spending by card source
         st.subheader("💳 Spending by Card")
-        source_spending = expense_df.groupby('Source')['Absolute Amount'].sum().reset_index()
+        source_spending = rollup(expense_cube, 'Source')[['Source', 'Absolute Amount']]
         source_spending = source_spending.sort_values('Absolute Amount', ascending=True)
         
         fig_source = px.bar(
@@ -485,10 +699,11 @@ def main():
         st.subheader("🏪 Top Merchants by Spending")
         
         # Exclude Payment/Transfer from merchant analysis
-        merchant_expense_df = expense_df[expense_df['Normalized Merchant'] != 'Payment/Transfer'].copy()
+        merchant_cube = expense_cube[expense_cube['Normalized Merchant'] != 'Payment/Transfer']
         
-        if len(merchant_expense_df) > 0:
-            merchant_spending = merchant_expense_df.groupby('Normalized Merchant')['Absolute Amount'].sum().reset_index()
+        if len(merchant_cube) > 0:
+            merchant_totals = rollup(merchant_cube, 'Normalized Merchant')
+            merchant_spending = merchant_totals[['Normalized Merchant', 'Absolute Amount']]
             merchant_spending = merchant_spending.sort_values('Absolute Amount', ascending=False).head(15)
             
             col1, col2 = st.columns(2)
@@ -524,9 +739,7 @@ def main():
             
             # Merchant frequency analysis
             st.subheader("📊 Merchant Transaction Frequency")
-            merchant_freq = merchant_expense_df.groupby('Normalized Merchant').agg({
-                'Absolute Amount': ['sum', 'mean', 'count']
-            }).reset_index()
+            merchant_freq = merchant_totals[['Normalized Merchant', 'Absolute Amount', 'Average Amount', 'Amount Count']]
             merchant_freq.columns = ['Merchant', 'Total Spent', 'Avg per Transaction', 'Transaction Count']
             merchant_freq = merchant_freq.sort_values('Transaction Count', ascending=False).head(15)
             
@@ -547,9 +760,7 @@ def main():
         
         # Category breakdown table
         st.subheader("📋 Category Breakdown")
-        category_details = expense_df.groupby('Category').agg({
-            'Absolute Amount': ['sum', 'mean', 'count']
-        }).reset_index()
+        category_details = rollup(expense_cube, 'Category')[['Category', 'Absolute Amount', 'Average Amount', 'Amount Count']]
         category_details.columns = ['Category', 'Total Spent', 'Avg per Transaction', 'Number of Transactions']
         category_details['Total Spent'] = category_details['Total Spent'].apply(lambda x: f"${x:,.2f}")
         category_details['Avg per Transaction'] = category_details['Avg per Transaction'].apply(lambda x: f"${x:,.2f}")
@@ -819,13 +1030,13 @@ def main():
     
     with col2:
         if st.button("🔄 Refresh Data"):
-            st.cache_data.clear()
+            # Cached data is keyed by file versions: a rerun picks up new files
             st.rerun()
     
     # Footer
     st.markdown("---")
     st.markdown(f"_Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}_")
-    st.markdown(f"_Showing {len(filtered_df)} of {len(df)} total transactions_")
+    st.markdown(f"_Showing {len(filtered_df)} of {total_count} total transactions_")
 
 if __name__ == "__main__":
     main()
@@ -9,9 +9,31 @@ import hashlib
 from pathlib import Path
 from datetime import datetime
 
+import pandas as pd
+
 # Get the project root directory (parent of src/)
 PROJECT_ROOT = Path(__file__).parent.parent
 
+# Column holding the precomputed transaction ids of a loaded DataFrame
+TRANSACTION_ID_COLUMN = 'Transaction ID'
+
+def _key_text(series, missing=None):
+    """
+    str() of every value of a column, as the f-string of _generate_transaction_id
+    writes it; missing values read as missing when it is given.
+    """
+    if pd.api.types.is_float_dtype(series.dtype):
+        return series.astype(str).to_numpy(dtype=object)
+    # Dates, descriptions and sources repeat: format each distinct value once
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    texts = [missing if missing is not None and pd.isna(value) else str(value) for value in uniques]
+    return pd.Index(texts, dtype=object).to_numpy()[codes]
+
+def _description(row):
+    """Description of a row, '' when missing (as ingestion reads an empty one)."""
+    description = row['Description']
+    return '' if pd.isna(description) else description
+
 class IgnoreListManager:
     def __init__(self, ignore_file=None):
         if ignore_file is None:
@@ -73,17 +95,41 @@ class IgnoreListManager:
         This creates a consistent ID even if the data is reloaded.
         """
         # Use date, amount, description, and source to create a unique hash
-        key_string = f"{row['Transaction Date']}|{row['Amount']}|{row['Description']}|{row['Source']}"
+        key_string = f"{row['Transaction Date']}|{row['Amount']}|{_description(row)}|{row['Source']}"
         return hashlib.md5(key_string.encode()).hexdigest()
     
+    def transaction_id(self, row):
+        """
+        ID of a transaction: the Transaction ID written at ingestion when the
+        row has one (the id ignored_mask compares), else generated from it.
+        """
+        transaction_id = row.get(TRANSACTION_ID_COLUMN)
+        if isinstance(transaction_id, str) and transaction_id:
+            return transaction_id
+        return self._generate_transaction_id(row)
+    
+    @staticmethod
+    def transaction_ids(df):
+        """
+        Transaction ids of every row of df in one pass (the same ids as
+        _generate_transaction_id), as a Series aligned with df.
+        """
+        columns = [_key_text(df['Transaction Date']), _key_text(df['Amount']),
+                   _key_text(df['Description'], missing=''), _key_text(df['Source'])]
+        ids = [
+            hashlib.md5(f"{date}|{amount}|{description}|{source}".encode()).hexdigest()
+            for date, amount, description, source in zip(*columns)
+        ]
+        return pd.Series(ids, index=df.index, dtype=object)
+    
     def add_transaction(self, row):
         """Add a transaction to the ignore list."""
-        transaction_id = self._generate_transaction_id(row)
+        transaction_id = self.transaction_id(row)
         
         if transaction_id not in self.ignored_transactions:
             self.ignored_transactions[transaction_id] = {
                 'date': str(row['Transaction Date']),
-                'description': row['Description'],
+                'description': _description(row),
                 'merchant': row.get('Normalized Merchant', ''),
                 'category': row.get('Category', ''),
                 'amount': float(row['Amount']),
@@ -104,9 +150,23 @@ class IgnoreListManager:
     
     def is_ignored(self, row):
         """Check if a transaction should be ignored."""
-        transaction_id = self._generate_transaction_id(row)
+        transaction_id = self.transaction_id(row)
         return transaction_id in self.ignored_transactions
     
+    def ignored_mask(self, df):
+        """
+        Boolean Series, True for the rows of df on the ignore list. Uses the
+        Transaction ID column when df has one (computed once with the data)
+        and skips the ids altogether when nothing is ignored.
+        """
+        if not self.ignored_transactions:
+            return pd.Series(False, index=df.index)
+        if TRANSACTION_ID_COLUMN in df:
+            ids = df[TRANSACTION_ID_COLUMN]
+        else:
+            ids = self.transaction_ids(df)
+        return ids.isin(self.ignored_transactions.keys())
+    
     def get_all_ignored(self):
         """Get all ignored transactions with their IDs."""
         return [
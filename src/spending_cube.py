@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Spending Cube
+Pre-aggregates transactions to one cell per day, card source, category,
+merchant and transaction type, holding the amount sum, absolute-amount sum
+and counts. The dashboard's metrics and charts slice and roll up the cube
+instead of grouping the raw transactions on every rerun.
+"""
+
+import pandas as pd
+
+# Dimensions of a cube cell (Month is carried along; it follows from Day)
+CUBE_DIMENSIONS = ['Day', 'Source', 'Category', 'Normalized Merchant', 'Transaction Type']
+MONTH_COLUMN = 'Month'
+
+# Measures summed when cells are rolled up
+CUBE_MEASURES = ['Amount', 'Absolute Amount', 'Count', 'Amount Count']
+
+def build_cube(df):
+    """
+    Aggregate prepared transactions (typed dates, derived columns) into cube
+    cells: Amount and Absolute Amount sums, Count (transactions) and Amount
+    Count (transactions with an amount), plus the Min/Max Amount of each cell
+    for the amount range slider.
+    """
+    columns = ['Source', 'Category', 'Normalized Merchant', 'Transaction Type', MONTH_COLUMN, 'Amount', 'Absolute Amount']
+    frame = df[columns].assign(Day=df['Transaction Date'].dt.normalize())
+    # Low-cardinality keys group (and roll up) on their codes
+    for column in ('Source', 'Category', 'Normalized Merchant', 'Transaction Type', MONTH_COLUMN):
+        if not isinstance(frame[column].dtype, pd.CategoricalDtype):
+            frame[column] = frame[column].astype('category')
+    grouped = frame.groupby(CUBE_DIMENSIONS + [MONTH_COLUMN], observed=True, dropna=False, sort=False)
+    cube = grouped.agg(**{
+        'Amount': ('Amount', 'sum'),
+        'Absolute Amount': ('Absolute Amount', 'sum'),
+        'Count': ('Amount', 'size'),
+        'Amount Count': ('Absolute Amount', 'count'),
+        'Min Amount': ('Amount', 'min'),
+        'Max Amount': ('Amount', 'max'),
+    })
+    return cube.reset_index()
+
+def slice_cube(cube, start_date=None, end_date=None, sources=None, categories=None, exclude_categories=None,
+               merchants=None, exclude_merchants=None, transaction_types=None):
+    """
+    Cells matching the dashboard filters: dates bound the day (inclusive),
+    each list keeps (or with exclude_, drops) cells whose dimension is one of
+    its values. None means no filter.
+    """
+    mask = pd.Series(True, index=cube.index)
+    if start_date is not None:
+        mask &= cube['Day'] >= pd.Timestamp(start_date)
+    if end_date is not None:
+        mask &= cube['Day'] <= pd.Timestamp(end_date)
+    for column, values, negate in (('Source', sources, False),
+                                   ('Category', categories, False),
+                                   ('Category', exclude_categories, True),
+                                   ('Normalized Merchant', merchants, False),
+                                   ('Normalized Merchant', exclude_merchants, True),
+                                   ('Transaction Type', transaction_types, False)):
+        if values is None:
+            continue
+        matches = cube[column].isin(list(values))
+        mask &= ~matches if negate else matches
+    return cube[mask]
+
+def rollup(cube, dimension):
+    """Measures of the cells rolled up by one dimension, with the mean absolute amount per transaction."""
+    totals = cube.groupby(dimension, observed=True)[CUBE_MEASURES].sum().reset_index()
+    totals['Average Amount'] = totals['Absolute Amount'] / totals['Amount Count']
+    return totals
+
+def amount_bounds(cube):
+    """(min, max) transaction amount of the cells, or None when they hold no amounts."""
+    if not len(cube) or cube['Min Amount'].isna().all():
+        return None
+    return float(cube['Min Amount'].min()), float(cube['Max Amount'].max())
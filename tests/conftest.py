@@ -0,0 +1,6 @@
+"""The scripts import each other as flat modules, so tests import them the same way."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
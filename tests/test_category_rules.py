@@ -0,0 +1,75 @@
+"""Category rule matcher: row and column matching, auto rules and suggestions."""
+
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from category_rules import DEFAULT_CATEGORY_RULES, CategoryRules, _sample_frame
+
+
+def row(type_='Sale', description='', merchant='', category=''):
+    return {'Type': type_, 'Description': description, 'Normalized Merchant': merchant, 'Category': category}
+
+
+@pytest.mark.parametrize('transaction, expected', [
+    (row('Payment', 'AUTOPAY'), 'Payment'),
+    (row(' payment ', 'AUTOPAY'), 'Payment'),
+    (row('Return', 'AMAZON'), 'Refund'),
+    (row('Sale', 'CHASE CREDIT CRD AUTOPAY PAYMENT'), 'Payment'),
+    (row('Sale', 'BILT RENT 1234'), 'Rent'),
+    (row('Sale', 'LEMONADE INSURANCE'), 'Insurance'),
+    (row('Sale', 'DAILY CASH REDEMPTION'), 'Payment'),
+    (row('Sale', 'STARBUCKS'), ''),
+    # Patterns only look at their own fields, and the Type only at the Type
+    (row('Sale', 'AMAZON', 'PAYMENT'), ''),
+    (row('Sale', 'RETURN'), ''),
+])
+def test_match_auto_rules(transaction, expected):
+    assert DEFAULT_CATEGORY_RULES.match(transaction) == expected
+
+
+def test_assign_keeps_existing_category():
+    assert DEFAULT_CATEGORY_RULES.assign(row('Payment', 'AUTOPAY', category='Dining')) == 'Dining'
+    assert DEFAULT_CATEGORY_RULES.assign(row('Payment', 'AUTOPAY', category='  ')) == 'Payment'
+
+
+@pytest.mark.parametrize('transaction, expected', [
+    # Suggestions come from the suggestion rules only, in table order
+    (row('Sale', 'LEMONADE INSURANCE'), 'Bills & Utilities'),
+    (row('Sale', 'TRADER JOE\'S #543'), 'Groceries'),
+    (row('Sale', 'SQ *BLUE BOTTLE', 'Blue Bottle Coffee'), 'Food & Drink'),
+    (row('Sale', 'BILT RENT'), 'Rent'),
+    (row('Payment', 'AUTOPAY'), None),
+])
+def test_suggest(transaction, expected):
+    assert DEFAULT_CATEGORY_RULES.suggest(transaction) == expected
+
+
+def test_assign_column_matches_assign():
+    frame = _sample_frame(3000, seed=1)
+    assert DEFAULT_CATEGORY_RULES.column_mismatches(frame) == []
+
+
+def test_suggest_column_matches_suggest():
+    frame = _sample_frame(1000, seed=2)
+    suggested = DEFAULT_CATEGORY_RULES.suggest_column(frame)
+    expected = [DEFAULT_CATEGORY_RULES.suggest(values) or '' for values in frame.to_dict('records')]
+    assert list(suggested) == expected
+
+
+def test_match_column_handles_missing_columns():
+    frame = pd.DataFrame({'Description': ['BILT RENT', 'COFFEE']})
+    assert list(DEFAULT_CATEGORY_RULES.match_column(frame)) == ['Rent', '']
+
+
+def test_invalid_rules_are_rejected():
+    with pytest.raises(ValueError):
+        CategoryRules([{'category': 'Rent'}])
+    with pytest.raises(ValueError):
+        CategoryRules([{'category': 'Rent', 'pattern': 'RENT', 'fields': ('Memo',)}])
+
+
+def test_fingerprint_follows_rule_table():
+    rules = [{'category': 'Rent', 'pattern': 'RENT'}]
+    assert CategoryRules(rules).fingerprint == CategoryRules(rules).fingerprint
+    assert CategoryRules(rules).fingerprint != CategoryRules(rules + [{'category': 'Pay', 'types': ('Payment',)}]).fingerprint
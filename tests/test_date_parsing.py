@@ -0,0 +1,72 @@
+"""Date format detection and canonicalization."""
+
+import pytest
+
+from date_parsing import (BAD_DATE_KEY, CANONICAL_DATE_FORMAT, DETECTION_SAMPLE_SIZE, DateParser,
+                          canonicalize_dates, date_key, detect_date_format)
+
+
+@pytest.mark.parametrize('values, expected', [
+    (['02/15/2026', '12/31/2025'], '%m/%d/%Y'),
+    (['02/15/26', '12/31/25'], '%m/%d/%y'),
+    (['2026-02-15', '2025-12-31'], '%Y-%m-%d'),
+    (['Feb 15, 2026'], '%b %d, %Y'),
+    (['', None, '  '], CANONICAL_DATE_FORMAT),
+    # The format parsing the most samples wins when none parses them all
+    (['2026-02-15', '2026-02-16', 'garbage'], '%Y-%m-%d'),
+])
+def test_detect_date_format(values, expected):
+    assert detect_date_format(values) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('02/05/2026', '02/05/2026'),
+    ('2/5/2026', '02/05/2026'),
+    (' 2/5/2026 ', '02/05/2026'),
+    ('13/01/2026', None),
+    ('', None),
+])
+def test_canonical_rewrites_unpadded_dates(value, expected):
+    assert DateParser('%m/%d/%Y').canonical(value) == expected
+
+
+def test_canonicalize_dates_rewrites_both_columns_and_counts_bad_dates():
+    rows = [
+        {'Transaction Date': '2026-02-15', 'Post Date': '2026-02-16', 'Line': 2},
+        {'Transaction Date': 'pending', 'Post Date': '', 'Line': 3},
+        {'Transaction Date': '2026-02-01', 'Post Date': 'n/a', 'Line': 4},
+    ]
+    stats = {}
+    result = list(canonicalize_dates(rows, stats))
+    assert stats['date_format'] == '%Y-%m-%d'
+    assert [row['Transaction Date'] for row in result] == ['02/15/2026', 'pending', '02/01/2026']
+    assert [row['Post Date'] for row in result] == ['02/16/2026', '', 'n/a']
+    assert stats['bad_dates'] == 1
+    assert stats['bad_date_lines'] == [3]
+
+
+def test_declared_format_skips_detection():
+    stats = {}
+    rows = list(canonicalize_dates([{'Transaction Date': '03/04/2026'}], stats, fmt='%d/%m/%Y'))
+    assert rows[0]['Transaction Date'] == '04/03/2026'
+
+
+def test_date_key_orders_dates_and_puts_bad_dates_last():
+    assert date_key('01/02/2026') > date_key('12/31/2025') > BAD_DATE_KEY
+    assert date_key('garbage') == BAD_DATE_KEY
+
+
+def test_columnar_detection_samples_the_same_rows():
+    pd = pytest.importorskip('pandas')
+    import columnar_loaders
+
+    # Blank and ISO dates in the sampled head rows, US dates further down
+    half = DETECTION_SAMPLE_SIZE // 2
+    values = [''] * half + ['2026-01-15'] * half + ['01/15/2026'] * DETECTION_SAMPLE_SIZE
+    rows = [{'Transaction Date': value} for value in values]
+    row_stats, frame_stats = {}, {}
+    canonical = [row['Transaction Date'] for row in canonicalize_dates(rows, row_stats)]
+    frame = columnar_loaders.canonicalize_date_columns(pd.DataFrame({'Transaction Date': values}), frame_stats)
+    assert frame_stats['date_format'] == row_stats['date_format'] == '%Y-%m-%d'
+    assert list(frame['Transaction Date']) == canonical
+    assert frame_stats['bad_dates'] == row_stats['bad_dates']
@@ -0,0 +1,77 @@
+"""Cross-file deduplication of overlapping exports."""
+
+import pytest
+
+from date_parsing import date_key
+from dedup import Deduplicator, amount_key, card_key
+
+
+def sort_key(row):
+    return date_key(row['Transaction Date'])
+
+
+def txn(date, amount, description='COFFEE'):
+    return {'Transaction Date': date, 'Amount': amount, 'Description': description}
+
+
+@pytest.mark.parametrize('first, second', [
+    ('Chase Sapphire 2025 Q1', 'Chase Sapphire Jan 2025'),
+    ('chase_sapphire_2025-01', 'chase sapphire 202502'),
+    ('Chase Sapphire 20250131', 'Chase Sapphire 1st H2'),
+    ('Bilt ytd 2024', 'Bilt September'),
+])
+def test_card_key_ignores_periods(first, second):
+    assert card_key(first) == card_key(second)
+
+
+@pytest.mark.parametrize('first, second', [
+    ('Chase 4321', 'Chase 8765'),
+    ('Chase 4321 2025', 'Chase 8765 2025'),
+    ('Chase Sapphire', 'Chase Freedom'),
+])
+def test_card_key_keeps_card_numbers_and_names(first, second):
+    assert card_key(first) != card_key(second)
+
+
+def test_card_key_of_period_only_name():
+    assert card_key('2025') == '2025'
+
+
+def test_amount_key_rounds_to_cents():
+    assert amount_key('-12.5') == amount_key('-12.50') == -12.5
+    assert amount_key('abc') == 'abc'
+
+
+def test_overlapping_files_keep_each_transaction_once():
+    quarter = [txn('03/02/2025', '5.00'), txn('02/01/2025', '7.00'), txn('01/15/2025', '9.00')]
+    february = [txn('02/01/2025', '7.0')]
+    dedup = Deduplicator([card_key('Chase 2025 Q1'), card_key('Chase Feb 2025')])
+    rows = list(dedup.iter_unique([quarter, february], sort_key))
+    assert [row['Amount'] for row in rows] == ['5.00', '7.00', '9.00']
+    assert dedup.contributed == [3, 0]
+    assert dedup.duplicates == [0, 1]
+
+
+def test_repeats_within_a_file_survive():
+    # Two identical coffees on one day, one of them also in an overlapping export
+    full = [txn('02/01/2025', '4.50'), txn('02/01/2025', '4.50')]
+    partial = [txn('02/01/2025', '4.50')]
+    dedup = Deduplicator([card_key('Bilt Q1 2025'), card_key('Bilt Feb 2025')])
+    rows = list(dedup.iter_unique([full, partial], sort_key))
+    assert len(rows) == 2
+    assert dedup.duplicates == [0, 1]
+
+
+def test_different_cards_are_not_deduplicated():
+    dedup = Deduplicator([card_key('Chase 4321'), card_key('Chase 8765')])
+    rows = list(dedup.iter_unique([[txn('02/01/2025', '4.50')], [txn('02/01/2025', '4.50')]], sort_key))
+    assert len(rows) == 2
+    assert dedup.duplicates == [0, 0]
+
+
+def test_merge_is_ordered_most_recent_first():
+    first = [txn('03/01/2025', '1'), txn('01/01/2025', '2')]
+    second = [txn('02/01/2025', '3')]
+    dedup = Deduplicator([card_key('Chase'), card_key('Bilt')])
+    rows = list(dedup.iter_unique([first, second], sort_key))
+    assert [row['Transaction Date'] for row in rows] == ['03/01/2025', '02/01/2025', '01/01/2025']
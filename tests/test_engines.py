@@ -0,0 +1,72 @@
+"""The rows, columnar, streaming and parallel ingestion paths write the same output."""
+
+from datetime import date
+
+import pytest
+
+pytest.importorskip('pandas')
+
+import concatenate_transactions
+from generate_transactions import generate_dataset
+
+MULTILINE_CHASE = (
+    'Transaction Date,Post Date,Description,Category,Type,Amount,Memo\r\n'
+    '02/15/2026,02/16/2026,TRADER JOE\'S #543,Groceries,Sale,-67.3,"two\r\nlines"\r\n'
+    '\r\n'
+    '02/14/2026,02/15/2026,AMAZON.COM*AB4K9L23,,Sale,-129.99,\r\n'
+    '02/13/2026,02/14/2026,SHELL OIL,Gas,Sale,abc,"bad\namount"\r\n'
+    '2026-02-12,02/13/2026,STARBUCKS STORE 12345,,Sale,"-1,012.5",\r\n'
+    '02/11/2026,02/12/2026,PAYMENT THANK YOU,,Payment,500,\r\n'
+    '02/10/2026,02/11/2026,SOUTHWEST AIR,Travel\r\n'
+    '02/09/2026,02/10/2026,NETFLIX.COM,,Sale,-0,"say ""hi"""\r\n'
+)
+
+ENGINES = {
+    'rows': dict(engine='rows'),
+    'columnar': dict(engine='columnar'),
+    'stream': dict(streaming=True),
+    'jobs': dict(engine='rows', jobs=2),
+}
+
+
+@pytest.fixture(scope='module')
+def outputs(tmp_path_factory):
+    """Output and rejects bytes of each engine run over the same inputs."""
+    root = tmp_path_factory.mktemp('engines')
+    input_dir = root / 'input'
+    generate_dataset(input_dir, 3000, years=1, end=date(2026, 1, 31), seed=3)
+    (input_dir / 'chase_multiline.csv').write_bytes(MULTILINE_CHASE.encode('utf-8'))
+    results = {}
+    for name, options in ENGINES.items():
+        output = root / name / 'all_transactions.csv'
+        concatenate_transactions.concatenate_transactions(input_dir, output, incremental=False, store=False,
+                                                          partitions=False, **options)
+        results[name] = (output.read_bytes(), (output.parent / 'rejects.csv').read_bytes())
+    return results
+
+
+@pytest.mark.parametrize('name', [name for name in ENGINES if name != 'rows'])
+def test_engine_output_matches_rows_engine(outputs, name):
+    assert outputs[name][0] == outputs['rows'][0]
+    assert outputs[name][1] == outputs['rows'][1]
+
+
+def test_amounts_are_written_with_two_decimals(outputs):
+    text = outputs['rows'][0].decode('utf-8')
+    assert "TRADER JOE'S #543,Trader Joe's,Groceries,Sale,67.30" in text
+    assert ',Sale,1012.50,' in text
+    assert ',Sale,0.00,' in text
+
+
+def test_multiline_fields_keep_their_text_and_end_line(outputs):
+    text = outputs['rows'][0].decode('utf-8')
+    assert '"two\r\nlines"' in text
+    # The Amazon row is on line 5, after the two-line memo and a blank line
+    assert text.split('AMAZON.COM*AB4K9L23', 2)[2].split('\r\n', 1)[0].endswith(',5')
+
+
+def test_malformed_rows_are_rejected_with_their_line(outputs):
+    rejects = outputs['rows'][1].decode('utf-8').splitlines()
+    assert rejects[0] == 'File,Line,Reason,Record'
+    assert rejects[1].startswith("chase_multiline.csv,7,unparseable amount 'abc'")
+    assert rejects[-1].startswith('chase_multiline.csv,10,')
@@ -0,0 +1,79 @@
+"""Ingestion manifest: cached rows are reused only while file and pipeline are unchanged."""
+
+import os
+
+from ingest_manifest import IngestManifest
+
+ROWS = [{'Transaction Date': '02/01/2026', 'Amount': '4.50', 'Description': 'COFFEE'}]
+
+
+def cached_manifest(tmp_path, pipeline='p1'):
+    """A saved manifest caching ROWS for input.csv; returns (manifest, input path)."""
+    input_file = tmp_path / 'input.csv'
+    if not input_file.exists():
+        input_file.write_text('Transaction Date,Amount,Description\n02/01/2026,4.50,COFFEE\n')
+    manifest = IngestManifest(tmp_path / 'cache', pipeline)
+    entry, fingerprint = manifest.check(input_file)
+    if entry is None:
+        manifest.store(input_file, fingerprint, ROWS, source='Input', format='standard')
+        manifest.save()
+    return manifest, input_file
+
+
+def test_unchanged_file_reuses_cached_rows(tmp_path):
+    cached_manifest(tmp_path)
+    manifest, input_file = cached_manifest(tmp_path)
+    entry, fingerprint = manifest.check(input_file)
+    assert fingerprint is None
+    assert manifest.load_rows(entry) == ROWS
+
+
+def test_touched_file_is_reused_without_reparsing(tmp_path):
+    _, input_file = cached_manifest(tmp_path)
+    stat = input_file.stat()
+    os.utime(input_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    manifest = IngestManifest(tmp_path / 'cache', 'p1')
+    entry, _ = manifest.check(input_file)
+    assert entry is not None
+    assert entry['mtime_ns'] == input_file.stat().st_mtime_ns
+
+
+def test_changed_file_is_reparsed(tmp_path):
+    _, input_file = cached_manifest(tmp_path)
+    input_file.write_text('Transaction Date,Amount,Description\n02/01/2026,5.50,COFFEE\n')
+    entry, fingerprint = IngestManifest(tmp_path / 'cache', 'p1').check(input_file)
+    assert entry is None
+    assert fingerprint['sha256']
+
+
+def test_pipeline_change_discards_entries_but_keeps_file_ids(tmp_path):
+    manifest, input_file = cached_manifest(tmp_path)
+    file_id = manifest.file_id(input_file)
+    manifest.save()
+    rebuilt = IngestManifest(tmp_path / 'cache', 'p2')
+    assert rebuilt.check(input_file)[0] is None
+    assert rebuilt.file_id(input_file) == file_id
+
+
+def test_missing_run_file_is_reparsed(tmp_path):
+    manifest, input_file = cached_manifest(tmp_path)
+    manifest.rows_path(input_file).unlink()
+    assert IngestManifest(tmp_path / 'cache', 'p1').check(input_file)[0] is None
+
+
+def test_prune_drops_removed_files(tmp_path):
+    manifest, input_file = cached_manifest(tmp_path)
+    run_file = manifest.rows_path(input_file)
+    assert manifest.prune([]) == [manifest._key(input_file)]
+    assert not run_file.exists()
+
+
+def test_output_is_current_until_rewritten(tmp_path):
+    manifest, _ = cached_manifest(tmp_path)
+    output = tmp_path / 'all_transactions.csv'
+    assert not manifest.output_is_current(output)
+    output.write_text('header\n')
+    manifest.record_output(output, file_counts={})
+    assert manifest.output_is_current(output)
+    output.write_text('header\nedited\n')
+    assert not manifest.output_is_current(output)
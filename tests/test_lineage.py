@@ -0,0 +1,66 @@
+"""Row lineage: record line numbers and the lineage.json reverse index."""
+
+import csv
+import io
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from lineage import load_lineage, record_lines, row_ranges, write_lineage
+
+
+def reader_lines(data):
+    """Line numbers the rows engine reports: csv.reader's line_num after each record."""
+    reader = csv.reader(io.StringIO(data.decode('utf-8-sig'), newline=''))
+    next(reader)
+    return [reader.line_num for values in reader if values]
+
+
+@pytest.mark.parametrize('data', [
+    b'a,b\n1,2\n3,4\n',
+    b'a,b\r\n1,2\r\n3,4',
+    b'a,b\n\n1,2\n\r\n3,4\n\n',
+    b'a,b\n1,"two\nlines"\n3,4\n',
+    b'a,b\r\n1,"two\r\nlines"\r\n"x\n\ny",4\r\n5,6\r\n',
+    b'a,b\n1,"say ""hi""\nthere"\n3,"""quoted"""\n',
+    b'a,b\r1,2\r3,"x\ry"\r4,5\r',
+])
+def test_record_lines_match_csv_reader(data):
+    expected = reader_lines(data)
+    assert list(record_lines(data, len(expected))) == expected
+
+
+def test_record_lines_after_multiline_field():
+    data = b'a,b\n1,"two\nlines"\n3,4\n'
+    assert list(record_lines(data, 2)) == [3, 4]
+
+
+def test_record_lines_with_unbalanced_quotes_use_csv_reader():
+    data = b'a,b\n1,5" screen\n3,4\n'
+    expected = reader_lines(data)
+    assert list(record_lines(data, len(expected))) == expected
+
+
+def test_row_ranges():
+    expected = {1: [[0, 2], [4, 5]], 2: [[2, 4]]}
+    assert row_ranges([1, 1, 2, 2, 1]) == expected
+    assert row_ranges(np.array([1, 1, 2, 2, 1])) == expected
+    assert row_ranges(np.array([], dtype=int)) == {}
+
+
+def test_write_and_load_lineage(tmp_path):
+    path = tmp_path / 'lineage.json'
+    files = {1: {'file': 'chase.csv', 'source': 'Chase'}, 2: {'file': 'bilt.csv', 'source': 'Bilt'}}
+    write_lineage(path, files, [2, 1, 1, 2], output_info={'size': 10})
+    lineage = load_lineage(path)
+    assert lineage['output'] == {'size': 10}
+    assert lineage['files']['1']['rows'] == 2
+    assert lineage['files']['2']['row_ranges'] == [[0, 1], [3, 4]]
+
+
+def test_load_lineage_ignores_missing_or_other_versions(tmp_path):
+    path = tmp_path / 'lineage.json'
+    assert load_lineage(path) is None
+    path.write_text('{"version": 0}')
+    assert load_lineage(path) is None
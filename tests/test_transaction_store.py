@@ -0,0 +1,101 @@
+"""SQLite transaction store: upserts keep hand edits, and edits reach the other outputs."""
+
+import csv
+
+import pytest
+
+from transaction_store import TransactionStore, apply_edits
+
+ROWS = [
+    {'Source': 'Chase', 'Transaction Date': '02/02/2026', 'Description': 'COFFEE', 'Normalized Merchant': 'Cafe',
+     'Category': '', 'Type': 'Sale', 'Amount': '4.50', 'Transaction Type': 'Expense'},
+    {'Source': 'Chase', 'Transaction Date': '02/02/2026', 'Description': 'COFFEE', 'Normalized Merchant': 'Cafe',
+     'Category': '', 'Type': 'Sale', 'Amount': '4.50', 'Transaction Type': 'Expense'},
+    {'Source': 'Chase', 'Transaction Date': '02/01/2026', 'Description': 'AUTOPAY', 'Normalized Merchant': 'Unknown',
+     'Category': 'Payment', 'Type': 'Payment', 'Amount': '-100.00', 'Transaction Type': 'Payment'},
+]
+
+
+def copies(rows):
+    return [dict(row) for row in rows]
+
+
+@pytest.fixture
+def store(tmp_path):
+    with TransactionStore(tmp_path / 'transactions.db') as store:
+        store.upsert_rows(copies(ROWS))
+        yield store
+
+
+def test_upsert_inserts_updates_and_deletes(store):
+    assert store.count() == 3
+    assert store.upsert_rows(copies(ROWS)) == (0, 3, 0)
+    assert store.upsert_rows(copies(ROWS[:2])) == (0, 2, 1)
+    assert store.upsert_rows(copies(ROWS)) == (1, 2, 0)
+
+
+def test_identical_rows_stay_distinct(store):
+    ids = list(store.read_frame(parse_dates=False).index)
+    assert len(set(ids)) == 3
+
+
+def test_upsert_keeps_edited_category_and_merchant(store):
+    frame = store.read_frame(parse_dates=False)
+    first, second = frame.index[:2]
+    store.update_category(first, 'Payment')
+    store.update_merchant(second, 'Blue Bottle')
+    store.commit()
+    store.upsert_rows(copies(ROWS))
+    frame = store.read_frame(parse_dates=False)
+    assert frame.loc[first, 'Category'] == 'Payment'
+    # A Payment category makes the transaction a payment
+    assert frame.loc[first, 'Transaction Type'] == 'Payment'
+    assert frame.loc[second, 'Normalized Merchant'] == 'Blue Bottle'
+    assert frame.loc[second, 'Category'] == ''
+
+
+def test_edits_apply_to_the_matching_occurrence(store):
+    second = store.read_frame(parse_dates=False).index[1]
+    store.update_category(second, 'Dining')
+    rows = list(apply_edits(copies(ROWS), store.edits()))
+    assert [row['Category'] for row in rows] == ['', 'Dining', 'Payment']
+    assert 'Transaction Type' in rows[1]
+
+
+def test_filters(store):
+    assert store.count(categories=['Payment']) == 1
+    assert store.count(exclude_categories=['Payment']) == 2
+    assert store.count(start_date='2026-02-02') == 2
+    assert store.count(sources=[]) == 0
+
+
+def test_ingestion_writes_edits_through(tmp_path):
+    pytest.importorskip('pandas')
+    import concatenate_transactions
+
+    input_dir = tmp_path / 'input'
+    input_dir.mkdir()
+    (input_dir / 'chase_test.csv').write_text(
+        'Transaction Date,Post Date,Description,Category,Type,Amount,Memo\n'
+        '02/02/2026,02/03/2026,STARBUCKS STORE 1,,Sale,-4.50,\n'
+        '02/01/2026,02/02/2026,TRADER JOE\'S,,Sale,-20.00,\n'
+    )
+    output = tmp_path / 'out' / 'all_transactions.csv'
+    concatenate_transactions.concatenate_transactions(input_dir, output, store=True, partitions=False)
+    with TransactionStore(output.parent / 'transactions.db') as store:
+        first = store.read_frame(parse_dates=False).index[0]
+        store.update_category(first, 'Dining')
+        store.commit()
+        concatenate_transactions.rewrite_outputs(output, store.edits())
+
+    def categories():
+        with open(output, newline='', encoding='utf-8') as f:
+            return [row['Category'] for row in csv.DictReader(f)]
+
+    assert categories()[0] == 'Dining'
+    edited = output.read_bytes()
+    # Later rebuilds, with any engine, keep the edit
+    for engine in ('rows', 'columnar'):
+        concatenate_transactions.concatenate_transactions(input_dir, output, incremental=False, engine=engine,
+                                                          partitions=False)
+        assert output.read_bytes() == edited